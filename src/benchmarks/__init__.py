@@ -0,0 +1,2 @@
+from .runner import run_benchmarks, compare_with_baseline, load_baseline, save_results, BenchmarkResult, Regression
+from .datasets import Dataset, load_dataset
@@ -0,0 +1,196 @@
+"""
+The benchmark cases.
+
+Each case has a setup function, which is not measured, and a run function, which is measured.
+setup(context) returns the arguments of run(). Cases whose input is missing from the dataset are skipped.
+"""
+import os
+import random
+from collections import namedtuple
+
+import polib
+
+import sgpo
+from sgpo import pot_delta, compiled_catalog, catalog_validator, KeyResolver
+from sgv23_mapping import SgMap, CombinedSgMap
+from .datasets import Dataset
+
+BenchmarkCase = namedtuple('BenchmarkCase', ['name', 'requires', 'setup', 'run'])
+
+BenchmarkContext = namedtuple('BenchmarkContext', ['dataset', 'work_dir', 'pot_file', 'po_file'])
+
+# Number of find_by_key() and 'in' calls per run
+_LOOKUP_COUNT = 10000
+
+
+def create_context(dataset: Dataset, work_dir: str) -> BenchmarkContext:
+    """
+    Writes the pot and po texts of the dataset to work_dir, for the benchmarks that read files.
+    """
+    pot_file = _write_text(os.path.join(work_dir, 'messages.pot'), dataset.pot_text)
+    po_file = _write_text(os.path.join(work_dir, 'language.po'), dataset.po_text)
+    return BenchmarkContext(dataset=dataset, work_dir=work_dir, pot_file=pot_file, po_file=po_file)
+
+
+def get_cases() -> list:
+    return [
+        BenchmarkCase('pofile', ['po_text'], lambda c: (c.po_file,), sgpo.pofile),
+        BenchmarkCase('pofile_fast', ['po_text'], lambda c: (c.po_file, sgpo.PARSER_FAST), sgpo.pofile),
+        BenchmarkCase('pofile_from_text', ['po_text'], lambda c: (c.dataset.po_text,), sgpo.pofile_from_text),
+        BenchmarkCase('find_by_key_hit', ['po_text'], _setup_find_by_key_hit, _run_find_by_key),
+        BenchmarkCase('find_by_key_miss', ['po_text'], _setup_find_by_key_miss, _run_find_by_key),
+        BenchmarkCase('find_by_key_miss_after_iteration', ['po_text'], _setup_find_by_key_miss_after_iteration,
+                      _run_find_by_key),
+        BenchmarkCase('contains_miss_after_iteration', ['po_text'], _setup_contains_miss_after_iteration,
+                      _run_contains),
+        BenchmarkCase('import_unknown', ['pot_text', 'unknown_text'], _setup_import_unknown, _run_import),
+        BenchmarkCase('import_mismatch', ['pot_text', 'mismatch_text'], _setup_import_mismatch, _run_import),
+        BenchmarkCase('import_pot', ['pot_text', 'po_text'], _setup_import_pot, _run_import),
+        BenchmarkCase('import_pot_delta', ['pot_text', 'po_text', 'unknown_text', 'mismatch_text'],
+                      _setup_import_pot_delta, _run_import),
+        BenchmarkCase('key_resolver', ['pot_text', 'unknown_text'], _setup_key_resolver, _run_key_resolver),
+        BenchmarkCase('compile_catalog', ['po_text'], lambda c: (_parse(c.dataset.po_text),),
+                      compiled_catalog.compile_catalog),
+        BenchmarkCase('compiled_catalog_lookup', ['po_text'], _setup_compiled_catalog_lookup,
+                      _run_compiled_catalog_lookup),
+        BenchmarkCase('validate_catalog', ['po_text'], lambda c: (c.po_file,), catalog_validator.validate_file),
+        BenchmarkCase('sort', ['po_text'], _setup_shuffled_po, lambda po: po.sort()),
+        BenchmarkCase('format', ['po_text'], _setup_shuffled_po, lambda po: po.format()),
+        BenchmarkCase('save', ['po_text'], _setup_save, lambda po, file: po.save(file)),
+        BenchmarkCase('save_unchanged', ['po_text'], _setup_save_unchanged,
+                      lambda po, file: po.save(file, only_if_changed=True)),
+        BenchmarkCase('sgmap_parse', ['master_map_text'], lambda c: (c.dataset.master_map_text, 'en_US'),
+                      SgMap.from_text),
+        BenchmarkCase('combined_sgmap', ['master_map_text', 'locale_map_text', 'state_map_text'],
+                      _setup_combined_sgmap, CombinedSgMap),
+    ]
+
+
+def is_available(case: BenchmarkCase, dataset: Dataset) -> bool:
+    return all(getattr(dataset, field) is not None for field in case.requires)
+
+
+def _setup_find_by_key_hit(context: BenchmarkContext) -> tuple:
+    po = _parse(context.dataset.po_text)
+    keys = [key for key in po.get_key_list() if key.msgctxt is not None]
+    return po, random.Random(0).choices(keys, k=_LOOKUP_COUNT) if keys else []
+
+
+def _setup_find_by_key_miss(context: BenchmarkContext) -> tuple:
+    po, keys = _setup_find_by_key_hit(context)
+    return po, [key._replace(msgctxt=key.msgctxt + '.missing') for key in keys]
+
+
+def _setup_find_by_key_miss_after_iteration(context: BenchmarkContext) -> tuple:
+    # The scripts iterate the entries before they look up keys, which must not make the lookups slower.
+    po, keys = _setup_find_by_key_miss(context)
+    for _ in po:
+        pass
+    return po, keys
+
+
+def _setup_contains_miss_after_iteration(context: BenchmarkContext) -> tuple:
+    po, keys = _setup_find_by_key_miss_after_iteration(context)
+    return po, [polib.POEntry(msgctxt=msgctxt, msgid=msgid or '', msgstr='') for msgctxt, msgid in keys]
+
+
+def _run_find_by_key(po: sgpo.SgPo, keys: list) -> None:
+    for msgctxt, msgid in keys:
+        po.find_by_key(msgctxt, msgid)
+
+
+def _run_contains(po: sgpo.SgPo, entries: list) -> None:
+    for entry in entries:
+        entry in po
+
+
+def _setup_import_unknown(context: BenchmarkContext) -> tuple:
+    pot = _parse(context.dataset.pot_text)
+    return pot.import_unknown, _parse(context.dataset.unknown_text)
+
+
+def _setup_import_mismatch(context: BenchmarkContext) -> tuple:
+    pot = _parse(context.dataset.pot_text)
+    return pot.import_mismatch, _parse(context.dataset.mismatch_text)
+
+
+def _setup_import_pot(context: BenchmarkContext) -> tuple:
+    po = _parse(context.dataset.po_text)
+    return po.import_pot, _parse(context.dataset.pot_text)
+
+
+def _setup_import_pot_delta(context: BenchmarkContext) -> tuple:
+    # The current pot has the keys of the unknown and mismatch files. The po file gets only these changes.
+    previous_pot = _parse(context.dataset.pot_text)
+    pot = _parse(context.dataset.pot_text)
+    pot.import_unknown(_parse(context.dataset.unknown_text))
+    pot.import_mismatch(_parse(context.dataset.mismatch_text))
+    po = _parse(context.dataset.po_text)
+    return po.import_pot_delta, pot_delta.diff_pots(previous_pot, pot)
+
+
+def _setup_key_resolver(context: BenchmarkContext) -> tuple:
+    keys = [(entry.msgctxt, entry.msgid) for entry in _parse(context.dataset.unknown_text)]
+    return _parse(context.dataset.pot_text), keys
+
+
+def _run_key_resolver(pot: sgpo.SgPo, keys: list) -> None:
+    KeyResolver(pot).resolve_all(keys)
+
+
+def _setup_compiled_catalog_lookup(context: BenchmarkContext) -> tuple:
+    po, keys = _setup_find_by_key_hit(context)
+    catalog_file = os.path.join(context.work_dir, 'language' + compiled_catalog.CATALOG_FILE_EXTENSION)
+    compiled_catalog.write_catalog(po, catalog_file)
+    return catalog_file, keys
+
+
+def _run_compiled_catalog_lookup(catalog_file: str, keys: list) -> None:
+    # Includes opening the catalog, which is what a tool that only reads translations pays at startup.
+    with compiled_catalog.CompiledCatalog(catalog_file) as catalog:
+        for msgctxt, msgid in keys:
+            catalog.find_by_key(msgctxt, msgid)
+
+
+def _run_import(method, argument) -> None:
+    method(argument)
+
+
+def _setup_shuffled_po(context: BenchmarkContext) -> tuple:
+    po = _parse(context.dataset.po_text)
+    entries = list(po)
+    random.Random(0).shuffle(entries)
+    po.clear()
+    list.extend(po, entries)
+    return po,
+
+
+def _setup_save(context: BenchmarkContext) -> tuple:
+    return sgpo.pofile(context.po_file), os.path.join(context.work_dir, 'saved.po')
+
+
+def _setup_save_unchanged(context: BenchmarkContext) -> tuple:
+    po = sgpo.pofile(context.po_file)
+    file = os.path.join(context.work_dir, 'unchanged.po')
+    po.save(file)
+    return po, file
+
+
+def _setup_combined_sgmap(context: BenchmarkContext) -> tuple:
+    dataset = context.dataset
+    return (SgMap.from_text(dataset.master_map_text, 'en_US'),
+            SgMap.from_text(dataset.locale_map_text, 'xx_XX'),
+            SgMap.from_text(dataset.state_map_text, 'xx_XX'))
+
+
+def _parse(text: str) -> sgpo.SgPo:
+    # The setup uses the fast parser. It creates the same entries as polib, in less time.
+    return sgpo.pofile_from_text(text, sgpo.PARSER_FAST)
+
+
+def _write_text(file: str, text: str) -> str:
+    if text is None:
+        return None
+    with open(file, 'w', encoding='utf-8', newline='') as f:
+        f.write(text)
+    return file
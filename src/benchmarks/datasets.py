@@ -0,0 +1,78 @@
+"""
+Input data of the benchmarks.
+
+A dataset holds the texts of a pot file, a po file, unknown/mismatch files and v23 mapping files.
+Texts that are not available are None, and the benchmarks that need them are skipped.
+"""
+import os
+from collections import namedtuple
+
+from path_finder import PoPathFinder
+from . import synthetic
+
+REAL_DATASET_NAME = 'real'
+
+Dataset = namedtuple('Dataset', ['name', 'size', 'pot_text', 'po_text', 'unknown_text', 'mismatch_text',
+                                 'master_map_text', 'locale_map_text', 'state_map_text'])
+
+
+def parse_size(text: str) -> int:
+    """
+    '10000', '10k' or '1m'
+    """
+    text = text.strip().lower()
+    if text.endswith('k'):
+        return int(text[:-1]) * 1000
+    if text.endswith('m'):
+        return int(text[:-1]) * 1000000
+    return int(text)
+
+
+def load_dataset(name: str) -> Dataset:
+    if name == REAL_DATASET_NAME:
+        return load_real_dataset()
+    return create_synthetic_dataset(parse_size(name))
+
+
+def load_real_dataset(finder: PoPathFinder = None) -> Dataset:
+    """
+    messages.pot and the largest locale file of the repository.
+    """
+    finder = finder or PoPathFinder()
+    po_files = finder.get_po_files(translation_file_only=True)
+    po_file = max(po_files, key=os.path.getsize) if po_files else None
+    pot_text = _read_text(finder.get_pot_file())
+
+    return Dataset(name=REAL_DATASET_NAME,
+                   size=pot_text.count('\nmsgctxt ') if pot_text else 0,
+                   pot_text=pot_text,
+                   po_text=_read_text(po_file),
+                   unknown_text=_read_text(finder.get_unknown_file()),
+                   mismatch_text=_read_text(finder.get_mismatch_file()),
+                   master_map_text=None,
+                   locale_map_text=None,
+                   state_map_text=None)
+
+
+def create_synthetic_dataset(size: int, seed: int = 0) -> Dataset:
+    """
+    A catalog of size entries, created by benchmarks.synthetic with the default ratios.
+    """
+    catalog = synthetic.generate(synthetic.GeneratorOptions(size=size, seed=seed))
+
+    return Dataset(name=str(size),
+                   size=size,
+                   pot_text=catalog.pot_text,
+                   po_text=catalog.po_text,
+                   unknown_text=catalog.unknown_text,
+                   mismatch_text=catalog.mismatch_text,
+                   master_map_text=catalog.master_map_text,
+                   locale_map_text=catalog.locale_map_text,
+                   state_map_text=catalog.state_map_text)
+
+
+def _read_text(file: str) -> str:
+    if file is None or not os.path.exists(file):
+        return None
+    with open(file, 'r', encoding='utf-8', newline='') as f:
+        return f.read()
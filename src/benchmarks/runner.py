@@ -0,0 +1,151 @@
+"""
+Runs the benchmark cases and compares the results with a baseline.
+
+The time of a case is the minimum of several runs, which is the least noisy measure.
+The peak memory is measured with tracemalloc in a separate run, because tracing slows down the code.
+"""
+import gc
+import json
+import platform
+import re
+import tempfile
+import time
+import tracemalloc
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import polib
+
+from . import cases as benchmark_cases
+from .datasets import load_dataset
+
+RESULT_FORMAT_VERSION = 1
+
+BenchmarkResult = namedtuple('BenchmarkResult', ['name', 'dataset', 'size', 'seconds', 'median_seconds',
+                                                 'peak_memory_bytes'])
+Regression = namedtuple('Regression', ['name', 'metric', 'baseline', 'current', 'ratio'])
+
+# Time differences below this are noise, whatever the ratio.
+MIN_SECONDS_DIFFERENCE = 0.002
+
+
+def run_benchmarks(dataset_names: list, repeat: int = 3, name_filter: str = None,
+                   measure_memory: bool = True, log=print) -> list:
+    """
+    Returns a list of BenchmarkResult. name_filter is a regular expression matched against '<case>@<dataset>'.
+    """
+    pattern = re.compile(name_filter) if name_filter else None
+    results = []
+    for dataset_name in dataset_names:
+        dataset = load_dataset(dataset_name)
+        with tempfile.TemporaryDirectory() as work_dir:
+            context = benchmark_cases.create_context(dataset, work_dir)
+            for case in benchmark_cases.get_cases():
+                name = f'{case.name}@{dataset.name}'
+                if pattern is not None and not pattern.search(name):
+                    continue
+                if not benchmark_cases.is_available(case, dataset):
+                    log(f'skipped:\t{name}')
+                    continue
+
+                result = _run_case(case, context, name, repeat, measure_memory)
+                log(format_result(result))
+                results.append(result)
+
+    return results
+
+
+def format_result(result: BenchmarkResult) -> str:
+    memory = '-' if result.peak_memory_bytes is None else f'{result.peak_memory_bytes / 1024 / 1024:.1f} MiB'
+    return f'{result.name:<40}{result.seconds * 1000:>12.2f} ms{memory:>14}'
+
+
+def to_json(results: list) -> dict:
+    return {
+        'format_version': RESULT_FORMAT_VERSION,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'polib': polib.__version__,
+            'platform': platform.platform(),
+        },
+        'results': {result.name: result._asdict() for result in results},
+    }
+
+
+def save_results(results: list, output_file: str) -> None:
+    with open(output_file, 'w', encoding='utf-8', newline='\n') as file:
+        json.dump(to_json(results), file, indent=2, ensure_ascii=False)
+        file.write('\n')
+
+
+def load_baseline(baseline_file: str) -> dict:
+    """
+    Returns the results of a file written by save_results(), by name.
+    """
+    with open(baseline_file, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+    if data.get('format_version') != RESULT_FORMAT_VERSION:
+        raise ValueError(f'Unsupported baseline format: {data.get("format_version")} ({baseline_file})')
+    return {name: BenchmarkResult(**result) for name, result in data['results'].items()}
+
+
+def compare_with_baseline(results: list, baseline: dict, threshold: float, memory_threshold: float) -> list:
+    """
+    Returns a Regression for every result that is slower, or uses more memory, than the baseline by more
+    than the threshold (0.25 = 25%). Results that are not in the baseline are ignored.
+    """
+    regressions = []
+    for result in results:
+        base = baseline.get(result.name)
+        if base is None:
+            continue
+
+        if (result.seconds > base.seconds * (1 + threshold)
+                and result.seconds - base.seconds > MIN_SECONDS_DIFFERENCE):
+            regressions.append(Regression(name=result.name, metric='seconds', baseline=base.seconds,
+                                          current=result.seconds, ratio=_ratio(result.seconds, base.seconds)))
+
+        if (result.peak_memory_bytes is not None and base.peak_memory_bytes is not None
+                and result.peak_memory_bytes > base.peak_memory_bytes * (1 + memory_threshold)):
+            regressions.append(Regression(name=result.name, metric='peak_memory_bytes',
+                                          baseline=base.peak_memory_bytes, current=result.peak_memory_bytes,
+                                          ratio=_ratio(result.peak_memory_bytes, base.peak_memory_bytes)))
+
+    return regressions
+
+
+def _run_case(case, context, name: str, repeat: int, measure_memory: bool) -> BenchmarkResult:
+    times = []
+    for _ in range(max(1, repeat)):
+        args = case.setup(context)
+        gc.collect()
+        start = time.perf_counter()
+        case.run(*args)
+        times.append(time.perf_counter() - start)
+        del args
+
+    peak_memory = None
+    if measure_memory:
+        args = case.setup(context)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            case.run(*args)
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        del args
+
+    times.sort()
+    return BenchmarkResult(name=name,
+                           dataset=context.dataset.name,
+                           size=context.dataset.size,
+                           seconds=times[0],
+                           median_seconds=times[len(times) // 2],
+                           peak_memory_bytes=peak_memory)
+
+
+def _ratio(current: float, baseline: float) -> float:
+    return current / baseline if baseline else float('inf')
+
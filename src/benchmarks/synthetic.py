@@ -0,0 +1,245 @@
+"""
+A seeded generator of SmartGit-shaped catalogs, to test how the tools scale.
+
+The generated keys have the shapes that matter for the hot paths:
+  - wildcard contexts such as '*.btn:'
+  - alternation contexts such as '(wndLog|wndProject).lbl:', which SgPo._multi_keys_filter() rewrites
+  - msgctxt+msgid keys (msgctxt ending with ':') and msgctxt-only keys
+The texts contain plain sentences, placeholders, escaped backslashes and quotes, and HTML fragments.
+
+generate() returns a matched set of files, which all describe the same history of the catalog:
+  - pot: the keys of the previous version
+  - po: the translation of the pot, plus the keys removed from the pot (which import_pot makes obsolete),
+    fuzzy entries with a previous msgid, untranslated entries and obsolete entries
+  - unknown: the keys added in the current version
+  - mismatch: the keys whose msgid has changed in the current version, with the previous msgid
+  - master/locale/state mapping: the same catalog in the v23 mapping format (mapping, mapping.dev, mapping.state)
+
+The same options and seed always generate the same files.
+"""
+import os
+import random
+from collections import namedtuple
+
+import polib
+
+import sgpo
+from phase_profiler import timed
+from sgpo.sgpo import Key_tuple
+from sgpo_common import META_DATA_BASE_DICT
+
+GeneratorOptions = namedtuple('GeneratorOptions',
+                              ['size', 'seed', 'locale_code',
+                               'changed_ratio', 'new_ratio', 'removed_ratio', 'untranslated_ratio',
+                               'fuzzy_ratio', 'obsolete_ratio',
+                               'wildcard_ratio', 'alternation_ratio', 'msgctxt_only_ratio',
+                               'escape_ratio', 'html_ratio'],
+                              defaults=[0, 'xx_XX',
+                                        0.01, 0.01, 0.01, 0.05,
+                                        0.02, 0.01,
+                                        0.05, 0.05, 0.10,
+                                        0.02, 0.05])
+GeneratorOptions.__doc__ = """
+size: Number of entries in the pot.
+seed: Seed of the random generator.
+locale_code: Locale of the po file and of the locale mapping files.
+changed_ratio, new_ratio, removed_ratio: Ratio of the pot entries whose msgid has changed (mismatch), of new entries
+    (unknown) and of removed entries (in the po, but no longer in the pot).
+    Changed entries are taken from the msgctxt-only keys, so there are at most as many as msgctxt-only keys.
+untranslated_ratio, fuzzy_ratio, obsolete_ratio: Ratio of untranslated, fuzzy and obsolete entries in the po.
+wildcard_ratio, alternation_ratio, msgctxt_only_ratio: Ratio of each key shape. The other keys are msgctxt+msgid keys.
+escape_ratio, html_ratio: Ratio of texts with backslashes/quotes and of HTML texts.
+"""
+
+SyntheticCatalog = namedtuple('SyntheticCatalog',
+                              ['options', 'pot_text', 'po_text', 'unknown_text', 'mismatch_text',
+                               'master_map_text', 'locale_map_text', 'state_map_text',
+                               'new_keys', 'changed_keys', 'removed_keys'])
+
+_WINDOWS = ['dlgSgPreferences', 'dlgSgRepositorySettings', 'wndLog', 'wndProject', 'dlgCommit', 'dlgPush',
+            'dlgPull', 'dlgMerge', 'dlgRebase', 'dlgStash', 'dlgTag', 'dlgBranch', 'wndFileCompare',
+            'wndConflictSolver', 'dlgQFrameManagerExit', 'ntmRepository', 'dlgHostingProvider']
+_SUFFIXES = ['lbl', 'btn', 'chk', 'hnt', 'mni', 'ttp', 'hdl', 'rbt', 'tab', 'col']
+_WORDS = ['repository', 'commit', 'branch', 'remote', 'file', 'change', 'merge', 'rebase', 'tag', 'stash',
+          'working', 'tree', 'index', 'history', 'selected', 'all', 'new', 'open', 'show', 'hide', 'refresh',
+          'settings', 'author', 'message', 'conflict', 'resolve', 'push', 'pull', 'fetch', 'log', 'submodule']
+
+_LOCALE_DIR_SEPARATOR = '-'
+
+
+@timed('synthetic.generate', count=lambda result, options: options.size)
+def generate(options: GeneratorOptions) -> SyntheticCatalog:
+    rng = random.Random(options.seed)
+
+    keys = [_create_key(rng, options, index) for index in range(options.size)]
+    removed_count = int(options.size * options.removed_ratio)
+    new_count = int(options.size * options.new_ratio)
+    removed_keys = [_create_key(rng, options, options.size + index) for index in range(removed_count)]
+    new_keys = [_create_key(rng, options, options.size + removed_count + index) for index in range(new_count)]
+    # The msgid is a part of msgctxt+msgid keys. Only msgctxt-only keys can have a changed msgid.
+    msgctxt_only_keys = [key for key in keys if not key[0].endswith(':')]
+    changed_count = min(len(msgctxt_only_keys), int(options.size * options.changed_ratio))
+    changed_keys = rng.sample(msgctxt_only_keys, changed_count)
+
+    # The current msgid of each key
+    current_msgids = {key: _change_text(rng, key[1]) for key in changed_keys}
+    translations = {key: _translate(key[1]) for key in keys + removed_keys}
+
+    pot = _new_po(options.locale_code)
+    for msgctxt, msgid in keys:
+        list.append(pot, polib.POEntry(msgctxt=msgctxt, msgid=msgid, msgstr=''))
+
+    po = _new_po(options.locale_code)
+    for msgctxt, msgid in keys + removed_keys:
+        entry = polib.POEntry(msgctxt=msgctxt, msgid=msgid, msgstr=translations[(msgctxt, msgid)])
+        chance = rng.random()
+        if chance < options.untranslated_ratio:
+            entry.msgstr = ''
+        elif chance < options.untranslated_ratio + options.fuzzy_ratio:
+            entry.previous_msgid = _change_text(rng, msgid)
+            entry.flags = ['fuzzy']
+        list.append(po, entry)
+    for index in range(int(options.size * options.obsolete_ratio)):
+        msgctxt, msgid = _create_key(rng, options, options.size + removed_count + new_count + index)
+        list.append(po, polib.POEntry(msgctxt=msgctxt, msgid=msgid, msgstr=_translate(msgid), obsolete=True))
+
+    unknown = sgpo.SgPo()
+    for msgctxt, msgid in new_keys:
+        list.append(unknown, polib.POEntry(msgctxt=msgctxt, msgid=msgid, msgstr=''))
+
+    mismatch = sgpo.SgPo()
+    for key in changed_keys:
+        list.append(mismatch, polib.POEntry(msgctxt=key[0], msgid=current_msgids[key], msgstr='',
+                                            previous_msgid=key[1]))
+
+    # v23 mapping files of the current version
+    master_map = []
+    locale_map = []
+    state_map = []
+    for key in keys + new_keys:
+        master_map.append(_to_mapping_line(key[0], current_msgids.get(key, key[1]), key[1]))
+    for key in keys + removed_keys:
+        translation = translations[key]
+        if rng.random() < options.untranslated_ratio:
+            locale_map.append(_to_mapping_line(key[0], '', key[1]))
+            locale_map.append(f'#{" " * (len(key[0]) - 1)}!={key[1]}\n')
+        else:
+            locale_map.append(_to_mapping_line(key[0], translation, key[1]))
+        # The master text at the time of the translation
+        state_map.append(_to_mapping_line(key[0], key[1], key[1]))
+
+    return SyntheticCatalog(options=options,
+                            pot_text=_to_text(pot),
+                            po_text=_to_text(po),
+                            unknown_text=_to_text(unknown),
+                            mismatch_text=_to_text(mismatch),
+                            master_map_text=''.join(master_map),
+                            locale_map_text=''.join(locale_map),
+                            state_map_text=''.join(state_map),
+                            new_keys=[_to_key_tuple(key) for key in new_keys],
+                            changed_keys=[_to_key_tuple(key) for key in changed_keys],
+                            removed_keys=[_to_key_tuple(key) for key in removed_keys])
+
+
+@timed('synthetic.write', count=lambda result, catalog, *args, **kwargs: catalog.options.size)
+def write_file_set(catalog: SyntheticCatalog, root_dir: str, version: str = '24_1') -> list:
+    """
+    Writes the files with the layout of the repository, so that PoPathFinder(root_dir) finds them:
+    po/messages.pot, po/<locale>.po, po/unknown.<version>, po/mismatch.<version>,
+    mapping, <locale-dir>/mapping.dev and <locale-dir>/mapping.state
+    Returns the written files.
+    """
+    locale_code = catalog.options.locale_code
+    locale_dir = locale_code.replace('_', _LOCALE_DIR_SEPARATOR)
+    files = [
+        (os.path.join('po', 'messages.pot'), catalog.pot_text),
+        (os.path.join('po', f'{locale_code}.po'), catalog.po_text),
+        (os.path.join('po', f'unknown.{version}'), catalog.unknown_text),
+        (os.path.join('po', f'mismatch.{version}'), catalog.mismatch_text),
+        ('mapping', catalog.master_map_text),
+        (os.path.join(locale_dir, 'mapping.dev'), catalog.locale_map_text),
+        (os.path.join(locale_dir, 'mapping.state'), catalog.state_map_text),
+    ]
+
+    written_files = []
+    for relative_path, text in files:
+        path = os.path.join(root_dir, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8', newline='') as file:
+            file.write(text)
+        written_files.append(path)
+
+    return written_files
+
+
+def _create_key(rng: random.Random, options: GeneratorOptions, index: int) -> tuple:
+    """
+    Returns (msgctxt, msgid). The index makes every key unique.
+    """
+    msgid = _create_text(rng, options, index)
+    suffix = rng.choice(_SUFFIXES)
+
+    chance = rng.random()
+    if chance < options.wildcard_ratio:
+        return f'*.{suffix}:', msgid
+    chance -= options.wildcard_ratio
+    if chance < options.alternation_ratio:
+        first, second = rng.sample(_WINDOWS, 2)
+        return f'({first}|{second}).{suffix}:', msgid
+    chance -= options.alternation_ratio
+    if chance < options.msgctxt_only_ratio:
+        return f'{rng.choice(_WINDOWS)}{index}.{suffix}', msgid
+    return f'{rng.choice(_WINDOWS)}.{suffix}{index % 97}:', msgid
+
+
+def _create_text(rng: random.Random, options: GeneratorOptions, index: int) -> str:
+    words = ' '.join(rng.choice(_WORDS) for _ in range(rng.randint(1, 8)))
+    text = f'{words[:1].upper()}{words[1:]} #{index}'
+    if rng.random() < 0.2:
+        text += ' ($1)'
+
+    chance = rng.random()
+    if chance < options.escape_ratio:
+        return rng.choice([f'{text}: C:\\Program Files\\SmartGit',
+                           f'{text}: refs\\/tags\\/build\\(?<name>.\\*\\)',
+                           f'{text} "{rng.choice(_WORDS)}"'])
+    if chance < options.escape_ratio + options.html_ratio:
+        return f'<html>{text}<br><b>{rng.choice(_WORDS)}</b> &lt;{rng.choice(_WORDS)}&gt;</html>'
+    return text
+
+
+def _change_text(rng: random.Random, text: str) -> str:
+    return f'{text} {rng.choice(_WORDS)}'
+
+
+def _translate(text: str) -> str:
+    # Keeps the HTML tags and placeholders, like a real translation.
+    return f'[{text}]'
+
+
+def _to_mapping_line(msgctxt: str, value: str, msgid: str) -> str:
+    return f'{_to_mapping_key(msgctxt, msgid)}={value}\n'
+
+
+def _to_mapping_key(msgctxt: str, msgid: str) -> str:
+    """
+    The reverse of sgpo_common.optimize_po_entry()
+    """
+    if msgctxt.endswith(':'):
+        return f'{msgctxt[:-1]}"{msgid}"'
+    return msgctxt
+
+
+def _to_key_tuple(key: tuple) -> Key_tuple:
+    return sgpo.SgPo._to_key_tuple(*key)
+
+
+def _new_po(locale_code: str) -> sgpo.SgPo:
+    po = sgpo.SgPo()
+    po.metadata = dict(META_DATA_BASE_DICT, Language=locale_code)
+    return po
+
+
+def _to_text(po: sgpo.SgPo) -> str:
+    po.sort()
+    return po.__unicode__()
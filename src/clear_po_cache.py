@@ -0,0 +1,24 @@
+import argparse
+
+import phase_profiler
+from sgpo import po_cache
+
+
+def main():
+    args = parse_args()
+
+    with phase_profiler.profiling(args):
+        count = po_cache.clear(args.cache_dir)
+        print(f'{count} cache file(s) removed.')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Removes the parsed-catalog cache files of sgpo.pofile().')
+    parser.add_argument('--cache-dir',
+                        help=f'cache directory (default: the {po_cache.CACHE_DIR_ENV} environment variable)')
+    phase_profiler.add_arguments(parser)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import argparse
+import os
+
+import phase_profiler
+import sgpo
+from path_finder import PoPathFinder
+from sgpo import compiled_catalog
+
+
+def main():
+    args = parse_args()
+    with phase_profiler.profiling(args):
+        compile_po_files(args.output_dir)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compiles 'messages.pot' and all '<locale_code>.po' "
+                                                 "into binary catalogs for fast lookups.")
+    parser.add_argument('-o', '--output-dir', metavar='DIR',
+                        help="directory of the compiled catalogs (default: '<repository root>/build/catalogs')")
+    phase_profiler.add_arguments(parser)
+    return parser.parse_args()
+
+
+def compile_po_files(output_dir: str = None, finder: PoPathFinder = None) -> list:
+    """
+    Writes '<output_dir>/<name>.sgcat' for the pot file and each po file. Catalogs that are up to date are not written.
+    Returns the catalog files that have been written.
+    """
+    finder = finder or PoPathFinder()
+    output_dir = output_dir or os.path.join(finder.root_dir, 'build', 'catalogs')
+    os.makedirs(output_dir, exist_ok=True)
+
+    written_files = []
+    for po_file in [finder.get_pot_file(), *sorted(finder.get_po_files(translation_file_only=True))]:
+        try:
+            po = sgpo.pofile(po_file, sgpo.PARSER_FAST)
+            print(f' po file:\t{po_file}')
+        except FileNotFoundError as e:
+            print(e)
+            exit(-1)
+
+        name = os.path.splitext(os.path.basename(po_file))[0]
+        catalog_file = os.path.join(output_dir, name + compiled_catalog.CATALOG_FILE_EXTENSION)
+        if compiled_catalog.write_catalog(po, catalog_file, only_if_changed=True):
+            print(f'saved:\t{catalog_file}')
+            written_files.append(catalog_file)
+        else:
+            print(f'unchanged:\t{catalog_file}')
+
+    return written_files
+
+
+if __name__ == "__main__":
+    main()
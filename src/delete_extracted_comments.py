@@ -1,9 +1,24 @@
+import argparse
+
+import phase_profiler
 import sgpo
 from path_finder import PoPathFinder
 
 
 def main():
-    finder = PoPathFinder()
+    args = parse_args()
+    with phase_profiler.profiling(args):
+        delete_extracted_comments()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Deletes the extracted comments of 'messages.pot'.")
+    phase_profiler.add_arguments(parser)
+    return parser.parse_args()
+
+
+def delete_extracted_comments(finder: PoPathFinder = None):
+    finder = finder or PoPathFinder()
     pot_file = finder.get_pot_file()
     print(f'    pot file:\t{pot_file}')
 
@@ -13,8 +28,19 @@ def main():
         print(e)
         exit(-1)
 
+    delete_extracted_comments_from_pot(pot)
+    if pot.save(pot_file, only_if_changed=True):
+        print(f'saved:\t{pot_file}')
+    else:
+        print(f'unchanged:\t{pot_file}')
+
+
+def delete_extracted_comments_from_pot(pot: sgpo.SgPo) -> None:
+    """
+    Deletes the extracted comments of the loaded pot. The pot is not saved. Also used by sync_all.py.
+    """
     pot.delete_extracted_comments()
-    pot.save(pot_file)
+
 
 if __name__ == "__main__":
     main()
@@ -1,9 +1,24 @@
+import argparse
+
+import phase_profiler
 import sgpo
 from path_finder import PoPathFinder
 
 
 def main():
-    finder = PoPathFinder()
+    args = parse_args()
+    with phase_profiler.profiling(args):
+        format_po_files()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Formats all '<locale_code>.po'.")
+    phase_profiler.add_arguments(parser)
+    return parser.parse_args()
+
+
+def format_po_files(finder: PoPathFinder = None):
+    finder = finder or PoPathFinder()
     po_files = finder.get_po_files(translation_file_only=True)
 
     for po_file in po_files:
@@ -14,8 +29,19 @@ def main():
             print(e)
             exit(-1)
 
-        po.format()
-        po.save(po_file)
+        format_po(po)
+        if po.save(po_file, only_if_changed=True):
+            print(f'saved:\t{po_file}')
+        else:
+            print(f'unchanged:\t{po_file}')
+
+
+def format_po(po: sgpo.SgPo) -> None:
+    """
+    Formats the loaded po file. It is not saved. Also used by sync_all.py.
+    """
+    po.format()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,48 @@
+import argparse
+
+import phase_profiler
+from benchmarks import synthetic
+from benchmarks.datasets import parse_size
+
+_DEFAULTS = synthetic.GeneratorOptions(size=0)
+_RATIO_FIELDS = [field for field in synthetic.GeneratorOptions._fields if field.endswith('_ratio')]
+
+
+def main():
+    args = parse_args()
+
+    options = synthetic.GeneratorOptions(
+        size=parse_size(args.size),
+        seed=args.seed,
+        locale_code=args.locale,
+        **{field: getattr(args, field) for field in _RATIO_FIELDS})
+    with phase_profiler.profiling(args):
+        catalog = synthetic.generate(options)
+
+        for file in synthetic.write_file_set(catalog, args.output_dir, version=args.version):
+            print(f'output:\t{file}')
+        print(f'new keys:\t{len(catalog.new_keys)}')
+        print(f'changed keys:\t{len(catalog.changed_keys)}')
+        print(f'removed keys:\t{len(catalog.removed_keys)}')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Generates a synthetic SmartGit catalog: messages.pot, a locale po file, unknown and mismatch '
+                    'files, and the v23 mapping, mapping.dev and mapping.state files, '
+                    'with the layout of the repository.')
+    parser.add_argument('output_dir', help='root directory of the generated files')
+    parser.add_argument('-s', '--size', default='10k', help='number of entries of the pot (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=_DEFAULTS.seed, help='random seed (default: %(default)s)')
+    parser.add_argument('--locale', default=_DEFAULTS.locale_code, help='locale code (default: %(default)s)')
+    parser.add_argument('--version', default='24_1',
+                        help='version suffix of the unknown and mismatch files (default: %(default)s)')
+    for field in _RATIO_FIELDS:
+        parser.add_argument(f'--{field.replace("_", "-")}', type=float, default=getattr(_DEFAULTS, field),
+                            help='(default: %(default)s)')
+    phase_profiler.add_arguments(parser)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main()
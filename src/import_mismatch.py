@@ -1,10 +1,34 @@
+import argparse
+
+import phase_profiler
 from path_finder import PoPathFinder
 import sgpo
+from sgpo import import_report, tail_import
 
 
 def main():
+    args = parse_args()
+    with phase_profiler.profiling(args):
+        import_mismatch(PoPathFinder(), args.verbosity, args.report_json, args.full)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Imports the mismatch file into 'messages.pot'.")
+    parser.add_argument('--full', action='store_true',
+                        help='import the whole mismatch file, not only the entries appended since the previous import')
+    import_report.add_arguments(parser)
+    phase_profiler.add_arguments(parser)
+    return parser.parse_args()
+
+
+def import_mismatch(finder: PoPathFinder, verbosity: int = import_report.VERBOSITY_SUMMARY, report_json: str = None,
+                   full: bool = False):
+    """
+    Imports the entries appended to the mismatch file since the previous import, or the whole file if full is True
+    or if the file has changed otherwise (see sgpo.tail_import).
+    Returns the ImportReport, or None if there are no new entries.
+    """
     # Get file path
-    finder = PoPathFinder()
     pot_file = finder.get_pot_file()
     mismatch_file = finder.get_mismatch_file()
 
@@ -13,18 +37,49 @@ def main():
 
     # Open pot/po files
     try:
+        new_entries = tail_import.read_new_entries(mismatch_file, pot_file, full=full)
+        if new_entries.entries is None:
+            print(f'\nno new entries since byte {new_entries.start_offset}.')
+            if report_json:
+                import_report.write_json_report([], report_json)
+            return None
         pot = sgpo.pofile(pot_file)
-        mismatch = sgpo.pofile(mismatch_file)
     except FileNotFoundError as e:
         print(e)
         exit(-1)
 
-    # Import and specific format
-    pot.import_mismatch(mismatch)
-    pot.sort()
+    report = import_mismatch_into_pot(pot, new_entries, verbosity)
+    if report_json:
+        import_report.write_json_report([report], report_json)
 
     # Save pot file
-    pot.save(pot_file)
+    if pot.save(pot_file, only_if_changed=True):
+        print(f'\nsaved:\t{pot_file}')
+    else:
+        print(f'\nunchanged:\t{pot_file}')
+
+    # The imported entries are skipped next time.
+    tail_import.commit(new_entries, pot_file)
+    return report
+
+
+def import_mismatch_into_pot(pot: sgpo.SgPo, new_entries: tail_import.NewEntries,
+                             verbosity: int = import_report.VERBOSITY_SUMMARY) -> import_report.ImportReport:
+    """
+    Imports the entries read by tail_import.read_new_entries() into the loaded pot, and sorts it.
+    The pot is not saved. Also used by sync_all.py.
+    """
+    if not new_entries.full:
+        print(f'\nimporting the entries appended after byte {new_entries.start_offset}.')
+
+    # Keep the pot file sorted while importing, so that sorting afterwards costs almost nothing.
+    pot.keep_sorted = True
+
+    # Import and specific format
+    report = pot.import_mismatch(new_entries.entries)
+    import_report.print_report(report, verbosity)
+    pot.sort()
+    return report
 
 
 if __name__ == "__main__":
@@ -1,12 +1,46 @@
+import argparse
+import contextlib
+import io
+import traceback
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import phase_profiler
 import sgpo
 from path_finder import PoPathFinder
+from sgpo import import_report, pot_delta
+
+ImportResult = namedtuple('ImportResult', ['po_file', 'log', 'error', 'report', 'profile'], defaults=[None, None])
+
+# The pot file shared by all locales. It is only read while importing.
+_pot = None
+# PotDelta from the previous pot, or None to import the whole pot
+_delta = None
+# Snapshot whose po file hashes tell which po files the delta applies to, or None if it applies to all of them
+_snapshot = None
+# Verbosity of the import report printed to ImportResult.log
+_verbosity = import_report.VERBOSITY_SUMMARY
+# True in a worker process whose phases are returned to the main process in ImportResult.profile
+_return_profile = False
 
 
 def main():
+    args = parse_args()
+    with phase_profiler.profiling(args):
+        import_pot(args.jobs, args.verbosity, args.report_json, args.delta, args.since)
+
+
+def import_pot(jobs: int, verbosity: int = import_report.VERBOSITY_SUMMARY, report_json: str = None,
+               delta: bool = False, since: str = None, finder: PoPathFinder = None):
+    """
+    delta: Apply only the changes since the snapshot of the previous run to the po files that have not changed since.
+    since: Apply only the changes since this git revision of the pot to all po files.
+    With delta or since, a snapshot of the pot and the po files is written for the next run with delta.
+    """
     # Get file path
-    finder = PoPathFinder()
+    finder = finder or PoPathFinder()
     pot_file = finder.get_pot_file()
-    po_files = finder.get_po_files(translation_file_only=True)
+    po_files = sorted(finder.get_po_files(translation_file_only=True))
 
     try:
         pot = sgpo.pofile(pot_file)
@@ -16,21 +50,150 @@ def main():
 
     print(f'pot file:\t{pot_file}')
 
-    for po_file in po_files:
+    changes = None
+    snapshot = None
+    if since:
         try:
-            po = sgpo.pofile(po_file)
-            print(f' po file:\t{po_file}')
-        except FileNotFoundError as e:
+            changes = pot_delta.diff_pots(pot_delta.read_pot_at_revision(pot_file, since), pot)
+        except ValueError as e:
             print(e)
             exit(-1)
+        print(f'changes since {since}:\t{changes.key_count} keys')
+    elif delta:
+        snapshot = pot_delta.read_snapshot(pot_file)
+        if snapshot is None:
+            print('no snapshot of the previous run. The whole pot is imported.')
+        else:
+            changes = pot_delta.diff_pots(snapshot.pot, pot)
+            print(f'changes since the previous run:\t{changes.key_count} keys')
+
+    results = import_pot_to_po_files(pot, po_files, jobs, verbosity, changes, snapshot)
+
+    # The logs are printed in the order of the po files, regardless of the order in which they were processed.
+    failed_count = 0
+    for result in results:
+        print(f' po file:\t{result.po_file}')
+        print(result.log, end='')
+        if result.error:
+            print(result.error)
+            failed_count += 1
+
+    if report_json:
+        import_report.write_json_report([result.report for result in results if result.report is not None],
+                                        report_json)
+        print(f'report:\t{report_json}')
+
+    if failed_count:
+        print(f'\n{failed_count} of {len(results)} po files failed.')
+        exit(-1)
+
+    if delta or since:
+        # The next run with --delta starts from here.
+        pot_delta.write_snapshot(pot_file, po_files)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Imports the content of 'messages.pot' into all '<locale_code>.po'.")
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='number of po files processed in parallel (default: 1)')
+    parser.add_argument('--delta', action='store_true',
+                        help='apply only the keys changed since the previous run with --delta or --since '
+                             'to the po files that have not changed since then')
+    parser.add_argument('--since', metavar='REVISION',
+                        help='apply only the keys changed since this git revision of the pot, '
+                             'assuming that the po files were in sync with it')
+    import_report.add_arguments(parser)
+    phase_profiler.add_arguments(parser)
+    return parser.parse_args()
+
+
+def import_pot_to_po_files(pot: sgpo.SgPo, po_files: list, jobs: int = 1,
+                           verbosity: int = import_report.VERBOSITY_SUMMARY,
+                           delta: pot_delta.PotDelta = None, snapshot: pot_delta.Snapshot = None) -> list:
+    """
+    Imports the pot into each po file and saves it.
+    If delta is given, only its keys are imported (see SgPo.import_pot_delta()). If snapshot is given too,
+    the delta is only applied to the po files that have not changed since the snapshot, and the others
+    get the whole pot.
+    A po file that fails does not stop the others. Its error is returned in the ImportResult instead.
+    The results are in the order of po_files. The import report of each po file is printed to its log,
+    with the given verbosity.
+    While profiling, the phases measured in the worker processes are added to the report of this process.
+    """
+    if snapshot is not None:
+        # The workers only need the hashes of the po files.
+        snapshot = snapshot._replace(pot=None)
+
+    if jobs <= 1 or len(po_files) <= 1:
+        _init_worker(pot, verbosity=verbosity, delta=delta, snapshot=snapshot)
+        return [_import_pot_to_po_file(po_file) for po_file in po_files]
+
+    # The pot is parsed only once, and passed to each worker process when it starts.
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(pot, phase_profiler.is_enabled(), verbosity, delta, snapshot)) as executor:
+        results = list(executor.map(_import_pot_to_po_file, po_files))
+
+    for result in results:
+        if result.profile is not None:
+            phase_profiler.merge_report(result.profile)
+    return results
+
+
+def _init_worker(pot: sgpo.SgPo, return_profile: bool = False, verbosity: int = import_report.VERBOSITY_SUMMARY,
+                 delta: pot_delta.PotDelta = None, snapshot: pot_delta.Snapshot = None) -> None:
+    global _pot, _delta, _snapshot, _return_profile, _verbosity
+    _pot = pot
+    _delta = delta
+    _snapshot = snapshot
+    _verbosity = verbosity
+    _return_profile = return_profile
+    if return_profile:
+        phase_profiler.enable()
+
+
+def _import_pot_to_po_file(po_file: str) -> ImportResult:
+    log = io.StringIO()
+    report = None
+    try:
+        with contextlib.redirect_stdout(log):
+            po = sgpo.pofile(po_file)
+            delta = _delta
+            if delta is not None and _snapshot is not None and not pot_delta.is_in_snapshot(_snapshot, po_file):
+                print('changed since the previous run. The whole pot is imported.')
+                delta = None
+            report = import_pot_into_po(po, _pot, _verbosity, delta)
+
+            # Save po file
+            if po.save(po_file, only_if_changed=True):
+                print(f'\nsaved:\t{po_file}')
+            else:
+                print(f'\nunchanged:\t{po_file}')
+    except Exception:
+        return ImportResult(po_file=po_file, log=log.getvalue(), error=traceback.format_exc(),
+                            report=report, profile=phase_profiler.take_report() if _return_profile else None)
+
+    return ImportResult(po_file=po_file, log=log.getvalue(), error=None, report=report,
+                        profile=phase_profiler.take_report() if _return_profile else None)
+
 
-        # Import and specific format
-        po.import_pot(pot)
-        po.sort()
-        po.format()
+def import_pot_into_po(po: sgpo.SgPo, pot: sgpo.SgPo, verbosity: int = import_report.VERBOSITY_SUMMARY,
+                       delta: pot_delta.PotDelta = None) -> import_report.ImportReport:
+    """
+    Imports the pot, or only the keys of delta if it is given, into the loaded po file, and sorts and formats it.
+    The po file is not saved. Also used by sync_all.py.
+    """
+    # Keep the po file sorted while importing, so that sorting afterwards costs almost nothing.
+    po.keep_sorted = True
 
-        # Save pot file
-        po.save(po_file)
+    # Import and specific format
+    if delta is not None:
+        report = po.import_pot_delta(delta)
+    else:
+        report = po.import_pot(pot)
+    import_report.print_report(report, verbosity)
+    po.sort()
+    po.format()
+    return report
 
 
 if __name__ == "__main__":
@@ -1,41 +1,162 @@
+import argparse
+import contextlib
+import io
+import traceback
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable
+
+import phase_profiler
 from sgpo_common import *
-from sgv23_mapping import SgMap, CombinedSgMap
+from sgv23_mapping import SgMap, CombinedSgMap, CombinedEntry, ParsedEntry, PackedEntries
 
+LocaleJob = namedtuple('LocaleJob', ['locale_code', 'locale_map_file', 'state_map_file', 'output_file'])
 
+ConversionResult = namedtuple('ConversionResult', ['locale_code', 'output_file', 'log', 'error', 'profile'],
+                              defaults=[None])
+
+# The entries of the master mapping file shared by all locales. They are only read while converting.
+_master_entries = None
+# True in a worker process whose phases are returned to the main process in ConversionResult.profile
+_return_profile = False
 
-def main():
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-    master_map_file = os.path.normpath(os.path.join(base_dir, "mapping"))
-    po_dir = get_po_dir(base_dir)
+def main():
+    args = parse_args()
+    with phase_profiler.profiling(args):
+        locale2po(args.root, args.master, args.output_dir, parse_locales(args.locales), args.jobs)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Converts the mapping files of each locale to '<locale_code>.po'.")
+    parser.add_argument('--root', default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        help='directory of the master mapping file and of the locale directories '
+                             '(default: the root of this repository)')
+    parser.add_argument('--master', metavar='FILE', help="master mapping file (default: '<root>/mapping')")
+    parser.add_argument('-o', '--output-dir', metavar='DIR', help="directory of the po files (default: '<root>/po')")
+    parser.add_argument('-l', '--locale', dest='locales', metavar='CODE[=DIR]', action='append',
+                        help="locale to convert, with its directory relative to the root, such as 'ja_JP=ja-JP'. "
+                             "The directory defaults to the code with '-' instead of '_'. "
+                             f"Can be repeated (default: {', '.join(LOCALE_NAME_DIR_DICT)})")
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='number of locales converted in parallel (default: 1)')
+    phase_profiler.add_arguments(parser)
+    return parser.parse_args()
+
+
+def parse_locales(locales: list) -> dict:
+    """
+    ['ja_JP=ja-JP', 'zh_CN'] -> {'ja_JP': 'ja-JP', 'zh_CN': 'zh-CN'}
+    Returns LOCALE_NAME_DIR_DICT if locales is empty.
+    """
+    if not locales:
+        return dict(LOCALE_NAME_DIR_DICT)
+
+    locale_dirs = {}
+    for locale in locales:
+        locale_code, _, locale_dir = locale.partition('=')
+        locale_dirs[locale_code] = locale_dir or locale_code.replace('_', '-')
+    return locale_dirs
+
+
+def locale2po(base_dir: str = None, master_map_file: str = None, po_dir: str = None, locale_dirs: dict = None,
+              jobs: int = 1) -> list:
+    """
+    locale_dirs: Locale code -> directory of mapping.dev and mapping.state, relative to base_dir.
+    Returns the ConversionResult of each locale. Exits with -1 if any of them failed.
+    """
+    base_dir = base_dir or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    master_map_file = master_map_file or get_master_mapping_file(base_dir)
+    po_dir = po_dir or get_po_dir(base_dir)
+    locale_dirs = locale_dirs if locale_dirs is not None else LOCALE_NAME_DIR_DICT
 
     if not os.path.exists(po_dir):
         os.makedirs(po_dir)
 
-    for locale_code, locale_dir in LOCALE_NAME_DIR_DICT.items():
-        locale_map_file = os.path.normpath(os.path.join(base_dir, f".\\{locale_dir}\\mapping.dev"))
-        state_map_file = os.path.normpath(os.path.join(base_dir, f".\\{locale_dir}\\mapping.state"))
-        output_file = os.path.normpath(os.path.join(po_dir, f"{locale_code}.po"))
-
-        print('Loading mapping files...')
-        # Load mapping files
-        master_map = SgMap(master_map_file, 'en_US')
-        locale_map = SgMap(locale_map_file, locale_code)
-        state_map = SgMap(state_map_file, locale_code)
-
-        print(f'{locale_code} loaded.')
-        print("# of items:")
-        print(f"\tmaster: {str(master_map.number_of_entries)}")
-        print(f"\tlocale: {str(locale_map.number_of_entries)}")
-        print(f"\tstate: {str(state_map.number_of_entries)}")
-
-        # Combine mapping files
-        combined_map = CombinedSgMap(master_map, locale_map, state_map)
-
-        # Convert and save to po file.
-        po = CombinedSgMap_to_po(combined_map)
-        po.save(output_file)
-        print('output:' + output_file)
+    print('Loading mapping files...')
+    # The master mapping file is parsed once for all locales. As for SgMap, the last entry of a duplicate key wins.
+    # The entries are kept packed, which takes about the size of the file in this process and in each worker.
+    parse_errors = []
+    master_entries = PackedEntries(SgMap.iter_file(master_map_file, parse_errors))
+    print_parse_errors(parse_errors, master_map_file)
+    print("# of items:")
+    print(f"\tmaster: {str(len(master_entries))}")
+
+    locale_jobs = [LocaleJob(locale_code=locale_code,
+                             locale_map_file=os.path.normpath(os.path.join(base_dir, locale_dir, 'mapping.dev')),
+                             state_map_file=os.path.normpath(os.path.join(base_dir, locale_dir, 'mapping.state')),
+                             output_file=os.path.normpath(os.path.join(po_dir, f"{locale_code}.po")))
+                   for locale_code, locale_dir in locale_dirs.items()]
+    results = convert_locales(master_entries, locale_jobs, jobs)
+
+    # The logs are printed in the order of the locales, regardless of the order in which they were processed.
+    failed_count = 0
+    for result in results:
+        print(result.log, end='')
+        if result.error:
+            print(result.error)
+            failed_count += 1
+
+    if failed_count:
+        print(f'\n{failed_count} of {len(results)} locales failed.')
+        exit(-1)
+    return results
+
+
+def convert_locales(master_entries: Iterable[ParsedEntry], locale_jobs: list, jobs: int = 1) -> list:
+    """
+    Converts each locale to its po file. A locale that fails does not stop the others.
+    The results are in the order of locale_jobs.
+    """
+    if jobs <= 1 or len(locale_jobs) <= 1:
+        _init_worker(master_entries)
+        return [_convert_locale(locale_job) for locale_job in locale_jobs]
+
+    # The master entries are passed to each worker process once, when it starts.
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(master_entries, phase_profiler.is_enabled())) as executor:
+        results = list(executor.map(_convert_locale, locale_jobs))
+
+    for result in results:
+        if result.profile is not None:
+            phase_profiler.merge_report(result.profile)
+    return results
+
+
+def _init_worker(master_entries: Iterable[ParsedEntry], return_profile: bool = False) -> None:
+    global _master_entries, _return_profile
+    _master_entries = master_entries
+    _return_profile = return_profile
+    if return_profile:
+        phase_profiler.enable()
+
+
+def _convert_locale(locale_job: LocaleJob) -> ConversionResult:
+    log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(log):
+            # Load the locale and state mapping files.
+            locale_map = SgMap(locale_job.locale_map_file, locale_job.locale_code)
+            state_map = SgMap(locale_job.state_map_file, locale_job.locale_code)
+            print_parse_errors(locale_map.parse_errors, locale_job.locale_map_file)
+            print_parse_errors(state_map.parse_errors, locale_job.state_map_file)
+
+            print(f'{locale_job.locale_code} loaded.')
+            print("# of items:")
+            print(f"\tlocale: {str(locale_map.number_of_entries)}")
+            print(f"\tstate: {str(state_map.number_of_entries)}")
+
+            # Combine mapping files, convert and save to po file.
+            convert_to_po_file(_master_entries, locale_map, state_map, locale_job.output_file)
+            print('output:' + locale_job.output_file)
+    except Exception:
+        return ConversionResult(locale_code=locale_job.locale_code, output_file=locale_job.output_file,
+                                log=log.getvalue(), error=traceback.format_exc(),
+                                profile=phase_profiler.take_report() if _return_profile else None)
+
+    return ConversionResult(locale_code=locale_job.locale_code, output_file=locale_job.output_file,
+                            log=log.getvalue(), error=None,
+                            profile=phase_profiler.take_report() if _return_profile else None)
 
 
 def create_meda_dict(locale_code: str) -> dict:
@@ -55,24 +176,44 @@ def CombinedSgMap_to_po(combined_map: CombinedSgMap) -> polib.POFile:
     for key, value in meta_dict.items():
         po.metadata[key] = value
 
-    for map_entry in combined_map.get_values():
-        flags = []
-        if map_entry.fuzzy:
-            flags.append('fuzzy')
-
-        entry = polib.POEntry(
-            msgctxt=map_entry.key,
-            msgid=map_entry.original_msg,
-            msgstr=map_entry.translated_msg,
-            previous_msgid=map_entry.previous_original_msg,
-            comment=map_entry.comment,
-            flags=flags
-        )
-        entry = optimize_po_entry(entry)
-        po.append(entry)
+    with phase_profiler.span('locale2po.convert') as convert_span:
+        for map_entry in combined_map.get_values():
+            po.append(combined_entry_to_po_entry(map_entry))
+        convert_span.count = len(po)
 
     return po
 
 
+def convert_to_po_file(master_entries: Iterable[ParsedEntry], locale_map: SgMap, state_map: SgMap,
+                       output_file: str) -> int:
+    """
+    Same as CombinedSgMap_to_po(CombinedSgMap(...)).save(output_file), but each entry is combined, converted
+    and written as master_entries produces it. Only the locale and state mappings are kept in memory.
+    Returns the number of entries.
+    """
+    combined_entries = CombinedSgMap.iter_entries(master_entries, locale_map, state_map)
+    po_entries = (combined_entry_to_po_entry(map_entry) for map_entry in combined_entries)
+    with phase_profiler.span('locale2po.convert') as convert_span:
+        count = write_po_file(output_file, create_meta_dict(locale_map.locale_code), po_entries)
+        convert_span.count = count
+    return count
+
+
+def combined_entry_to_po_entry(map_entry: CombinedEntry) -> polib.POEntry:
+    flags = []
+    if map_entry.fuzzy:
+        flags.append('fuzzy')
+
+    entry = polib.POEntry(
+        msgctxt=map_entry.key,
+        msgid=map_entry.original_msg,
+        msgstr=map_entry.translated_msg,
+        previous_msgid=map_entry.previous_original_msg,
+        comment=map_entry.comment,
+        flags=flags
+    )
+    return optimize_po_entry(entry)
+
+
 if __name__ == "__main__":
     main()
@@ -1,47 +1,70 @@
+import argparse
+from typing import Iterable
+
+import phase_profiler
 from sgpo_common import *
-from sgv23_mapping import SgMap
+from sgv23_mapping import SgMap, ParsedEntry
 
 
 def main():
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    args = parse_args()
+    with phase_profiler.profiling(args):
+        master2pot(args.root, args.master, args.output_dir)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Converts the master mapping file to 'messages.pot'.")
+    parser.add_argument('--root', default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        help='directory of the master mapping file (default: the root of this repository)')
+    parser.add_argument('--master', metavar='FILE', help="master mapping file (default: '<root>/mapping')")
+    parser.add_argument('-o', '--output-dir', metavar='DIR', help="directory of the pot file (default: '<root>/po')")
+    phase_profiler.add_arguments(parser)
+    return parser.parse_args()
+
 
-    master_map_file = get_master_mapping_file(base_dir)
-    po_dir = get_po_dir(base_dir)
+def master2pot(base_dir: str = None, master_map_file: str = None, po_dir: str = None):
+    base_dir = base_dir or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    master_map_file = master_map_file or get_master_mapping_file(base_dir)
+    po_dir = po_dir or get_po_dir(base_dir)
     if not os.path.exists(po_dir):
         os.makedirs(po_dir)
 
     pot_file = os.path.join(po_dir, "messages.pot")
 
-    # Load mapping files
-    master_map = SgMap(master_map_file, 'en_US')
+    # Convert and save to pot file. The master mapping file is read while converting.
+    parse_errors = []
+    count = master_entries_to_pot_file(SgMap.iter_file(master_map_file, parse_errors), pot_file)
+    print_parse_errors(parse_errors, master_map_file)
 
     print("# of items:")
-    print(f"\tmaster: {str(master_map.number_of_entries)}")
-
-    # Convert and save to pot file.
-    SgMap_to_pot_file(master_map, pot_file)
+    print(f"\tmaster: {str(count)}")
 
 
 # ======================================================================
 def SgMap_to_pot_file(master_map: SgMap, pot_file_path: str) -> None:
-    pot = polib.POFile()
-    pot.wrapwidth = 1000
-
-    meta_dict = create_meta_dict(master_map.locale_code)
+    master_entries_to_pot_file(master_map.get_values(), pot_file_path, master_map.locale_code)
 
-    for key, value in meta_dict.items():
-        pot.metadata[key] = value
 
-    for map_entry in master_map.get_values():
-        entry = polib.POEntry(
-            msgctxt=map_entry.key, msgid=map_entry.value, msgstr="")
+def master_entries_to_pot_file(master_entries: Iterable[ParsedEntry], pot_file_path: str,
+                               locale_code: str = 'en_US') -> int:
+    """
+    Converts and writes each entry as master_entries produces it, without keeping the pot in memory.
+    Returns the number of entries.
+    """
+    pot_entries = (master_entry_to_pot_entry(map_entry) for map_entry in master_entries)
+    with phase_profiler.span('master2pot.convert') as convert_span:
+        count = write_po_file(pot_file_path, create_meta_dict(locale_code), pot_entries)
+        convert_span.count = count
+    return count
 
-        # convert to optimized entry
-        entry = optimize_po_entry(entry)
 
-        pot.append(entry)
+def master_entry_to_pot_entry(map_entry: ParsedEntry) -> polib.POEntry:
+    entry = polib.POEntry(
+        msgctxt=map_entry.key, msgid=map_entry.value, msgstr="")
 
-    pot.save(pot_file_path)
+    # convert to optimized entry
+    return optimize_po_entry(entry)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,3 @@
+from .phase_profiler import (enable, disable, is_enabled, reset, span, timed, get_report, take_report,
+                             merge_report, format_report, write_json_report, add_arguments, profiling,
+                             result_length, argument_length)
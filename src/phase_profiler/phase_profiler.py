@@ -0,0 +1,260 @@
+"""
+Named timing spans for the phases of the scripts: loading, importing, sorting, formatting, saving, ...
+
+Profiling is disabled by default. While it is disabled, span() returns a shared no-op context manager,
+and a function decorated with timed() is called directly after checking one global flag.
+
+    phase_profiler.enable()
+    with phase_profiler.span('my phase') as my_span:
+        ...
+        my_span.count = len(entries)
+    print(phase_profiler.format_report(phase_profiler.get_report()))
+
+For each phase, the report has the number of calls, the total time, the self time (the total time minus the time
+of the spans nested in it) and the number of entries processed.
+"""
+import argparse
+import contextlib
+import cProfile
+import functools
+import json
+import time
+
+_enabled = False
+_started_at = None
+_phases = {}
+_active_spans = []
+
+
+class _Phase:
+    __slots__ = ('calls', 'total_seconds', 'self_seconds', 'entries')
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.total_seconds = 0.0
+        self.self_seconds = 0.0
+        self.entries = 0
+
+
+class _Span:
+    __slots__ = ('name', 'count', '_start', '_child_seconds')
+
+    def __init__(self, name: str, count: int = None) -> None:
+        self.name = name
+        self.count = count
+        self._start = None
+        self._child_seconds = 0.0
+
+    def __enter__(self):
+        _active_spans.append(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        elapsed = time.perf_counter() - self._start
+        _active_spans.pop()
+        if _active_spans:
+            _active_spans[-1]._child_seconds += elapsed
+
+        phase = _phases.get(self.name)
+        if phase is None:
+            phase = _phases[self.name] = _Phase()
+        phase.calls += 1
+        phase.total_seconds += elapsed
+        phase.self_seconds += elapsed - self._child_seconds
+        if self.count is not None:
+            phase.entries += self.count
+
+
+class _NoSpan:
+    """
+    Returned by span() while profiling is disabled.
+    """
+    __slots__ = ()
+    name = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        pass
+
+    def __setattr__(self, name, value) -> None:
+        # Assignments such as my_span.count = ... are ignored.
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+def enable() -> None:
+    """
+    Starts profiling with an empty report.
+    """
+    global _enabled, _started_at
+    reset()
+    _started_at = time.perf_counter()
+    _enabled = True
+
+
+def disable() -> None:
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset() -> None:
+    global _started_at
+    _phases.clear()
+    _active_spans.clear()
+    _started_at = time.perf_counter()
+
+
+def span(name: str, count: int = None):
+    """
+    Returns a context manager that measures the time of the phase 'name'.
+    count is the number of entries processed. It can also be set on the span inside the with block.
+    """
+    if not _enabled:
+        return _NO_SPAN
+    return _Span(name, count)
+
+
+def timed(name: str, count=None):
+    """
+    Decorator that measures each call of the function as the phase 'name'.
+    count(result, *args, **kwargs) returns the number of entries processed by the call.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+
+            with _Span(name) as timed_span:
+                result = func(*args, **kwargs)
+                if count is not None:
+                    timed_span.count = count(result, *args, **kwargs)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def get_report() -> dict:
+    """
+    Returns the phases measured since enable() or reset(), slowest first, as a JSON-serializable dict.
+    """
+    phases = [{'name': name,
+               'calls': phase.calls,
+               'total_seconds': phase.total_seconds,
+               'self_seconds': phase.self_seconds,
+               'entries': phase.entries}
+              for name, phase in _phases.items()]
+    phases.sort(key=lambda phase: phase['total_seconds'], reverse=True)
+
+    return {'total_seconds': time.perf_counter() - _started_at if _started_at is not None else 0.0,
+            'phases': phases}
+
+
+def take_report() -> dict:
+    """
+    Returns the phases measured since enable() or the previous take_report(), and starts an empty report.
+    Called by the workers of a process pool after each task. The main process adds the reports to its own
+    with merge_report().
+    """
+    report = get_report()
+    reset()
+    return report
+
+
+def merge_report(report: dict) -> None:
+    """
+    Adds the phases of a report from another process, such as a worker of a process pool.
+    """
+    for phase_report in report['phases']:
+        phase = _phases.get(phase_report['name'])
+        if phase is None:
+            phase = _phases[phase_report['name']] = _Phase()
+        phase.calls += phase_report['calls']
+        phase.total_seconds += phase_report['total_seconds']
+        phase.self_seconds += phase_report['self_seconds']
+        phase.entries += phase_report['entries']
+
+
+def format_report(report: dict) -> str:
+    lines = [f'{"phase":<32}{"calls":>8}{"total [s]":>12}{"self [s]":>12}{"entries":>10}']
+    for phase in report['phases']:
+        lines.append(f'{phase["name"]:<32}{phase["calls"]:>8}{phase["total_seconds"]:>12.3f}'
+                     f'{phase["self_seconds"]:>12.3f}{phase["entries"]:>10}')
+    lines.append(f'{"(wall clock)":<32}{"":>8}{report["total_seconds"]:>12.3f}')
+    return '\n'.join(lines)
+
+
+def write_json_report(report: dict, output_file: str) -> None:
+    with open(output_file, 'w', encoding='utf-8', newline='\n') as file:
+        json.dump(report, file, indent=2)
+        file.write('\n')
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Adds the --profile options to the argument parser of a script.
+    """
+    group = parser.add_argument_group('profiling')
+    group.add_argument('--profile', action='store_true', help='print the time spent in each phase')
+    group.add_argument('--profile-json', metavar='FILE', help='write the phases as JSON (implies --profile)')
+    group.add_argument('--profile-dump', metavar='FILE',
+                       help='write cProfile statistics, readable with pstats (implies --profile)')
+
+
+@contextlib.contextmanager
+def profiling(args: argparse.Namespace):
+    """
+    Profiles the with block as requested by the options of add_arguments(), and prints the report at the end.
+    """
+    if not (args.profile or args.profile_json or args.profile_dump):
+        yield
+        return
+
+    profiler = cProfile.Profile() if args.profile_dump else None
+    enable()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile_dump)
+        report = get_report()
+        disable()
+
+        print('\n======== Profile ========')
+        print(format_report(report))
+        if args.profile_json:
+            write_json_report(report, args.profile_json)
+            print(f'profile:\t{args.profile_json}')
+        if args.profile_dump:
+            print(f'cProfile:\t{args.profile_dump}')
+
+
+def result_length(result, *args, **kwargs) -> int:
+    """
+    count function of timed(): the length of the returned value.
+    """
+    return len(result)
+
+
+def argument_length(index: int):
+    """
+    Returns a count function of timed(): the length of the positional argument at index (0 is self for methods).
+    """
+    def count(result, *args, **kwargs) -> int:
+        return len(args[index])
+
+    return count
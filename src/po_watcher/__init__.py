@@ -0,0 +1 @@
+from .po_watcher import PoWatcher, FileSignature
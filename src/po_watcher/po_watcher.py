@@ -0,0 +1,221 @@
+"""
+Watches the files of a PoPathFinder while SmartGit collects keys, and merges them into messages.pot.
+
+The pot file stays loaded. The watcher polls the files with os.stat() and processes a file once it has not changed
+for the debounce time, so that a burst of writes is merged at once:
+  - unknown/mismatch file: the appended entries are imported into the pot in memory (see sgpo.tail_import).
+    The whole file is imported again if it has been truncated or replaced.
+  - messages.pot changed by something else: the pot is reloaded, the unknown/mismatch files are imported again,
+    and the pot is imported into the locale po files at the next save.
+  - locale po file changed by something else: the pot is imported into it at the next save.
+
+Every save_interval seconds, the pot is saved if it has changed, and then imported into the locale po files
+one at a time, so that only one of them is in memory. Files whose content does not change are not written.
+The files written by the watcher itself are not processed again.
+"""
+import os
+import time
+from collections import namedtuple
+
+import sgpo
+from path_finder import PoPathFinder
+from sgpo import import_report, tail_import
+
+FileSignature = namedtuple('FileSignature', ['size', 'mtime_ns', 'inode'])
+
+
+class PoWatcher:
+    def __init__(self, finder: PoPathFinder, save_interval: float = 10.0, debounce: float = 0.5,
+                 verbosity: int = import_report.VERBOSITY_SUMMARY, log=print, clock=time.monotonic):
+        """
+        clock: Returns the current time in seconds. Tests can replace it to control the debounce and the interval.
+        """
+        self.finder = finder
+        self.save_interval = save_interval
+        self.debounce = debounce
+        self.verbosity = verbosity
+        self.log = log
+        self.clock = clock
+
+        self.pot_file = finder.get_pot_file()
+        self._import_methods = {finder.get_unknown_file(): sgpo.SgPo.import_unknown,
+                                finder.get_mismatch_file(): sgpo.SgPo.import_mismatch}
+        self.pot = None
+        # The pot in memory has changes that are not saved yet.
+        self._pot_changed = False
+        # Input file -> NewEntries of the last import, whose checkpoint is written at the next save
+        self._imports = {}
+        self._uncommitted_imports = set()
+        # File -> FileSignature of the version that has been processed
+        self._signatures = {}
+        # File -> (FileSignature, time at which it was first seen)
+        self._pending = {}
+        self._dirty_locale_files = set()
+        self._last_save_time = None
+
+    def start(self) -> None:
+        """
+        Loads the pot and imports the entries appended to the unknown/mismatch files since the previous import.
+        """
+        self._load_pot()
+        for input_file in self._import_methods:
+            self._signatures[input_file] = _get_signature(input_file)
+            if os.path.exists(input_file):
+                self._import(tail_import.read_new_entries(input_file, self.pot_file))
+        for po_file in self._get_locale_files():
+            self._signatures[po_file] = _get_signature(po_file)
+        self._last_save_time = self.clock()
+
+    def poll(self) -> bool:
+        """
+        Processes the files that have changed and are stable, and saves if the interval has elapsed.
+        Returns True if something has been processed or saved.
+        """
+        if self.pot is None:
+            self.start()
+
+        now = self.clock()
+        processed = False
+        for file in [self.pot_file, *self._import_methods, *self._get_locale_files()]:
+            signature = _get_signature(file)
+            if signature == self._signatures.get(file):
+                self._pending.pop(file, None)
+                continue
+
+            pending = self._pending.get(file)
+            if pending is None or pending[0] != signature:
+                # Changed again. Wait until the file is stable.
+                self._pending[file] = (signature, now)
+                continue
+            if now - pending[1] < self.debounce:
+                continue
+
+            del self._pending[file]
+            self._signatures[file] = signature
+            self._process(file, signature)
+            processed = True
+
+        if now - self._last_save_time >= self.save_interval and self.has_unsaved_changes():
+            self.save()
+            processed = True
+
+        return processed
+
+    def has_unsaved_changes(self) -> bool:
+        return self._pot_changed or bool(self._uncommitted_imports) or bool(self._dirty_locale_files)
+
+    def save(self) -> list:
+        """
+        Saves the pot if it has changed, and imports it into the locale po files that need it.
+        Returns the files that have been written.
+        """
+        written_files = []
+        if self._pot_changed:
+            self.pot.sort()
+            self.pot.format()
+            if self.pot.save(self.pot_file, only_if_changed=True):
+                written_files.append(self.pot_file)
+                # The pot is imported into every locale po file.
+                self._dirty_locale_files.update(self._get_locale_files())
+            self._signatures[self.pot_file] = _get_signature(self.pot_file)
+            self._pot_changed = False
+
+        for input_file in sorted(self._uncommitted_imports):
+            tail_import.commit(self._imports[input_file], self.pot_file)
+        self._uncommitted_imports.clear()
+
+        for po_file in sorted(self._dirty_locale_files):
+            if os.path.exists(po_file) and self._import_pot_to_po_file(po_file):
+                written_files.append(po_file)
+            self._signatures[po_file] = _get_signature(po_file)
+        self._dirty_locale_files.clear()
+
+        for file in written_files:
+            self.log(f'saved:\t{file}')
+        self._last_save_time = self.clock()
+        return written_files
+
+    def run(self, poll_interval: float = 0.2, should_stop=None) -> None:
+        """
+        Polls until should_stop() returns True or the process is interrupted, and then saves.
+        """
+        self.start()
+        try:
+            while should_stop is None or not should_stop():
+                self.poll()
+                time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if self.has_unsaved_changes():
+                self.save()
+
+    def _process(self, file: str, signature: FileSignature) -> None:
+        if file == self.pot_file:
+            self.log(f'\nchanged by another process:\t{file}')
+            self._load_pot()
+            self._dirty_locale_files.update(self._get_locale_files())
+            # The imported entries may be missing from the new pot. Importing them again is harmless.
+            for input_file in self._import_methods:
+                self._imports.pop(input_file, None)
+                if os.path.exists(input_file):
+                    self._import(tail_import.read_entries_after(input_file, None))
+        elif file in self._import_methods:
+            if signature is None:
+                # Deleted. A new file is imported from the start.
+                self._imports.pop(file, None)
+                self._uncommitted_imports.discard(file)
+                return
+            previous = self._imports.get(file)
+            self._import(tail_import.read_entries_after(file, previous.checkpoint if previous else None))
+        else:
+            self._dirty_locale_files.add(file)
+
+    def _import(self, new_entries: tail_import.NewEntries) -> None:
+        # Only the checkpoint is kept. The imported entries are referenced by the pot, or freed.
+        self._imports[new_entries.input_file] = new_entries._replace(entries=None)
+        self._uncommitted_imports.add(new_entries.input_file)
+        if new_entries.entries is None:
+            return
+
+        report = self._import_methods[new_entries.input_file](self.pot, new_entries.entries)
+        self.log(f'\nimported:\t{new_entries.input_file} (from byte {new_entries.start_offset})')
+        self._log_report(report)
+        if report.changed:
+            self._pot_changed = True
+
+    def _load_pot(self) -> None:
+        self.pot = sgpo.pofile(self.pot_file, sgpo.PARSER_FAST)
+        self.pot.keep_sorted = True
+        self._signatures[self.pot_file] = _get_signature(self.pot_file)
+        self._pot_changed = False
+
+    def _import_pot_to_po_file(self, po_file: str) -> bool:
+        po = sgpo.pofile(po_file, sgpo.PARSER_FAST)
+        po.keep_sorted = True
+        report = po.import_pot(self.pot)
+        po.sort()
+        po.format()
+        if report.changed:
+            self.log(f'\nimported into:\t{po_file}')
+            self._log_report(report)
+        return po.save(po_file, only_if_changed=True)
+
+    def _log_report(self, report: import_report.ImportReport) -> None:
+        text = import_report.render_text(report, self.verbosity)
+        if text:
+            self.log(text.rstrip('\n'))
+
+    def _get_locale_files(self) -> list:
+        return sorted(self.finder.get_po_files(translation_file_only=True))
+
+
+def _get_signature(file: str) -> FileSignature:
+    """
+    Returns None if the file does not exist.
+    """
+    try:
+        stat = os.stat(file)
+    except FileNotFoundError:
+        return None
+    return FileSignature(size=stat.st_size, mtime_ns=stat.st_mtime_ns, inode=stat.st_ino)
@@ -0,0 +1,59 @@
+import argparse
+import sys
+
+import phase_profiler
+from benchmarks import run_benchmarks, compare_with_baseline, load_baseline, save_results
+from benchmarks.datasets import REAL_DATASET_NAME
+
+
+def main():
+    args = parse_args()
+
+    # The profile shows the phases of the benchmarked code over all runs.
+    # The measured times then include the overhead of the profiler, so they should not be used as a baseline.
+    with phase_profiler.profiling(args):
+        results = run_benchmarks(args.datasets.split(','), repeat=args.repeat, name_filter=args.filter,
+                                 measure_memory=not args.no_memory)
+
+    if args.output:
+        save_results(results, args.output)
+        print(f'results:\t{args.output}')
+
+    if args.baseline:
+        regressions = compare_with_baseline(results, load_baseline(args.baseline),
+                                            threshold=args.threshold, memory_threshold=args.memory_threshold)
+        print('\n======== Comparison with baseline ========')
+        if not regressions:
+            print('No regressions.')
+            return
+
+        for regression in regressions:
+            print(f'REGRESSION:\t{regression.name}\t{regression.metric}\t'
+                  f'{regression.baseline:.6g} -> {regression.current:.6g} (x{regression.ratio:.2f})')
+        sys.exit(1)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Measures the time and peak memory of loading, looking up, importing, sorting and saving '
+                    'catalogs, and of parsing and combining v23 mapping files.')
+    parser.add_argument('-d', '--datasets', default=f'{REAL_DATASET_NAME},10k',
+                        help=f'comma separated datasets: "{REAL_DATASET_NAME}" for the files of the repository, '
+                             f'or the number of entries of a synthetic catalog such as 10k, 100k or 1m '
+                             f'(default: %(default)s)')
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help='number of timed runs per benchmark, the fastest one is reported (default: %(default)s)')
+    parser.add_argument('-k', '--filter', help='run only the benchmarks whose "<name>@<dataset>" matches this regex')
+    parser.add_argument('--no-memory', action='store_true', help='skip the peak memory measurement')
+    parser.add_argument('-o', '--output', help='write the results to this JSON file')
+    parser.add_argument('-b', '--baseline', help='compare the results with this JSON file, written by --output')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed slowdown compared with the baseline (default: %(default)s = 25%%)')
+    parser.add_argument('--memory-threshold', type=float, default=0.10,
+                        help='allowed increase of the peak memory (default: %(default)s = 10%%)')
+    phase_profiler.add_arguments(parser)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main()
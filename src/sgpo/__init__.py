@@ -1 +1,6 @@
-from .sgpo import SgPo, pofile,pofile_from_text
+from .sgpo import SgPo, pofile, pofile_from_text, PARSER_POLIB, PARSER_FAST
+from .compact_entry import CompactEntry
+from .lazy_po import LazySgPo, lazy_pofile
+from .import_report import ImportReport, ReportEntry
+from .key_resolver import KeyResolver, Resolution
+from .compiled_catalog import CompiledCatalog, CatalogEntry, CatalogFormatError
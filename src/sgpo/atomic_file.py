@@ -0,0 +1,49 @@
+"""
+Writes files atomically, for SgPo.save() and the other files written next to the po files.
+The content is written to a temporary file in the same directory, which then replaces the file at once.
+If writing fails, the temporary file is removed and the existing file is left as it was.
+"""
+import io
+import os
+import shutil
+import tempfile
+
+
+def write_file_atomically(fpath: str, write) -> None:
+    """
+    write: Function that writes the content to the binary file object it is given.
+    """
+    directory = os.path.dirname(os.path.abspath(fpath))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(fpath) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            write(file)
+            file.flush()
+            os.fsync(file.fileno())
+
+        # mkstemp() creates the file readable only by the owner.
+        if os.path.exists(fpath):
+            shutil.copymode(fpath, temp_path)
+        else:
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(temp_path, 0o666 & ~umask)
+
+        os.replace(temp_path, fpath)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def write_text_file_atomically(fpath: str, write, encoding: str = 'utf-8', newline: str = '\n') -> None:
+    """
+    Same as write_file_atomically(), but write is given a text file object.
+    """
+    def write_text(file) -> None:
+        text_file = io.TextIOWrapper(file, encoding=encoding, newline=newline)
+        write(text_file)
+        text_file.flush()
+        text_file.detach()
+
+    write_file_atomically(fpath, write_text)
@@ -0,0 +1,165 @@
+"""
+Checks a catalog for keys that polib rejects or that SmartGit cannot resolve as intended.
+
+    report = catalog_validator.validate_file('po/ja_JP.po')
+    for issue in report.issues:
+        print(catalog_validator.format_issue(issue, report.file))
+
+Kinds of issues, each reported with the line numbers of both entries:
+  - ISSUE_DUPLICATE (error): same msgctxt and msgid as an earlier entry. polib refuses to load the file.
+  - ISSUE_SHADOWED (error): same key as an earlier entry with another msgid, for example two msgctxt-only entries
+    with the same msgctxt. SmartGit only ever uses the first one. Obsolete entries are left out, since they are not
+    used, although find_by_key() returns an obsolete entry that comes first.
+  - ISSUE_CONFLICT (warning): an alternation such as 'wnd(Log|Project).mni:' expands to the key of a literal entry
+    or of another pattern, so the same runtime key has two translations. As for sgpo.KeyResolver, the literal entry
+    and then the first pattern win. Wildcard patterns are only compared with each other, since a literal key that
+    ends with the suffix of a wildcard is the usual way to override it.
+
+All checks are done in one pass over the entries with hash maps, plus one lookup per expansion of the alternations.
+validate_file() reads the file without the duplicate check of sgpo.pofile(), so that every duplicate is reported
+instead of the first ValueError.
+"""
+from collections import namedtuple
+
+import polib
+
+from phase_profiler import timed, argument_length
+from . import fast_po_parser
+from .key_resolver import expand_alternations, WILDCARD
+from .sgpo import SgPo, Key_tuple
+
+ISSUE_DUPLICATE = 'duplicate'
+ISSUE_SHADOWED = 'shadowed'
+ISSUE_CONFLICT = 'conflict'
+
+ERROR_KINDS = (ISSUE_DUPLICATE, ISSUE_SHADOWED)
+
+Issue = namedtuple('Issue', ['kind', 'key', 'linenum', 'msgctxt', 'msgid', 'other_linenum', 'other_msgctxt',
+                             'other_msgid'])
+Issue.__doc__ = """
+kind: ISSUE_DUPLICATE, ISSUE_SHADOWED or ISSUE_CONFLICT
+key: The Key_tuple used by both entries. For a conflict, the key to which the pattern expands.
+linenum, msgctxt, msgid: The entry that is reported, which is never used for that key.
+other_linenum, other_msgctxt, other_msgid: The entry that is used for that key.
+The line numbers are None for entries that were not read from a file.
+"""
+
+
+class ValidationReport(namedtuple('ValidationReport', ['file', 'entry_count', 'issues'])):
+    """
+    file: The validated file, or None.
+    entry_count: The number of entries, including obsolete entries.
+    issues: List of Issue, in the order of the entries.
+    """
+    __slots__ = ()
+
+    @property
+    def errors(self) -> list:
+        return [issue for issue in self.issues if issue.kind in ERROR_KINDS]
+
+    @property
+    def warnings(self) -> list:
+        return [issue for issue in self.issues if issue.kind not in ERROR_KINDS]
+
+    def is_valid(self, strict: bool = False) -> bool:
+        """
+        strict: Warnings are errors too.
+        """
+        return not (self.issues if strict else self.errors)
+
+
+@timed('validator.validate', count=argument_length(0))
+def validate_entries(entries) -> list:
+    """
+    Returns the Issue list of entries, which can be an SgPo or any sequence of polib.POEntry.
+    """
+    issues = []
+    # (msgctxt, msgid) -> the first non-obsolete entry. Like polib, an entry duplicates an earlier non-obsolete entry
+    # with the same msgctxt and msgid.
+    raw_key_index = {}
+    # Key_tuple -> the first non-obsolete entry with that key, which is the one SmartGit uses. Unlike the index of
+    # find_by_key(), obsolete entries are left out, so an obsolete entry neither shadows nor is shadowed.
+    key_index = {}
+    for entry in entries:
+        raw_key = (entry.msgctxt, entry.msgid)
+        first_entry = raw_key_index.get(raw_key)
+        if first_entry is not None:
+            issues.append(_create_issue(ISSUE_DUPLICATE, SgPo._to_key_tuple(*raw_key), entry, first_entry))
+            continue
+        if entry.obsolete:
+            continue
+        raw_key_index[raw_key] = entry
+
+        if entry.msgctxt is None:
+            continue
+        key = SgPo._po_entry_to_key_tuple(entry)
+        used_entry = key_index.setdefault(key, entry)
+        if used_entry is not entry:
+            issues.append(_create_issue(ISSUE_SHADOWED, key, entry, used_entry))
+
+    issues.extend(_find_conflicts(key_index))
+    issues.sort(key=lambda issue: issue.linenum or 0)
+    return issues
+
+
+def validate_file(filename: str) -> ValidationReport:
+    SgPo._validate_filename(filename)
+    try:
+        entries = fast_po_parser.parse(filename).entries
+    except fast_po_parser.UnsupportedSyntaxError:
+        entries = polib.pofile(filename, wrapwidth=9999, check_for_duplicates=False)
+
+    return ValidationReport(file=filename, entry_count=len(entries), issues=validate_entries(entries))
+
+
+def format_issue(issue: Issue, file: str = None) -> str:
+    """
+    'po/ja_JP.po:120: duplicate: msgctxt "dlg.lbl" msgid "Name" (same as line 80)'
+    """
+    location = f'{file or "<catalog>"}:{_format_linenum(issue.linenum)}'
+    text = f'{location}: {issue.kind}: {_format_key(issue.msgctxt, issue.msgid)}'
+    if issue.kind == ISSUE_DUPLICATE:
+        return f'{text} (same as line {_format_linenum(issue.other_linenum)})'
+    if issue.kind == ISSUE_SHADOWED:
+        return f'{text} (hidden by line {_format_linenum(issue.other_linenum)}: msgid "{issue.other_msgid}")'
+    return (f'{text} (expands to "{issue.key.msgctxt}", '
+            f'already defined by line {_format_linenum(issue.other_linenum)}: msgctxt "{issue.other_msgctxt}")')
+
+
+def _find_conflicts(key_index: dict) -> list:
+    """
+    Compares the expansions of the patterns with the literal keys and with each other.
+    """
+    issues = []
+    # Key_tuple of an expansion -> the first pattern entry that expands to it
+    expansions = {}
+    for key, entry in key_index.items():
+        patterns = expand_alternations(key.msgctxt)
+        if patterns is None and key.msgctxt.startswith(WILDCARD):
+            # A wildcard without alternation only conflicts with the expansions of other wildcards.
+            patterns = [key.msgctxt]
+        for pattern in patterns or []:
+            expanded_key = Key_tuple(pattern, key.msgid)
+            # A literal key wins over an alternation. Wildcards are compared in the order of the entries.
+            used_entry = key_index.get(expanded_key) if not pattern.startswith(WILDCARD) else None
+            if used_entry is None:
+                used_entry = expansions.setdefault(expanded_key, entry)
+            if used_entry is not entry:
+                issues.append(_create_issue(ISSUE_CONFLICT, expanded_key, entry, used_entry))
+    return issues
+
+
+def _create_issue(kind: str, key: Key_tuple, entry: polib.POEntry, other_entry: polib.POEntry) -> Issue:
+    return Issue(kind=kind, key=key, linenum=entry.linenum, msgctxt=entry.msgctxt, msgid=entry.msgid,
+                 other_linenum=other_entry.linenum, other_msgctxt=other_entry.msgctxt, other_msgid=other_entry.msgid)
+
+
+def _format_key(msgctxt: str, msgid: str) -> str:
+    if msgid is None:
+        return f'msgctxt "{msgctxt}"'
+    return f'msgctxt "{msgctxt}" msgid "{msgid}"'
+
+
+def _format_linenum(linenum: int) -> str:
+    # polib gives 0 to the first entry of a file without header.
+    return str(linenum) if linenum else '?'
@@ -0,0 +1,88 @@
+"""
+A compact entry class for large catalogs.
+
+polib.POEntry keeps 15 attributes in a per-instance dict. CompactEntry uses __slots__ and holds only the fields
+that SmartGit PO files use. The other attributes of polib.POEntry are read-only class attributes with empty values,
+so the entries can be used with SgPo and polib.POFile in the same way as polib.POEntry.
+
+Entries that use anything else (occurrences, plural forms, previous msgctxt) can't be converted and stay polib.POEntry.
+"""
+from __future__ import annotations
+
+from types import MappingProxyType
+
+import polib
+
+
+class CompactEntry:
+    __slots__ = ('msgctxt', 'msgid', 'msgstr', 'flags', 'previous_msgid', 'comment', 'tcomment', 'obsolete')
+
+    # Fields of polib.POEntry that SmartGit PO files don't use
+    msgid_plural = ''
+    msgstr_plural = MappingProxyType({})
+    occurrences = ()
+    previous_msgctxt = None
+    previous_msgid_plural = None
+    encoding = polib.default_encoding
+    linenum = None
+
+    def __init__(self, msgctxt: str = None, msgid: str = '', msgstr: str = '', flags: list = None,
+                 previous_msgid: str = None, comment: str = '', tcomment: str = '', obsolete: bool = False) -> None:
+        self.msgctxt = msgctxt
+        self.msgid = msgid
+        self.msgstr = msgstr
+        self.flags = [] if flags is None else flags
+        self.previous_msgid = previous_msgid
+        self.comment = comment
+        self.tcomment = tcomment
+        self.obsolete = obsolete
+
+    # Same comparison and status methods as polib.POEntry
+    __cmp__ = polib.POEntry.__cmp__
+    __eq__ = polib.POEntry.__eq__
+    __ne__ = polib.POEntry.__ne__
+    __lt__ = polib.POEntry.__lt__
+    __gt__ = polib.POEntry.__gt__
+    __le__ = polib.POEntry.__le__
+    __ge__ = polib.POEntry.__ge__
+    __hash__ = polib.POEntry.__hash__
+    fuzzy = polib.POEntry.fuzzy
+    translated = polib.POEntry.translated
+
+    def __unicode__(self, wrapwidth: int = 78) -> str:
+        return self.to_polib().__unicode__(wrapwidth)
+
+    def __str__(self) -> str:
+        return self.__unicode__()
+
+    def __repr__(self) -> str:
+        return f'<CompactEntry msgctxt={self.msgctxt!r} msgid={self.msgid!r}>'
+
+    def __getstate__(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state: tuple) -> None:
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+    @staticmethod
+    def can_convert(entry: polib.POEntry) -> bool:
+        """
+        Returns True if from_polib() can convert the entry without losing anything.
+        """
+        return not (entry.occurrences or entry.msgid_plural or entry.msgstr_plural
+                    or entry.previous_msgctxt is not None or entry.previous_msgid_plural is not None)
+
+    @classmethod
+    def from_polib(cls, entry: polib.POEntry) -> CompactEntry:
+        if not cls.can_convert(entry):
+            raise ValueError(f'The entry can not be converted: msgctxt "{entry.msgctxt}" msgid "{entry.msgid}"')
+
+        return cls(msgctxt=entry.msgctxt, msgid=entry.msgid, msgstr=entry.msgstr, flags=list(entry.flags),
+                   previous_msgid=entry.previous_msgid, comment=entry.comment, tcomment=entry.tcomment,
+                   obsolete=entry.obsolete)
+
+    def to_polib(self) -> polib.POEntry:
+        return polib.POEntry(msgctxt=self.msgctxt, msgid=self.msgid, msgstr=self.msgstr, flags=list(self.flags),
+                             previous_msgid=self.previous_msgid, comment=self.comment, tcomment=self.tcomment,
+                             obsolete=self.obsolete)
@@ -0,0 +1,397 @@
+"""
+A compiled, read-only binary form of a catalog, for tools that only look up translations.
+
+    compiled_catalog.write_catalog(po, 'ja_JP.sgcat')
+
+    with compiled_catalog.CompiledCatalog('ja_JP.sgcat') as catalog:
+        entry = catalog.find_by_key('dlgCommit.btnOk:', 'OK')
+        text = catalog.translate('dlgCommit.btnOk:', 'OK', default='OK')
+
+The reader memory-maps the file and looks up a key with a few reads from the hash table. Nothing is parsed when
+the file is opened, and only the strings of the entries that are read are decoded, so opening a catalog takes
+about the same time whatever its size. Only the header is checked when the file is opened; the checksum of
+the whole file is checked with CompiledCatalog(filename, verify=True).
+
+Layout of the file (all integers are unsigned 32-bit little-endian, offsets are from the start of the file):
+  - header: magic, format version, entry count, bucket count, offsets and sizes of the sections below,
+    the CRC-32 of the rest of the file, and the CRC-32 of the header up to that field
+  - buckets: bucket_count slots of (record index + 1), 0 for an empty slot. Linear probing.
+  - records: entry_count records of (hash, flags, msgctxt, msgid and msgstr as offset/length in the string pool)
+  - string pool: UTF-8 strings. Identical strings are stored once.
+  - metadata: the number of metadata items, then the name and the value of each item as (length, UTF-8 string)
+
+The hash is the CRC-32 of the UTF-8 key: msgctxt, followed by '\\x04' and the msgid if the msgid is part of the key,
+as for find_by_key(). Obsolete entries and entries without msgctxt are not compiled. If several entries have
+the same key, the first one is used.
+"""
+from __future__ import annotations
+
+import mmap
+import struct
+import zlib
+from collections import namedtuple
+from typing import Iterator
+
+import polib
+
+from phase_profiler import timed, argument_length
+from .atomic_file import write_file_atomically
+from .sgpo import SgPo
+
+MAGIC = b'SGPOCAT\x00'
+FORMAT_VERSION = 2
+
+CATALOG_FILE_EXTENSION = '.sgcat'
+
+FLAG_FUZZY = 0x1
+FLAG_UNTRANSLATED = 0x2
+_NOT_TRANSLATED_FLAGS = FLAG_FUZZY | FLAG_UNTRANSLATED
+
+# magic, format_version, entry_count, bucket_count, buckets_offset, records_offset, pool_offset, pool_size,
+# metadata_offset, metadata_size, checksum, header_checksum
+_HEADER = struct.Struct('<8s11I')
+# hash, flags, msgctxt_offset, msgctxt_size, msgid_offset, msgid_size, msgstr_offset, msgstr_size
+_RECORD = struct.Struct('<8I')
+_BUCKET = struct.Struct('<I')
+_LENGTH = struct.Struct('<I')
+# The header checksum is the last field of the header.
+_HEADER_CHECKSUM_OFFSET = _HEADER.size - 4
+
+_KEY_SEPARATOR = b'\x04'
+_MIN_BUCKET_COUNT = 8
+
+
+class CatalogFormatError(ValueError):
+    """
+    Raised when a file is not a compiled catalog, has an unsupported format version or is corrupted.
+    """
+
+
+class CatalogEntry(namedtuple('CatalogEntry', ['msgctxt', 'msgid', 'msgstr', 'flags'])):
+    __slots__ = ()
+
+    @property
+    def fuzzy(self) -> bool:
+        return bool(self.flags & FLAG_FUZZY)
+
+    @property
+    def untranslated(self) -> bool:
+        return bool(self.flags & FLAG_UNTRANSLATED)
+
+    @property
+    def translated(self) -> bool:
+        """
+        Same as polib.POEntry.translated(): not fuzzy, and msgstr is not empty.
+        """
+        return not self.flags & _NOT_TRANSLATED_FLAGS
+
+
+@timed('catalog.compile', count=argument_length(0))
+def compile_catalog(po: SgPo) -> bytes:
+    """
+    Returns the compiled catalog of po, which can be a pot or a locale po file.
+    The result only depends on the entries and the metadata, so compiling the same catalog gives the same bytes.
+    """
+    pool = _StringPool()
+    records = []
+    hashes = []
+    keys = set()
+    for entry in po:
+        if entry.obsolete or entry.msgctxt is None:
+            continue
+        key = SgPo._po_entry_to_key_tuple(entry)
+        if key in keys:
+            continue
+        keys.add(key)
+
+        key_hash = _hash_key(key.msgctxt, key.msgid)
+        hashes.append(key_hash)
+        records.append(_RECORD.pack(key_hash, _get_flags(entry), *pool.add(entry.msgctxt),
+                                    *pool.add(entry.msgid), *pool.add(entry.msgstr)))
+
+    bucket_count = _get_bucket_count(len(records))
+    buckets = [0] * bucket_count
+    mask = bucket_count - 1
+    for index, key_hash in enumerate(hashes):
+        slot = key_hash & mask
+        while buckets[slot]:
+            slot = (slot + 1) & mask
+        buckets[slot] = index + 1
+
+    buckets_offset = _HEADER.size
+    records_offset = buckets_offset + bucket_count * _BUCKET.size
+    pool_offset = records_offset + len(records) * _RECORD.size
+    metadata = _pack_metadata(_get_metadata_items(po))
+    body = b''.join([struct.pack(f'<{bucket_count}I', *buckets), *records, bytes(pool.data), metadata])
+
+    header_fields = (MAGIC, FORMAT_VERSION, len(records), bucket_count, buckets_offset, records_offset,
+                     pool_offset, len(pool.data), pool_offset + len(pool.data), len(metadata), zlib.crc32(body))
+    header = _HEADER.pack(*header_fields, 0)
+    return _HEADER.pack(*header_fields, _compute_header_checksum(header)) + body
+
+
+def write_catalog(po: SgPo, output_file: str, only_if_changed: bool = False) -> bool:
+    """
+    Compiles po into output_file. The file is replaced at once, so a reader never sees a partial file.
+    Returns True if the file has been written, False if only_if_changed is set and the file is up to date.
+    """
+    data = compile_catalog(po)
+    if only_if_changed:
+        try:
+            with open(output_file, 'rb') as file:
+                if file.read() == data:
+                    return False
+        except FileNotFoundError:
+            pass
+
+    write_file_atomically(output_file, lambda file: file.write(data))
+    return True
+
+
+class CompiledCatalog:
+    """
+    Reads a file written by write_catalog().
+    Call close() or use it in a with statement to release the mapping of the file.
+    """
+
+    def __init__(self, filename: str, verify: bool = False) -> None:
+        """
+        verify: Also checks the CRC-32 of the rest of the file, which reads the whole file.
+        Without it, only the header is checked, and a corrupted section may only be noticed by a lookup.
+        Raises CatalogFormatError if the file cannot be read as a compiled catalog.
+        """
+        self.fpath = filename
+        self._metadata = None
+        self._mmap = None
+
+        with open(filename, 'rb') as file:
+            size = file.seek(0, 2)
+            if size < _HEADER.size:
+                raise CatalogFormatError(f'{filename}: not a compiled catalog')
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            self._read_header(verify)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self) -> CompiledCatalog:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._entry_count
+
+    def __iter__(self) -> Iterator[CatalogEntry]:
+        for index in range(self._entry_count):
+            yield self._read_entry(index)
+
+    def __contains__(self, key: tuple) -> bool:
+        return self._find_record(*key) is not None
+
+    @property
+    def metadata(self) -> dict:
+        if self._metadata is None:
+            self._metadata = self._read_metadata()
+        return self._metadata
+
+    def find_by_key(self, msgctxt: str, msgid: str = None) -> CatalogEntry | None:
+        """
+        As for SgPo.find_by_key(), the msgid is part of the key only if the msgctxt ends with ':'.
+        """
+        index = self._find_record(msgctxt, msgid)
+        return None if index is None else self._read_entry(index)
+
+    def translate(self, msgctxt: str, msgid: str = None, default: str = None) -> str | None:
+        """
+        Returns the msgstr of the entry, or default if there is no entry or it is fuzzy or untranslated.
+        """
+        index = self._find_record(msgctxt, msgid)
+        if index is None:
+            return default
+        entry = self._read_entry(index)
+        return entry.msgstr if entry.translated else default
+
+    # ======= Private methods =======
+    def _read_header(self, verify: bool) -> None:
+        (magic, format_version, entry_count, bucket_count, buckets_offset, records_offset, pool_offset, pool_size,
+         metadata_offset, metadata_size, checksum, header_checksum) = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise CatalogFormatError(f'{self.fpath}: not a compiled catalog')
+        if format_version != FORMAT_VERSION:
+            raise CatalogFormatError(f'{self.fpath}: unsupported format version {format_version}, '
+                                     f'expected {FORMAT_VERSION}. Compile the catalog again.')
+
+        if _compute_header_checksum(self._mmap[:_HEADER.size]) != header_checksum:
+            raise CatalogFormatError(f'{self.fpath}: corrupted catalog (header checksum mismatch)')
+
+        size = len(self._mmap)
+        if (bucket_count & (bucket_count - 1) or bucket_count < _MIN_BUCKET_COUNT or entry_count >= bucket_count
+                or buckets_offset != _HEADER.size
+                or records_offset != buckets_offset + bucket_count * _BUCKET.size
+                or pool_offset != records_offset + entry_count * _RECORD.size
+                or metadata_offset != pool_offset + pool_size
+                or metadata_offset + metadata_size != size):
+            raise CatalogFormatError(f'{self.fpath}: corrupted catalog')
+
+        if verify:
+            with memoryview(self._mmap) as view:
+                actual_checksum = zlib.crc32(view[_HEADER.size:])
+            if actual_checksum != checksum:
+                raise CatalogFormatError(f'{self.fpath}: checksum mismatch')
+
+        self._entry_count = entry_count
+        self._bucket_count = bucket_count
+        self._bucket_mask = bucket_count - 1
+        self._buckets_offset = buckets_offset
+        self._records_offset = records_offset
+        self._pool_offset = pool_offset
+        self._metadata_offset = metadata_offset
+        self._metadata_size = metadata_size
+
+    def _find_record(self, msgctxt: str, msgid: str) -> int | None:
+        if msgctxt is None or self._mmap is None:
+            return None
+        if not msgctxt.endswith(':'):
+            msgid = None
+        msgctxt_bytes = msgctxt.encode('utf-8')
+        msgid_bytes = msgid.encode('utf-8') if msgid is not None else None
+        key_hash = _hash_key_bytes(msgctxt_bytes, msgid_bytes)
+
+        data = self._mmap
+        pool_offset = self._pool_offset
+        slot = key_hash & self._bucket_mask
+        # At least half of the buckets are empty, so only a corrupted file can have no empty slot.
+        for _ in range(self._bucket_count):
+            (index,) = _BUCKET.unpack_from(data, self._buckets_offset + slot * _BUCKET.size)
+            if index == 0:
+                return None
+            index -= 1
+            (record_hash, _, msgctxt_offset, msgctxt_size, msgid_offset, msgid_size, _, _) = _RECORD.unpack_from(
+                data, self._get_record_offset(index))
+            if (record_hash == key_hash
+                    and data[pool_offset + msgctxt_offset:pool_offset + msgctxt_offset + msgctxt_size] == msgctxt_bytes
+                    and (msgid_bytes is None
+                         or data[pool_offset + msgid_offset:pool_offset + msgid_offset + msgid_size] == msgid_bytes)):
+                return index
+            slot = (slot + 1) & self._bucket_mask
+        raise CatalogFormatError(f'{self.fpath}: corrupted catalog (no empty bucket)')
+
+    def _read_entry(self, index: int) -> CatalogEntry:
+        (_, flags, msgctxt_offset, msgctxt_size, msgid_offset, msgid_size, msgstr_offset, msgstr_size) = \
+            _RECORD.unpack_from(self._mmap, self._get_record_offset(index))
+        return CatalogEntry(msgctxt=self._read_string(msgctxt_offset, msgctxt_size),
+                            msgid=self._read_string(msgid_offset, msgid_size),
+                            msgstr=self._read_string(msgstr_offset, msgstr_size),
+                            flags=flags)
+
+    def _read_metadata(self) -> dict:
+        data = self._mmap
+        offset = self._metadata_offset
+        end = offset + self._metadata_size
+
+        def read_text() -> str:
+            nonlocal offset
+            if offset + _LENGTH.size > end:
+                raise CatalogFormatError(f'{self.fpath}: corrupted catalog (metadata)')
+            (length,) = _LENGTH.unpack_from(data, offset)
+            start = offset + _LENGTH.size
+            offset = start + length
+            if offset > end:
+                raise CatalogFormatError(f'{self.fpath}: corrupted catalog (metadata)')
+            return data[start:offset].decode('utf-8')
+
+        if offset + _LENGTH.size > end:
+            raise CatalogFormatError(f'{self.fpath}: corrupted catalog (metadata)')
+        (count,) = _LENGTH.unpack_from(data, offset)
+        offset += _LENGTH.size
+        metadata = {}
+        for _ in range(count):
+            name = read_text()
+            metadata[name] = read_text()
+        return metadata
+
+    def _get_record_offset(self, index: int) -> int:
+        return self._records_offset + index * _RECORD.size
+
+    def _read_string(self, offset: int, size: int) -> str:
+        start = self._pool_offset + offset
+        return self._mmap[start:start + size].decode('utf-8')
+
+
+class _StringPool:
+    def __init__(self) -> None:
+        self.data = bytearray()
+        self._offsets = {}
+
+    def add(self, text: str) -> tuple:
+        """
+        Returns (offset, size) of the UTF-8 text in the pool.
+        """
+        location = self._offsets.get(text)
+        if location is None:
+            encoded = text.encode('utf-8')
+            location = (len(self.data), len(encoded))
+            self.data += encoded
+            self._offsets[text] = location
+        return location
+
+
+def _hash_key(msgctxt: str, msgid: str) -> int:
+    return _hash_key_bytes(msgctxt.encode('utf-8'), msgid.encode('utf-8') if msgid is not None else None)
+
+
+def _hash_key_bytes(msgctxt: bytes, msgid: bytes) -> int:
+    if msgid is None:
+        return zlib.crc32(msgctxt)
+    return zlib.crc32(msgid, zlib.crc32(_KEY_SEPARATOR, zlib.crc32(msgctxt)))
+
+
+def _get_flags(entry: polib.POEntry) -> int:
+    flags = 0
+    if entry.fuzzy:
+        flags |= FLAG_FUZZY
+    if not entry.msgstr:
+        flags |= FLAG_UNTRANSLATED
+    return flags
+
+
+def _get_metadata_items(po: SgPo) -> list:
+    if hasattr(po, 'ordered_metadata'):
+        return po.ordered_metadata()
+    return list(getattr(po, 'metadata', {}).items())
+
+
+def _pack_metadata(items: list) -> bytes:
+    """
+    Names and values are length-prefixed, so that they can contain any character.
+    """
+    parts = [_LENGTH.pack(len(items))]
+    for name, value in items:
+        for text in (name, value):
+            encoded = text.encode('utf-8')
+            parts += [_LENGTH.pack(len(encoded)), encoded]
+    return b''.join(parts)
+
+
+def _get_bucket_count(entry_count: int) -> int:
+    # At most half of the buckets are used, so that a probe ends quickly.
+    bucket_count = _MIN_BUCKET_COUNT
+    while bucket_count < entry_count * 2:
+        bucket_count *= 2
+    return bucket_count
+
+
+def _compute_header_checksum(header: bytes) -> int:
+    """
+    CRC-32 of the header without its last field, the header checksum.
+    """
+    return zlib.crc32(header[:_HEADER_CHECKSUM_OFFSET])
@@ -0,0 +1,264 @@
+"""
+A fast parser for the narrow PO dialect used by SmartGit.
+
+The files handled here are written by SgPo.save() and by SmartGit itself (unknown.*, mismatch.*).
+They are never wrapped, so every msgctxt/msgid/msgstr fits on a single line.
+Only the header msgstr is continued over several lines.
+
+Anything outside of that dialect raises UnsupportedSyntaxError, and the caller falls back to polib.
+The resulting entries are the same polib.POEntry objects that polib creates for the same input.
+"""
+import codecs
+import os
+import re
+from collections import namedtuple
+
+import polib
+
+ParseResult = namedtuple('ParseResult', ['entries', 'header', 'metadata', 'metadata_is_fuzzy', 'encoding'])
+
+# Same pattern as polib.detect_encoding()
+_CHARSET_PATTERN = re.compile(r'"?Content-Type:.+? charset=([\w_\-:\.]+)')
+_UNESCAPED_QUOTE_PATTERN = re.compile(r'([^\\]|^)"')
+
+# States of the parser
+_ST_START = 0
+_ST_COMMENT = 1
+_ST_MSGCTXT = 2
+_ST_MSGID = 3
+_ST_MSGSTR = 4
+
+
+class UnsupportedSyntaxError(Exception):
+    """
+    Raised when the input uses PO syntax that this parser does not handle.
+    """
+
+    def __init__(self, line_number: int, line: str):
+        super().__init__(f'Unsupported syntax (line {line_number}): {line}')
+        self.line_number = line_number
+        self.line = line
+
+
+def parse(pofile: str) -> ParseResult:
+    """
+    Parses a PO file. Like polib.pofile(), pofile is either a file path or the content of the file.
+    """
+    if _is_file(pofile):
+        try:
+            with open(pofile, 'r', encoding='utf-8') as file:
+                content = file.read()
+        except UnicodeDecodeError:
+            raise UnsupportedSyntaxError(0, 'The file is not encoded in UTF-8')
+        lines = content.split('\n')
+        if lines[-1] == '':
+            lines.pop()
+    else:
+        content = pofile
+        lines = content.splitlines()
+
+    encoding = _detect_encoding(content)
+    entries, header = _parse_lines(lines)
+    metadata, metadata_is_fuzzy = _extract_metadata(entries)
+
+    return ParseResult(entries=entries, header=header, metadata=metadata,
+                       metadata_is_fuzzy=metadata_is_fuzzy, encoding=encoding)
+
+
+def parse_entry(text: str) -> polib.POEntry:
+    """
+    Parses the text of a single entry, including its comments. There is no file header in the text.
+    """
+    entries, _ = _parse_lines(text.splitlines(), with_header=False)
+    if len(entries) != 1:
+        raise UnsupportedSyntaxError(0, f'{len(entries)} entries in the text of a single entry')
+    return entries[0]
+
+
+def _parse_lines(lines: list, with_header: bool = True) -> tuple:
+    entries = []
+    header = ''
+
+    state = _ST_START
+    last_line_is_comment = False
+    entry = _new_entry(0)
+
+    line_number = 0
+    for line in lines:
+        line_number += 1
+        if line_number == 1 and line.startswith(codecs.BOM_UTF8.decode('utf-8')):
+            line = line[1:]
+        line = line.strip()
+        if not line:
+            continue
+
+        line_is_obsolete = False
+        if line[0] == '#':
+            tokens = line.split(None, 1)
+            marker = tokens[0]
+
+            if marker == '#~' and len(tokens) > 1:
+                line_is_obsolete = True
+                line = tokens[1]
+            elif marker in ('#.', '#,', '#:') and len(tokens) == 1:
+                # Empty comment lines are ignored like polib does.
+                last_line_is_comment = True
+                continue
+            elif marker in ('#.', '#,', '#|') or marker == '#' or marker.startswith('##'):
+                last_line_is_comment = True
+
+                if state == _ST_MSGSTR:
+                    entries.append(entry)
+                    entry = _new_entry(line_number)
+                elif state == _ST_MSGCTXT or state == _ST_MSGID:
+                    raise UnsupportedSyntaxError(line_number, line)
+
+                if marker == '#.':
+                    entry.comment = entry.comment + '\n' + line[3:] if entry.comment else line[3:]
+                elif marker == '#,':
+                    entry.flags += [flag.strip() for flag in line[3:].split(',')]
+                elif marker == '#|':
+                    keyword, _, value = tokens[1].partition(' ') if len(tokens) > 1 else ('', '', '')
+                    if keyword != 'msgid' or not value:
+                        raise UnsupportedSyntaxError(line_number, line)
+                    entry.previous_msgid = _unescape(value.lstrip()[1:-1])
+                elif state == _ST_START and with_header:
+                    # Translator comments before the first entry are the header of the file.
+                    if header:
+                        header += '\n'
+                    header += line[2:]
+                    continue
+                else:
+                    text = line.lstrip('#')
+                    if text.startswith(' '):
+                        text = text[1:]
+                    entry.tcomment = entry.tcomment + '\n' + text if entry.tcomment else text
+
+                state = _ST_COMMENT
+                continue
+            else:
+                # Occurrences, obsolete previous msgid ('#~|') and anything else
+                raise UnsupportedSyntaxError(line_number, line)
+
+        last_line_is_comment = False
+        keyword, _, value = line.partition(' ')
+        value = value.lstrip()
+
+        if keyword == 'msgctxt' and value:
+            if state == _ST_MSGSTR:
+                entries.append(entry)
+                entry = _new_entry(line_number)
+            elif state == _ST_MSGCTXT or state == _ST_MSGID:
+                raise UnsupportedSyntaxError(line_number, line)
+            entry.msgctxt = _parse_string(value, line_number, line)
+            state = _ST_MSGCTXT
+
+        elif keyword == 'msgid' and value:
+            if state == _ST_MSGSTR:
+                entries.append(entry)
+                entry = _new_entry(line_number)
+            elif state == _ST_MSGID:
+                raise UnsupportedSyntaxError(line_number, line)
+            entry.obsolete = 1 if line_is_obsolete else 0
+            entry.msgid = _parse_string(value, line_number, line)
+            state = _ST_MSGID
+
+        elif keyword == 'msgstr' and value:
+            if state != _ST_MSGID:
+                raise UnsupportedSyntaxError(line_number, line)
+            entry.msgstr = _parse_string(value, line_number, line)
+            state = _ST_MSGSTR
+
+        elif line[0] == '"' and state == _ST_MSGSTR and entry.msgid == '' and not line_is_obsolete:
+            # Only the header msgstr is continued over several lines.
+            entry.msgstr += _parse_string(line, line_number, line)
+
+        else:
+            # msgid_plural, msgstr[n], continuation lines of other strings, and syntax errors.
+            raise UnsupportedSyntaxError(line_number, line)
+
+    if state != _ST_START and not last_line_is_comment:
+        # Like polib, trailing comments without an entry are ignored.
+        entries.append(entry)
+
+    return entries, header
+
+
+def _new_entry(linenum: int) -> polib.POEntry:
+    """
+    Same as polib.POEntry(linenum=linenum), without the overhead of its keyword argument handling.
+    """
+    entry = polib.POEntry.__new__(polib.POEntry)
+    entry.__dict__ = {
+        'msgid': '', 'msgstr': '', 'msgid_plural': '', 'msgstr_plural': {}, 'msgctxt': None, 'obsolete': False,
+        'encoding': polib.default_encoding, 'comment': '', 'tcomment': '', 'occurrences': [], 'flags': [],
+        'previous_msgctxt': None, 'previous_msgid': None, 'previous_msgid_plural': None, 'linenum': linenum,
+    }
+    return entry
+
+
+def _parse_string(value: str, line_number: int, line: str) -> str:
+    if len(value) < 2 or value[0] != '"' or value[-1] != '"':
+        raise UnsupportedSyntaxError(line_number, line)
+
+    text = value[1:-1]
+    if '\\' not in text and '"' not in text:
+        return text
+
+    if _UNESCAPED_QUOTE_PATTERN.search(text):
+        # polib reports this as a syntax error.
+        raise UnsupportedSyntaxError(line_number, line)
+    return _unescape(text)
+
+
+def _unescape(text: str) -> str:
+    if '\\' not in text:
+        return text
+    return polib.unescape(text)
+
+
+def _extract_metadata(entries: list) -> tuple:
+    """
+    Removes the header entry (msgid "") from entries and returns its content as polib does.
+    """
+    metadata_entries = [index for index, entry in enumerate(entries) if entry.msgid == '' and not entry.obsolete]
+    if not metadata_entries:
+        return {}, 0
+    if len(metadata_entries) > 1:
+        raise UnsupportedSyntaxError(entries[metadata_entries[1]].linenum, 'msgid ""')
+
+    metadata_entry = entries.pop(metadata_entries[0])
+    metadata = {}
+    key = None
+    for msg in metadata_entry.msgstr.splitlines():
+        try:
+            key, val = msg.split(':', 1)
+            metadata[key] = val.strip()
+        except (ValueError, KeyError):
+            if key is not None:
+                metadata[key] += '\n' + msg.strip()
+
+    return metadata, metadata_entry.flags
+
+
+def _detect_encoding(content: str) -> str:
+    match = _CHARSET_PATTERN.search(content)
+    if not match:
+        return polib.default_encoding
+
+    encoding = match.group(1).strip()
+    try:
+        codec_name = codecs.lookup(encoding).name
+    except LookupError:
+        return polib.default_encoding
+
+    if codec_name != 'utf-8':
+        raise UnsupportedSyntaxError(0, f'charset={encoding}')
+    return encoding
+
+
+def _is_file(pofile: str) -> bool:
+    try:
+        return os.path.exists(pofile)
+    except (ValueError, UnicodeEncodeError):
+        return False
@@ -0,0 +1,124 @@
+"""
+A fast writer for the narrow PO dialect used by SmartGit.
+
+Entries are written to the file one at a time, instead of building the whole document as one string.
+The output is the same as polib.POFile.__unicode__().
+
+SmartGit PO files are never wrapped (wrapwidth 9999), so most entries fit on single lines and are written directly.
+Entries that need anything else, such as wrapping, multi-line strings or occurrences, are written by polib.
+"""
+from typing import Iterable
+
+import polib
+
+# The longest field name polib takes into account when wrapping ('previous_msgid' + ' ""')
+_MAX_FIELD_NAME_LENGTH = len('previous_msgid') + 3
+
+
+def write(po: polib.POFile, file) -> None:
+    """
+    Writes po to file, a text file object.
+    """
+    write_entries(file, po.metadata_as_entry(), po, po.wrapwidth, po.header)
+
+
+def write_entries(file, metadata_entry: polib.POEntry, entries: Iterable[polib.POEntry], wrapwidth: int,
+                  header: str = '') -> int:
+    """
+    Writes the entries to file as they are produced by the iterable, so that they do not have to be kept in memory.
+    Obsolete entries are written at the end, like polib does, so only they are kept until then.
+    Returns the number of written entries.
+    """
+    file.write(_header_to_text(header))
+    file.write(metadata_entry.__unicode__(wrapwidth))
+
+    count = 0
+    obsolete_entries = []
+    for entry in entries:
+        count += 1
+        if entry.obsolete:
+            obsolete_entries.append(entry)
+        else:
+            file.write('\n')
+            file.write(_entry_to_text(entry, wrapwidth))
+
+    for entry in obsolete_entries:
+        file.write('\n')
+        file.write(_entry_to_text(entry, wrapwidth))
+
+    return count
+
+
+def _header_to_text(header: str) -> str:
+    """
+    Same as the header part of polib.POFile.__unicode__()
+    """
+    ret = ''
+    for line in header.split('\n'):
+        if not len(line):
+            ret += '#\n'
+        elif line[:1] in [',', ':']:
+            ret += '#%s\n' % line
+        else:
+            ret += '# %s\n' % line
+    return ret
+
+
+def _entry_to_text(entry: polib.POEntry, wrapwidth: int) -> str:
+    """
+    Same as entry.__unicode__(wrapwidth)
+    """
+    if (entry.occurrences or entry.msgid_plural or entry.msgstr_plural
+            or entry.previous_msgctxt is not None or entry.previous_msgid_plural is not None):
+        return entry.__unicode__(wrapwidth)
+
+    max_length = wrapwidth - _MAX_FIELD_NAME_LENGTH
+    if wrapwidth <= 0 or not (_is_single_line(entry.msgctxt, max_length)
+                              and _is_single_line(entry.msgid, max_length)
+                              and _is_single_line(entry.msgstr, max_length)
+                              and _is_single_line(entry.previous_msgid, max_length)):
+        return entry.__unicode__(wrapwidth)
+
+    lines = []
+    if entry.obsolete:
+        delflag = '#~ '
+        comments = [(entry.tcomment, '# ')]
+    else:
+        delflag = ''
+        comments = [(entry.tcomment, '# '), (entry.comment, '#. ')]
+
+    for comment, prefix in comments:
+        if comment:
+            for comment_line in comment.split('\n'):
+                if len(comment_line) + len(prefix) > wrapwidth:
+                    # polib wraps long comments.
+                    return entry.__unicode__(wrapwidth)
+                lines.append(prefix + comment_line)
+
+    if entry.flags:
+        lines.append('#, ' + ', '.join(entry.flags))
+
+    if entry.previous_msgid is not None:
+        lines.append(('#~| msgid "' if entry.obsolete else '#| msgid "') + _escape(entry.previous_msgid) + '"')
+
+    if entry.msgctxt is not None:
+        lines.append(delflag + 'msgctxt "' + _escape(entry.msgctxt) + '"')
+    lines.append(delflag + 'msgid "' + _escape(entry.msgid) + '"')
+    lines.append(delflag + 'msgstr "' + _escape(entry.msgstr) + '"')
+    lines.append('')
+
+    return '\n'.join(lines)
+
+
+def _is_single_line(text: str, max_length: int) -> bool:
+    """
+    Returns True if polib writes the text on a single line without wrapping.
+    Texts with control characters are left to polib.
+    """
+    return text is None or (len(text) <= max_length and text.isprintable())
+
+
+def _escape(text: str) -> str:
+    if '\\' in text or '"' in text:
+        return polib.escape(text)
+    return text
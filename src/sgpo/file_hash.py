@@ -0,0 +1,35 @@
+"""
+SHA-256 of files, as hex strings, for the checkpoints of sgpo.tail_import, the snapshots of sgpo.pot_delta and
+the unchanged file check of SgPo.save().
+Files are read in chunks, so that large files are not read into memory at once.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+
+READ_SIZE = 1024 * 1024
+
+
+def hash_file(file: str) -> str | None:
+    """
+    Returns the sha256 of the file, or None if it does not exist.
+    """
+    if not os.path.exists(file):
+        return None
+    hash_object = hashlib.sha256()
+    with open(file, 'rb') as f:
+        update_hash(hash_object, f, os.fstat(f.fileno()).st_size)
+    return hash_object.hexdigest()
+
+
+def update_hash(hash_object, file, size: int) -> None:
+    """
+    Adds the next size bytes of the binary file object to hash_object, or the rest of the file if it is shorter.
+    """
+    while size > 0:
+        chunk = file.read(min(size, READ_SIZE))
+        if not chunk:
+            break
+        hash_object.update(chunk)
+        size -= len(chunk)
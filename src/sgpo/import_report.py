@@ -0,0 +1,132 @@
+"""
+Results of SgPo.import_unknown(), import_mismatch() and import_pot().
+
+The import methods do not print anything. They collect the keys they touch in an ImportReport,
+which can be rendered as text with render_text() or as JSON with render_json().
+
+Verbosity levels of render_text():
+  VERBOSITY_QUIET: nothing
+  VERBOSITY_SUMMARY: the number of added, skipped, modified and obsoleted entries
+  VERBOSITY_ENTRIES: the summary and every touched entry
+"""
+import argparse
+import json
+from collections import namedtuple
+
+REPORT_FORMAT_VERSION = 1
+
+VERBOSITY_QUIET = 0
+VERBOSITY_SUMMARY = 1
+VERBOSITY_ENTRIES = 2
+
+# Reasons of skipped entries
+REASON_EXISTS = 'exists'
+REASON_MSGID_CHANGED = 'msgid_changed'
+
+ReportEntry = namedtuple('ReportEntry', ['msgctxt', 'msgid', 'previous_msgid', 'reason'], defaults=[None, None])
+ReportEntry.__doc__ = """
+previous_msgid: The msgid before the import, for modified entries. For skipped entries, the msgid of the existing entry.
+reason: For skipped entries, REASON_EXISTS or REASON_MSGID_CHANGED. For errors, the error message.
+"""
+
+_SUMMARY_LABELS = [('added', 'new entry'),
+                   ('skipped', 'skipped entry'),
+                   ('modified', 'modified entry'),
+                   ('obsoleted', 'obsolete entry'),
+                   ('errors', 'error')]
+
+
+class ImportReport(namedtuple('ImportReport', ['operation', 'target', 'source',
+                                               'added', 'skipped', 'modified', 'obsoleted', 'errors'])):
+    """
+    operation: 'import_unknown', 'import_mismatch' or 'import_pot'
+    target, source: The files of the imported-into and the imported catalogs, or None if they were not loaded from files.
+    added, skipped, modified, obsoleted, errors: Lists of ReportEntry
+    """
+    __slots__ = ()
+
+    @classmethod
+    def create(cls, operation: str, target: str = None, source: str = None) -> 'ImportReport':
+        return cls(operation=operation, target=target, source=source,
+                   added=[], skipped=[], modified=[], obsoleted=[], errors=[])
+
+    @property
+    def counts(self) -> dict:
+        return {field: len(getattr(self, field)) for field, _ in _SUMMARY_LABELS}
+
+    @property
+    def changed(self) -> bool:
+        """
+        True if the import has changed the catalog.
+        """
+        return bool(self.added or self.modified or self.obsoleted)
+
+    def to_dict(self) -> dict:
+        return {
+            'operation': self.operation,
+            'target': self.target,
+            'source': self.source,
+            'counts': self.counts,
+            **{field: [entry._asdict() for entry in getattr(self, field)] for field, _ in _SUMMARY_LABELS},
+        }
+
+
+def render_text(report: ImportReport, verbosity: int = VERBOSITY_SUMMARY) -> str:
+    if verbosity <= VERBOSITY_QUIET:
+        return ''
+
+    lines = []
+    if verbosity >= VERBOSITY_ENTRIES:
+        for field, label in _SUMMARY_LABELS:
+            entries = getattr(report, field)
+            if entries:
+                lines.append(f'\n{label}: {len(entries)}')
+                lines.extend(_render_entry(entry) for entry in entries)
+        lines.append('')
+
+    for field, label in _SUMMARY_LABELS:
+        lines.append(f'{label:>14}:\t{len(getattr(report, field))}')
+
+    return '\n'.join(lines) + '\n'
+
+
+def render_json(reports: list) -> str:
+    """
+    Renders a list of ImportReport, for example for a CI job.
+    """
+    return json.dumps({'format_version': REPORT_FORMAT_VERSION,
+                       'reports': [report.to_dict() for report in reports]},
+                      indent=2, ensure_ascii=False) + '\n'
+
+
+def print_report(report: ImportReport, verbosity: int = VERBOSITY_SUMMARY) -> None:
+    print(render_text(report, verbosity), end='')
+
+
+def write_json_report(reports: list, output_file: str) -> None:
+    with open(output_file, 'w', encoding='utf-8', newline='\n') as file:
+        file.write(render_json(reports))
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Adds the verbosity and --report-json options to the argument parser of a script.
+    The verbosity is stored in args.verbosity.
+    """
+    group = parser.add_argument_group('report')
+    group.add_argument('-v', '--verbose', dest='verbosity', action='store_const', const=VERBOSITY_ENTRIES,
+                       default=VERBOSITY_SUMMARY, help='print every imported entry')
+    group.add_argument('-q', '--quiet', dest='verbosity', action='store_const', const=VERBOSITY_QUIET,
+                       help='do not print the import results')
+    group.add_argument('--report-json', metavar='FILE', help='write the import results as JSON')
+
+
+def _render_entry(entry: ReportEntry) -> str:
+    lines = []
+    if entry.previous_msgid is not None:
+        lines.append(f'\t#| msgid "{entry.previous_msgid}"')
+    lines.append(f'\tmsgctxt "{entry.msgctxt}"')
+    lines.append(f'\tmsgid "{entry.msgid}"')
+    if entry.reason is not None:
+        lines.append(f'\t({entry.reason})')
+    return '\n'.join(lines)
@@ -0,0 +1,142 @@
+"""
+Resolves the concrete keys that SmartGit looks up at runtime to the entries of a catalog.
+
+Some msgctxt are patterns rather than literal keys:
+  - alternation: 'wnd(Log|Project|Std|).mni:' matches 'wndLog.mni:', 'wndProject.mni:', 'wndStd.mni:' and 'wnd.mni:'
+  - wildcard: '*.btn:' matches any msgctxt that ends with '.btn:' after at least one character
+
+    resolver = KeyResolver(pot)
+    resolution = resolver.resolve('wndLog.mni:', 'Open')
+    resolutions = resolver.resolve_all((entry.msgctxt, entry.msgid) for entry in unknown)
+
+As for find_by_key(), the msgid is part of the key only if the msgctxt ends with ':'.
+
+Precedence, from the highest:
+  1. MATCH_EXACT: an entry whose msgctxt is the key itself, including the msgctxt of a pattern.
+  2. MATCH_ALTERNATION: an entry whose alternations expand to the key.
+     If several entries expand to the same key, the first one in the catalog is used.
+  3. MATCH_WILDCARD: an entry whose '*' pattern matches the key. The longest suffix wins,
+     so '*.mniOpen:' is preferred to '*.mni:'. Among the same suffix, the first entry is used.
+
+The alternations are expanded into a hash map when the resolver is built, and the wildcard patterns are indexed
+by suffix, so a key is resolved with a few hash lookups, one per distinct wildcard suffix length at most.
+Only a leading '*' is a wildcard, and a group without '|' is literal. Obsolete entries are ignored.
+The resolver does not follow later changes of the catalog. Build a new one after changing it.
+"""
+import itertools
+from collections import namedtuple
+from typing import Iterable
+
+import polib
+
+from phase_profiler import timed, argument_length, result_length
+from .sgpo import SgPo, Key_tuple, MULTI_KEYS_PATTERN
+
+MATCH_EXACT = 'exact'
+MATCH_ALTERNATION = 'alternation'
+MATCH_WILDCARD = 'wildcard'
+
+WILDCARD = '*'
+
+Resolution = namedtuple('Resolution', ['msgctxt', 'msgid', 'entry', 'match'])
+Resolution.__doc__ = """
+msgctxt, msgid: The resolved key.
+entry: The entry that translates the key, or None if there is none.
+match: MATCH_EXACT, MATCH_ALTERNATION or MATCH_WILDCARD, or None if there is no entry.
+"""
+
+
+class KeyResolver:
+    @timed('resolver.build', count=argument_length(1))
+    def __init__(self, po: SgPo):
+        # Key_tuple -> entry, for literal msgctxt
+        self._exact = {}
+        # Key_tuple -> entry, for every expansion of the alternations
+        self._alternations = {}
+        # Key_tuple of the suffix after '*' -> entry
+        self._wildcards = {}
+        # Distinct lengths of the wildcard suffixes, the longest first
+        self._wildcard_suffix_lengths = []
+
+        for entry in po:
+            if entry.obsolete or entry.msgctxt is None:
+                continue
+            key = SgPo._po_entry_to_key_tuple(entry)
+            # The msgctxt of a pattern matches itself too, so that every entry resolves its own key.
+            self._exact.setdefault(key, entry)
+
+            patterns = expand_alternations(entry.msgctxt)
+            if patterns is None and entry.msgctxt.startswith(WILDCARD):
+                patterns = [entry.msgctxt]
+            for pattern in patterns or []:
+                self._add_pattern(pattern, key.msgid, entry)
+
+        self._wildcard_suffix_lengths = sorted({len(key.msgctxt) for key in self._wildcards}, reverse=True)
+
+    def resolve(self, msgctxt: str, msgid: str = None) -> Resolution:
+        key = SgPo._to_key_tuple(msgctxt, msgid)
+
+        entry = self._exact.get(key)
+        if entry is not None:
+            return Resolution(msgctxt, msgid, entry, MATCH_EXACT)
+
+        entry = self._alternations.get(key)
+        if entry is not None:
+            return Resolution(msgctxt, msgid, entry, MATCH_ALTERNATION)
+
+        if not msgctxt:
+            # An entry without msgctxt is valid in a po file, but no wildcard matches it.
+            return Resolution(msgctxt, msgid, None, None)
+
+        for suffix_length in self._wildcard_suffix_lengths:
+            # The wildcard matches at least one character.
+            if suffix_length >= len(msgctxt):
+                continue
+            entry = self._wildcards.get(Key_tuple(msgctxt[len(msgctxt) - suffix_length:], key.msgid))
+            if entry is not None:
+                return Resolution(msgctxt, msgid, entry, MATCH_WILDCARD)
+
+        return Resolution(msgctxt, msgid, None, None)
+
+    @timed('resolver.resolve_all', count=result_length)
+    def resolve_all(self, keys: Iterable[tuple]) -> list:
+        """
+        Resolves many (msgctxt, msgid) pairs, for example all the keys collected in an unknown file.
+        Returns a Resolution for each key, in the same order.
+        """
+        resolve = self.resolve
+        return [resolve(msgctxt, msgid) for msgctxt, msgid in keys]
+
+    def resolve_entry(self, entry: polib.POEntry) -> Resolution:
+        return self.resolve(entry.msgctxt, entry.msgid)
+
+    def _add_pattern(self, msgctxt: str, msgid: str, entry: polib.POEntry) -> None:
+        """
+        Adds a msgctxt expanded from a pattern. It is a wildcard pattern if it starts with '*',
+        whether it had alternations or not.
+        """
+        if msgctxt.startswith(WILDCARD):
+            self._wildcards.setdefault(Key_tuple(msgctxt[len(WILDCARD):], msgid), entry)
+        else:
+            self._alternations.setdefault(Key_tuple(msgctxt, msgid), entry)
+
+
+def expand_alternations(msgctxt: str) -> list:
+    """
+    'wnd(Log|Project).mni:' -> ['wndLog.mni:', 'wndProject.mni:']
+    Returns None if msgctxt has no alternation.
+    """
+    parts = MULTI_KEYS_PATTERN.split(msgctxt)
+    # split() returns the literal parts at even indexes and the contents of the groups at odd indexes.
+    if not any('|' in group for group in parts[1::2]):
+        return None
+
+    choices = [[part] if index % 2 == 0 else _split_group(part) for index, part in enumerate(parts)]
+    return [''.join(combination) for combination in itertools.product(*choices)]
+
+
+def _split_group(group: str) -> list:
+    if '|' not in group:
+        # Parentheses without alternatives are literal.
+        return [f'({group})']
+    return group.split('|')
@@ -0,0 +1,225 @@
+"""
+Lazy, read-only access to PO files written by SgPo.save().
+
+lazy_pofile() memory-maps the file and scans the raw bytes once for the msgctxt/msgid lines of the entries.
+Only the byte offsets and keys of the entries are kept. An entry is decoded into a polib.POEntry when it is read,
+so the time and memory needed to look up a few keys don't depend on the size of the file.
+
+Like sgpo.fast_po_parser, only the SmartGit PO dialect is supported: entries are separated by blank lines and
+msgctxt/msgid/msgstr fit on single lines. Anything else raises UnsupportedSyntaxError; use sgpo.pofile() instead.
+"""
+from __future__ import annotations
+
+import mmap
+import re
+from array import array
+
+import polib
+
+from . import fast_po_parser
+from .fast_po_parser import UnsupportedSyntaxError
+from .sgpo import SgPo, PARSER_FAST, pofile
+
+# The msgctxt line (if any) and the msgid line of an entry, obsolete or not
+_KEY_LINES_PATTERN = re.compile(rb'^(#~ )?(?:msgctxt "(.*)"\n(?:#~ )?)?msgid "(.*)"$', re.MULTILINE)
+_ENTRY_SEPARATOR = b'\n\n'
+
+
+def lazy_pofile(filename: str) -> LazySgPo:
+    SgPo._validate_filename(filename)
+    return LazySgPo(filename)
+
+
+class LazySgPo:
+    """
+    Has the read methods of SgPo. Entries are decoded on first access and kept for later reads.
+    Call close() or use it in a with statement to release the mapping of the file.
+    """
+    wrapwidth = 9999
+
+    # Same implementations as polib.POFile
+    percent_translated = polib.POFile.percent_translated
+    translated_entries = polib.POFile.translated_entries
+    untranslated_entries = polib.POFile.untranslated_entries
+    fuzzy_entries = polib.POFile.fuzzy_entries
+    obsolete_entries = polib.POFile.obsolete_entries
+    ordered_metadata = polib.POFile.ordered_metadata
+
+    def __init__(self, filename: str) -> None:
+        self.fpath = filename
+        self.header = ''
+        self.metadata = {}
+        self.metadata_is_fuzzy = 0
+        self.encoding = polib.default_encoding
+
+        self._offsets = array('q')
+        self._keys = []
+        self._key_index = {}
+        self._entries = {}
+
+        with open(filename, 'rb') as file:
+            if file.seek(0, 2) == 0:
+                self._mmap = None
+                return
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            self._scan()
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self) -> LazySgPo:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._get_entry(i) for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('entry index out of range')
+        return self._get_entry(index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self._get_entry(index)
+
+    def find_by_key(self, msgctxt: str, msgid: str) -> polib.POEntry:
+        index = self._key_index.get(self._to_raw_key(msgctxt, msgid))
+        return None if index is None else self._get_entry(index)
+
+    def contains_key(self, msgctxt: str, msgid: str) -> bool:
+        """
+        Same as find_by_key() is not None, without decoding the entry.
+        """
+        return self._to_raw_key(msgctxt, msgid) in self._key_index
+
+    def get_key_list(self) -> list:
+        return [SgPo._to_key_tuple(self._decode_string(msgctxt), self._decode_string(msgid))
+                for msgctxt, msgid in self._keys]
+
+    def to_sgpo(self) -> SgPo:
+        """
+        Loads the whole file as a SgPo, for example to modify it.
+        """
+        return pofile(self.fpath, parser=PARSER_FAST)
+
+    # ======= Private methods =======
+    def _scan(self) -> None:
+        """
+        Builds the offsets and keys of the entries in one pass over the bytes of the file.
+        An entry starts at the blank line that follows the msgid of the previous entry,
+        so comments in between belong to the next entry, like polib does.
+        """
+        data = self._mmap
+        if data.find(b'\r\n') >= 0:
+            raise UnsupportedSyntaxError(0, 'CRLF line endings')
+
+        has_metadata = False
+        previous_end = None
+        for match in _KEY_LINES_PATTERN.finditer(data):
+            obsolete, msgctxt, msgid = match.groups()
+
+            if previous_end is None:
+                start = 0
+            else:
+                start = data.find(_ENTRY_SEPARATOR, previous_end, match.start())
+                if start < 0:
+                    raise UnsupportedSyntaxError(self._get_line_number(match.start()),
+                                                 'Entries are not separated by a blank line')
+            previous_end = match.end()
+
+            if msgid == b'' and not obsolete:
+                if start != 0 or msgctxt is not None:
+                    raise UnsupportedSyntaxError(self._get_line_number(match.start()),
+                                                 'msgid "" is only supported for the header')
+                has_metadata = True
+
+            self._offsets.append(start)
+            if msgctxt is None or not msgctxt.endswith(b':'):
+                msgid = None
+            self._keys.append((self._normalize_string(msgctxt), self._normalize_string(msgid)))
+
+        if not self._offsets:
+            return
+
+        # The first entry also contains the header of the file.
+        first_entry_text = self._read_entry_text(0)
+        result = fast_po_parser.parse(first_entry_text)
+        self.header = result.header
+        self.metadata = result.metadata
+        self.metadata_is_fuzzy = result.metadata_is_fuzzy
+        self.encoding = result.encoding
+        if has_metadata:
+            del self._offsets[0]
+            del self._keys[0]
+        else:
+            self._entries[0] = self._to_lazy_entry(result.entries[0])
+
+        for index, key in enumerate(self._keys):
+            if key[0] is not None:
+                self._key_index.setdefault(key, index)
+
+    def _get_entry(self, index: int) -> polib.POEntry:
+        entry = self._entries.get(index)
+        if entry is None:
+            entry = self._to_lazy_entry(fast_po_parser.parse_entry(self._read_entry_text(index)))
+            self._entries[index] = entry
+        return entry
+
+    def _read_entry_text(self, index: int) -> str:
+        if self._mmap is None:
+            raise ValueError('The file has been closed')
+
+        start = self._offsets[index]
+        end = self._offsets[index + 1] if index + 1 < len(self._offsets) else len(self._mmap)
+        return self._mmap[start:end].decode('utf-8')
+
+    def _get_line_number(self, offset: int) -> int:
+        return self._mmap[:offset].count(b'\n') + 1
+
+    @staticmethod
+    def _to_lazy_entry(entry: polib.POEntry) -> polib.POEntry:
+        # Line numbers are not counted by the scan.
+        entry.linenum = None
+        return entry
+
+    @staticmethod
+    def _to_raw_key(msgctxt: str, msgid: str) -> tuple:
+        """
+        Keys are kept as the escaped UTF-8 bytes of the file, and only decoded by get_key_list().
+        """
+        key = SgPo._to_key_tuple(msgctxt, msgid)
+        return LazySgPo._encode_string(key.msgctxt), LazySgPo._encode_string(key.msgid)
+
+    @staticmethod
+    def _normalize_string(value: bytes) -> bytes | None:
+        # The same string can be escaped in different ways.
+        if value is not None and b'\\' in value:
+            return LazySgPo._encode_string(LazySgPo._decode_string(value))
+        return value
+
+    @staticmethod
+    def _encode_string(value: str) -> bytes | None:
+        if value is None:
+            return None
+        return polib.escape(value).encode('utf-8')
+
+    @staticmethod
+    def _decode_string(value: bytes) -> str | None:
+        if value is None:
+            return None
+        return fast_po_parser._unescape(value.decode('utf-8'))
@@ -0,0 +1,174 @@
+"""
+A persistent cache of parsed PO files.
+
+sgpo.pofile() can keep the parsed catalog of each file in a cache directory, so that scripts that run
+again on unchanged files don't have to parse them from text.
+
+A cache file is used only if all of the following match:
+  - the absolute path of the PO file and the parser
+  - the size, the mtime and the SHA-256 hash of the PO file
+  - the cache format version, the polib version, the Python version and the source of the sgpo package
+
+The cache is disabled unless a cache directory is given, either with the cache_dir argument of
+sgpo.pofile() or with the SGPO_CACHE_DIR environment variable. Setting SGPO_NO_CACHE to a non-empty
+value turns the cache off, even if SGPO_CACHE_DIR is set.
+
+The cache files are pickles. Only use a cache directory that is writable by you alone.
+"""
+from __future__ import annotations
+
+import functools
+import glob
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+from collections import namedtuple
+
+import polib
+
+from phase_profiler import timed
+
+CACHE_FORMAT_VERSION = 1
+
+CACHE_DIR_ENV = 'SGPO_CACHE_DIR'
+NO_CACHE_ENV = 'SGPO_NO_CACHE'
+
+CACHE_FILE_EXTENSION = '.sgpo-cache'
+
+CacheKey = namedtuple('CacheKey', ['format_version', 'library_version', 'path', 'parser',
+                                   'size', 'mtime_ns', 'content_hash'])
+
+
+def get_cache_dir(cache_dir: str = None) -> str | None:
+    """
+    Returns the cache directory to use, or None if the cache is disabled.
+    """
+    if os.environ.get(NO_CACHE_ENV):
+        return None
+    if cache_dir:
+        return cache_dir
+    return os.environ.get(CACHE_DIR_ENV) or None
+
+
+def make_key(filename: str, parser: str) -> CacheKey:
+    """
+    Reads the file to compute its hash. The file is stat'ed before it is read,
+    so a file that changes in between never matches the key.
+    """
+    stat = os.stat(filename)
+    with open(filename, 'rb') as file:
+        content_hash = hashlib.sha256(file.read()).hexdigest()
+
+    return CacheKey(format_version=CACHE_FORMAT_VERSION,
+                    library_version=_get_library_version(),
+                    path=os.path.abspath(filename),
+                    parser=parser,
+                    size=stat.st_size,
+                    mtime_ns=stat.st_mtime_ns,
+                    content_hash=content_hash)
+
+
+def read(cache_dir: str, key: CacheKey) -> tuple | None:
+    """
+    Returns (state, entries) as written by write(), or None if there is no valid cache for the key.
+    """
+    try:
+        with open(_get_cache_path(cache_dir, key), 'rb') as file:
+            if pickle.load(file) != key:
+                return None
+            state, rows = pickle.load(file)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # A broken or incompatible cache file is just a cache miss. It is overwritten by the next write().
+        return None
+
+    return state, [_row_to_entry(row) for row in rows]
+
+
+def write(cache_dir: str, key: CacheKey, state: dict, entries: list) -> bool:
+    """
+    Writes the cache for the key. The cache is not written if the file has been changed since make_key().
+    Returns True if the cache has been written. Errors are ignored, the cache is only an optimization.
+    """
+    try:
+        stat = os.stat(key.path)
+        if stat.st_size != key.size or stat.st_mtime_ns != key.mtime_ns:
+            return False
+
+        os.makedirs(cache_dir, exist_ok=True)
+        cache_path = _get_cache_path(cache_dir, key)
+        fd, temp_path = tempfile.mkstemp(dir=cache_dir, prefix='.tmp-', suffix=CACHE_FILE_EXTENSION)
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                pickle.dump(key, file, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump((state, _entries_to_rows(entries)), file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, cache_path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+    except OSError:
+        return False
+
+    return True
+
+
+@timed('cache.clear', count=lambda result, *args, **kwargs: result)
+def clear(cache_dir: str = None) -> int:
+    """
+    Removes all cache files from the cache directory. Returns the number of removed files.
+    """
+    cache_dir = cache_dir or os.environ.get(CACHE_DIR_ENV)
+    if not cache_dir or not os.path.isdir(cache_dir):
+        return 0
+
+    count = 0
+    for cache_path in glob.glob(os.path.join(glob.escape(cache_dir), '*' + CACHE_FILE_EXTENSION)):
+        os.remove(cache_path)
+        count += 1
+    for temp_path in glob.glob(os.path.join(glob.escape(cache_dir), '.tmp-*' + CACHE_FILE_EXTENSION)):
+        os.remove(temp_path)
+
+    return count
+
+
+def _get_cache_path(cache_dir: str, key: CacheKey) -> str:
+    name = hashlib.sha256(f'{key.path}\0{key.parser}'.encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, name + CACHE_FILE_EXTENSION)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_library_version() -> str:
+    """
+    Changes whenever polib, Python or any module of the sgpo package changes.
+    """
+    source_hash = hashlib.sha256()
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    for module_path in sorted(glob.glob(os.path.join(glob.escape(package_dir), '*.py'))):
+        with open(module_path, 'rb') as file:
+            source_hash.update(file.read())
+
+    return f'polib-{polib.__version__}/python-{sys.version_info[0]}.{sys.version_info[1]}/{source_hash.hexdigest()}'
+
+
+def _entries_to_rows(entries: list) -> list:
+    """
+    Entries are stored as (attribute names, attribute values) rows, which unpickle much faster than POEntry objects.
+    The tuple of attribute names is shared by all entries, and stored only once in the pickle.
+    """
+    names_cache = {}
+    rows = []
+    for entry in entries:
+        names = tuple(entry.__dict__)
+        names = names_cache.setdefault(names, names)
+        rows.append((names, tuple(entry.__dict__.values())))
+    return rows
+
+
+def _row_to_entry(row: tuple) -> polib.POEntry:
+    names, values = row
+    entry = polib.POEntry.__new__(polib.POEntry)
+    entry.__dict__ = dict(zip(names, values))
+    return entry
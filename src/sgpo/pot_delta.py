@@ -0,0 +1,165 @@
+"""
+Differences between two versions of messages.pot, to update the locale po files without comparing all keys.
+
+    previous_pot = pot_delta.read_pot_at_revision(pot_file, 'HEAD')
+    delta = pot_delta.diff_pots(previous_pot, pot)
+    po.import_pot_delta(delta)
+
+A locale po file that was in sync with the previous pot gets the same result as po.import_pot(pot):
+the same added, obsolete and fuzzy entries with the same previous_msgid.
+
+The previous pot can also be taken from a snapshot, which import_pot.py writes after it has updated the locale
+po files. The snapshot records the hash of each po file, so that a po file changed by something else since then
+can be detected and updated with a full import_pot() instead.
+"""
+import json
+import os
+import shutil
+import subprocess
+from collections import namedtuple
+
+from .atomic_file import write_file_atomically, write_text_file_atomically
+from .file_hash import hash_file
+from .sgpo import SgPo, pofile, pofile_from_text
+
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_FILE_PREFIX = '.snapshot.'
+
+
+class PotDelta(namedtuple('PotDelta', ['source', 'added_entries', 'removed_keys', 'modified_entries'])):
+    """
+    source: The file of the current pot, or None.
+    added_entries: Entries of the current pot whose key is not in the previous pot.
+    removed_keys: Key_tuple of the previous pot that are not in the current pot.
+    modified_entries: Entries of the current pot identified by msgctxt only, whose msgid has changed.
+    """
+    __slots__ = ()
+
+    @property
+    def key_count(self) -> int:
+        return len(self.added_entries) + len(self.removed_keys) + len(self.modified_entries)
+
+
+Snapshot = namedtuple('Snapshot', ['pot', 'po_file_hashes'])
+Snapshot.__doc__ = """
+pot: SgPo of the pot when the snapshot was written.
+po_file_hashes: File name -> sha256 of each locale po file after it was updated with that pot.
+"""
+
+
+def diff_pots(previous_pot: SgPo, pot: SgPo) -> PotDelta:
+    """
+    Compares the two versions of the pot by key and msgid.
+    """
+    added_entries = []
+    modified_entries = []
+    keys = set()
+    for entry in pot:
+        key = SgPo._po_entry_to_key_tuple(entry)
+        if key in keys:
+            continue
+        keys.add(key)
+
+        previous_entry = previous_pot.find_by_key(key.msgctxt, key.msgid)
+        if previous_entry is None:
+            added_entries.append(entry)
+        elif key.msgid is None and previous_entry.msgid != entry.msgid:
+            modified_entries.append(entry)
+
+    removed_keys = []
+    for entry in previous_pot:
+        key = SgPo._po_entry_to_key_tuple(entry)
+        if key not in keys:
+            removed_keys.append(key)
+            keys.add(key)
+
+    return PotDelta(source=pot.fpath, added_entries=added_entries, removed_keys=removed_keys,
+                    modified_entries=modified_entries)
+
+
+def read_pot_at_revision(pot_file: str, revision: str) -> SgPo:
+    """
+    Reads the pot file as it was at a git revision, for example 'HEAD' or 'origin/master'.
+    Raises ValueError if git cannot read it.
+    """
+    directory, name = os.path.split(os.path.abspath(pot_file))
+    try:
+        result = subprocess.run(['git', 'show', f'{revision}:./{name}'], cwd=directory,
+                                capture_output=True, check=True)
+    except (OSError, subprocess.CalledProcessError) as e:
+        stderr = getattr(e, 'stderr', None)
+        message = stderr.decode('utf-8', 'replace').strip() if stderr else str(e)
+        raise ValueError(f'cannot read {name} at {revision}: {message}') from e
+
+    pot = pofile_from_text(result.stdout.decode('utf-8'))
+    pot.fpath = f'{revision}:{name}'
+    return pot
+
+
+def get_snapshot_file(pot_file: str) -> str:
+    """
+    po/messages.pot -> po/.snapshot.messages.pot
+    The hashes of the po files are in po/.snapshot.messages.pot.json.
+    """
+    directory, name = os.path.split(pot_file)
+    return os.path.join(directory, f'{SNAPSHOT_FILE_PREFIX}{name}')
+
+
+def read_snapshot(pot_file: str, snapshot_file: str = None) -> Snapshot:
+    """
+    Returns None if there is no usable snapshot.
+    """
+    snapshot_file = snapshot_file or get_snapshot_file(pot_file)
+    try:
+        with open(f'{snapshot_file}.json', 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        if data.get('format_version') != SNAPSHOT_FORMAT_VERSION or data['pot_hash'] != hash_file(snapshot_file):
+            return None
+        po_file_hashes = dict(data['po_file_hashes'])
+        pot = pofile(snapshot_file)
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+    return Snapshot(pot=pot, po_file_hashes=po_file_hashes)
+
+
+def write_snapshot(pot_file: str, po_files: list, snapshot_file: str = None) -> None:
+    """
+    Copies the pot file and records the hashes of the po files. Call it after the po files have been updated.
+    """
+    snapshot_file = snapshot_file or get_snapshot_file(pot_file)
+    def copy_pot(file) -> None:
+        with open(pot_file, 'rb') as pot:
+            shutil.copyfileobj(pot, file)
+
+    write_file_atomically(snapshot_file, copy_pot)
+
+    data = {'format_version': SNAPSHOT_FORMAT_VERSION,
+            'pot_hash': hash_file(snapshot_file),
+            'po_file_hashes': {os.path.basename(po_file): hash_file(po_file) for po_file in sorted(po_files)}}
+
+    def write_json(file) -> None:
+        json.dump(data, file, indent=2)
+        file.write('\n')
+
+    write_text_file_atomically(f'{snapshot_file}.json', write_json)
+
+
+def delete_snapshot(pot_file: str, snapshot_file: str = None) -> bool:
+    snapshot_file = snapshot_file or get_snapshot_file(pot_file)
+    deleted = False
+    for file in (f'{snapshot_file}.json', snapshot_file):
+        try:
+            os.remove(file)
+            deleted = True
+        except FileNotFoundError:
+            pass
+    return deleted
+
+
+def is_in_snapshot(snapshot: Snapshot, po_file: str) -> bool:
+    """
+    True if the po file has not changed since the snapshot was written, so that a delta from the snapshot applies.
+    """
+    expected_hash = snapshot.po_file_hashes.get(os.path.basename(po_file))
+    return expected_hash is not None and expected_hash == hash_file(po_file)
@@ -1,20 +1,60 @@
 from __future__ import annotations
 
+import hashlib
+import io
 import os
 import re
 from collections import namedtuple
 
 import polib
 
+from phase_profiler import timed, result_length, argument_length
+from . import fast_po_parser, fast_po_writer, po_cache
+from .atomic_file import write_file_atomically, write_text_file_atomically
+from .compact_entry import CompactEntry
+from .file_hash import hash_file
+from .import_report import ImportReport, ReportEntry, REASON_EXISTS, REASON_MSGID_CHANGED
+
 Key_tuple = namedtuple('Key_tuple', ['msgctxt', 'msgid'])
+PotChanges = namedtuple('PotChanges', ['added_entries', 'obsolete_entries', 'modified_entries'])
+
+# Matches everything inside parentheses that are NOT escaped
+MULTI_KEYS_PATTERN = re.compile(r"(?<!\\\\)\(([^)]+)\)(?!\\\\)")
+
+
+PARSER_POLIB = 'polib'
+PARSER_FAST = 'fast'
+
+
+def _restore_sgpo(cls, state: dict, entries: list) -> SgPo:
+    instance = cls.__new__(cls)
+    instance._init_caches()
+    instance.__dict__.update(state)
+    list.extend(instance, entries)
+    return instance
+
+
+def pofile(filename: str, parser: str = PARSER_POLIB, cache_dir: str = None, compact: bool = False) -> SgPo:
+    """
+    parser: PARSER_POLIB (default) or PARSER_FAST.
+    PARSER_FAST reads the SmartGit PO dialect much faster, and falls back to polib for anything else.
 
+    cache_dir: Directory of the parsed-catalog cache (see sgpo.po_cache).
+    Defaults to the SGPO_CACHE_DIR environment variable. Without both, the file is always parsed.
 
-def pofile(filename: str) -> SgPo:
-    return SgPo._from_file(filename)
+    compact: Use CompactEntry for the entries to reduce memory use (see SgPo.compact_entries()).
+    """
+    po = SgPo._from_file(filename, parser, cache_dir)
+    if compact:
+        po.compact_entries()
+    return po
 
 
-def pofile_from_text(text: str) -> SgPo:
-    return SgPo._from_text(text)
+def pofile_from_text(text: str, parser: str = PARSER_POLIB, compact: bool = False) -> SgPo:
+    po = SgPo._from_text(text, parser)
+    if compact:
+        po.compact_entries()
+    return po
 
 
 class SgPo(polib.POFile):
@@ -37,138 +77,164 @@ class SgPo(polib.POFile):
         self.wrapwidth = 9999
         self.charset = 'utf-8'
         self.check_for_duplicates = True
+        self._init_caches()
 
     @classmethod
-    def _from_file(cls, filename: str):
+    @timed('sgpo.load', count=result_length)
+    def _from_file(cls, filename: str, parser: str = PARSER_POLIB, cache_dir: str = None):
         cls._validate_filename(filename)
-        return cls._create_instance(filename)
+
+        cache_dir = po_cache.get_cache_dir(cache_dir)
+        if cache_dir is None:
+            return cls._create_instance(filename, parser)
+
+        cache_key = po_cache.make_key(filename, parser)
+        cached = po_cache.read(cache_dir, cache_key)
+        if cached is not None:
+            state, entries = cached
+            instance = _restore_sgpo(cls, state, entries)
+            instance.fpath = filename
+            return instance
+
+        instance = cls._create_instance(filename, parser)
+        _, (_, state, entries) = instance.__reduce__()
+        po_cache.write(cache_dir, cache_key, state, entries)
+        return instance
 
     @classmethod
-    def _from_text(cls, text: str):
-        return cls._create_instance(text)
+    @timed('sgpo.load', count=result_length)
+    def _from_text(cls, text: str, parser: str = PARSER_POLIB):
+        return cls._create_instance(text, parser)
 
     @classmethod
-    def _create_instance(cls, filename) -> SgPo:
+    def _create_instance(cls, filename, parser: str = PARSER_POLIB) -> SgPo:
+        if parser == PARSER_FAST:
+            try:
+                return cls._create_instance_with_fast_parser(filename)
+            except fast_po_parser.UnsupportedSyntaxError:
+                pass
+        elif parser != PARSER_POLIB:
+            raise ValueError(f"Unknown parser: {parser}")
+
         instance = cls.__new__(cls)
-        po = polib.pofile(filename, wrapwidth=9999, chraset='utf-8', check_for_duplicates=True)
+        # Duplicates are checked below in one pass, polib would check them on every append.
+        po = polib.pofile(filename, wrapwidth=9999, chraset='utf-8', check_for_duplicates=False)
+        cls._check_duplicate_entries(po)
 
         instance.__dict__ = po.__dict__
-        for entry in po:
-            instance.append(entry)
+        instance.check_for_duplicates = True
+        instance._init_caches()
+        list.extend(instance, po)
 
         return instance
 
-    def import_unknown(self, unknown: SgPo) -> None:
-        success_count = 0
-        print('\nImport unknown entry...')
+    @classmethod
+    def _create_instance_with_fast_parser(cls, filename) -> SgPo:
+        result = fast_po_parser.parse(filename)
+        cls._check_duplicate_entries(result.entries)
+
+        instance = cls.__new__(cls)
+        polib.POFile.__init__(instance, pofile=filename, encoding=result.encoding, check_for_duplicates=True)
+        instance.wrapwidth = 9999
+        instance.header = result.header
+        instance.metadata = result.metadata
+        instance.metadata_is_fuzzy = result.metadata_is_fuzzy
+        instance._init_caches()
+        list.extend(instance, result.entries)
+
+        return instance
+
+    @timed('sgpo.import_unknown', count=argument_length(1))
+    def import_unknown(self, unknown: SgPo) -> ImportReport:
+        """
+        Adds the entries of the unknown file whose key does not exist yet.
+        Returns an ImportReport. Nothing is printed; see sgpo.import_report for the renderers.
+        """
+        report = ImportReport.create('import_unknown', self.fpath, unknown.fpath)
         for unknown_entry in unknown:
             # unknown_entry.flags = ['New']  # For debugging.
             my_entry = self.find_by_key(unknown_entry.msgctxt, unknown_entry.msgid)
 
             if my_entry is not None:
-                if my_entry.msgid == unknown_entry.msgid:
-                    print(f'\nAlready exists.(Skipped)')
-                    print(f'\t\tmsgctxt "{unknown_entry.msgctxt}"')
-                    print(f'\t\tmsgid "{unknown_entry.msgid}"')
-                else:
-                    print(f'\nAlready exists. but,msgid has been changed.(Skipped)')
-                    print(f'\t\t#| msgid "{my_entry.msgid}"')
-                    print(f'\t\tmsgctxt "{unknown_entry.msgctxt}"')
-                    print(f'\t\tmsgid "{unknown_entry.msgid}"')
+                reason = REASON_EXISTS if my_entry.msgid == unknown_entry.msgid else REASON_MSGID_CHANGED
+                report.skipped.append(ReportEntry(unknown_entry.msgctxt, unknown_entry.msgid, my_entry.msgid, reason))
             else:
                 try:
                     self.append(unknown_entry)
-                    print(f'\nNew entry added.')
-                    print(f'\t\tmsgctxt "{unknown_entry.msgctxt}')
-                    print(f'\t\tmsgid "{unknown_entry.msgid}')
-                    success_count += 1
-                except ValueError as e:
-                    print(e)
-                except IOError as e:
-                    print(e)
-
-        print(f'{success_count} entries added.')
-
-    def import_mismatch(self, mismatch: SgPo) -> None:
-        new_entry_count = 0
-        modified_entry_count = 0
-
-        print('\nImport unknown entry...')
+                    report.added.append(ReportEntry(unknown_entry.msgctxt, unknown_entry.msgid))
+                except (ValueError, IOError) as e:
+                    report.errors.append(ReportEntry(unknown_entry.msgctxt, unknown_entry.msgid, reason=str(e)))
+
+        return report
+
+    @timed('sgpo.import_mismatch', count=argument_length(1))
+    def import_mismatch(self, mismatch: SgPo) -> ImportReport:
+        """
+        Updates the msgid of the entries whose msgid has changed, and adds the entries that do not exist yet.
+        Returns an ImportReport. Nothing is printed; see sgpo.import_report for the renderers.
+        """
+        report = ImportReport.create('import_mismatch', self.fpath, mismatch.fpath)
         for mismatch_entry in mismatch:
             # mismatch_entry.flags = ['Modified']  # For debugging.
             my_entry = self.find_by_key(mismatch_entry.msgctxt, mismatch_entry.msgid)
 
             if my_entry is not None:
                 if my_entry.msgid == mismatch_entry.msgid:
-                    print(f'\nAlready exists.(Skipped)')
-                    print(f'\t\t#| msgid "{my_entry.previous_msgid}"')
-                    print(f'\t\tmsgctxt "{my_entry.msgctxt}"')
-                    print(f'\t\tmsgid "{my_entry.msgid}"')
+                    report.skipped.append(ReportEntry(my_entry.msgctxt, my_entry.msgid, my_entry.previous_msgid,
+                                                      REASON_EXISTS))
                 else:
-                    print(f'\nmsgid has been changed.')
-                    print(f'\t\t#| msgid "{my_entry.msgid}"')
-                    print(f'\t\tmsgctxt "{mismatch_entry.msgctxt}"')
-                    print(f'\t\tmsgid "{mismatch_entry.msgid}"')
+                    report.modified.append(ReportEntry(mismatch_entry.msgctxt, mismatch_entry.msgid, my_entry.msgid))
                     my_entry.previous_msgid = my_entry.msgid
-                    my_entry.msgid = mismatch_entry.msgid
-                    modified_entry_count += 1
+                    self.set_key(my_entry, my_entry.msgctxt, mismatch_entry.msgid)
             else:
                 try:
                     self.append(mismatch_entry)
-                    print(f'\nNew entry added.')
-                    print(f'\t\tmsgctxt "{mismatch_entry.msgctxt}"')
-                    print(f'\t\tmsgid "{mismatch_entry.msgid}"')
-                    new_entry_count += 1
-                except ValueError as e:
-                    print(e)
-                except IOError as e:
-                    print(e)
-
-        print(f'{new_entry_count} entries added.')
-        print(f'{modified_entry_count} entries modified.')
-
-    def import_pot(self, pot: SgPo) -> None:
-        new_entry_count = 0
-        modified_entry_count = 0
-        po_key_set = set(self.get_key_list())
-        pot_key_set = set(pot.get_key_list())
-
-        diff_pot_only_key = pot_key_set - po_key_set
-        diff_po_only_key = po_key_set - pot_key_set
+                    report.added.append(ReportEntry(mismatch_entry.msgctxt, mismatch_entry.msgid))
+                except (ValueError, IOError) as e:
+                    report.errors.append(ReportEntry(mismatch_entry.msgctxt, mismatch_entry.msgid, reason=str(e)))
 
-        # Add new my_entry
-        print(f'\npot file only: {len(diff_pot_only_key)}')
-        for key in diff_pot_only_key:
-            print(f'msgctxt:\t"{key.msgctxt}"\n'
-                  f'  msgid:\t"{key.msgid}"\n')
-
-            self.append(pot.find_by_key(key.msgctxt, key.msgid))
-            new_entry_count += 1
+        return report
 
-        # Remove obsolete entry
-        print(f'\npo file only: {len(diff_po_only_key)}')
-        for key in diff_po_only_key:
-            print(f'msgctxt:\t"{key.msgctxt}"\n'
-                  f'  msgid:\t"{key.msgid}"\n')
+    @timed('sgpo.import_pot', count=argument_length(1))
+    def import_pot(self, pot: SgPo) -> ImportReport:
+        """
+        Adds the entries that are only in the pot, makes the entries that are no longer in the pot obsolete,
+        and marks the entries whose msgid has changed as fuzzy.
+        Returns an ImportReport. Nothing is printed; see sgpo.import_report for the renderers.
+        """
+        report = ImportReport.create('import_pot', self.fpath, pot.fpath)
+        self._apply_pot_changes(self._classify_pot_changes(pot), report)
+        return report
 
-            entry = self.find_by_key(key.msgctxt, key.msgid)
-            entry.obsolete = True
+    @timed('sgpo.import_pot_delta', count=lambda result, self, delta: delta.key_count)
+    def import_pot_delta(self, delta) -> ImportReport:
+        """
+        Applies the differences between two versions of the pot (see sgpo.pot_delta.diff_pots()).
+        Only the keys in the delta are looked at, so the cost depends on the size of the change, not of the file.
+        If this file was in sync with the previous pot, the result is the same as import_pot() with the current pot.
+        """
+        report = ImportReport.create('import_pot', self.fpath, delta.source)
+        added_entries = []
+        obsolete_entries = []
+        modified_entries = []
 
-        # Modified entry
-        for my_entry in self:
-            if not my_entry.msgctxt.endswith(':'):
-                pot_entry = pot.find_by_key(my_entry.msgctxt, None)
+        for key in delta.removed_keys:
+            my_entry = self.find_by_key(key.msgctxt, key.msgid)
+            if my_entry is not None:
+                obsolete_entries.append(my_entry)
 
-                if pot_entry and (my_entry.msgid != pot_entry.msgid):
-                    print(f'msgctxt:\t{my_entry.msgctxt}\n'
-                          f'  msgid:\t{my_entry.msgid}\n')
-                    my_entry.previous_msgid = my_entry.msgid
-                    my_entry.msgid = pot_entry.msgid
-                    my_entry.flags = ['fuzzy']
-                    modified_entry_count += 1
+        for pot_entry in delta.added_entries + delta.modified_entries:
+            key = self._po_entry_to_key_tuple(pot_entry)
+            my_entry = self.find_by_key(key.msgctxt, key.msgid)
+            if my_entry is None:
+                added_entries.append(pot_entry)
+            elif key.msgid is None and my_entry.msgid != pot_entry.msgid:
+                modified_entries.append((my_entry, pot_entry))
 
-        print(f'\n     new entry:\t{new_entry_count}')
-        print(f'\nmodified entry:\t{modified_entry_count}')
+        self._apply_pot_changes(PotChanges(added_entries=added_entries,
+                                           obsolete_entries=obsolete_entries,
+                                           modified_entries=modified_entries), report)
+        return report
 
     def delete_extracted_comments(self):
         """
@@ -180,37 +246,428 @@ class SgPo(polib.POFile):
                 entry.comment = None
 
     def find_by_key(self, msgctxt: str, msgid: str) -> polib.POEntry:
+        # If the msgctxt ends with ':', the combination of msgid and
+        # msgctxt becomes the key that identifies the entry.
+        # Otherwise, only msgctxt is the key to identify the entry.
+        key = self._to_key_tuple(msgctxt, msgid)
+        entry = self._get_key_index().get(key)
+
+        if entry is not None and self._po_entry_to_key_tuple(entry) != key:
+            # The key of the entry has been edited in place. Rebuild the index and try again.
+            self.rebuild_key_index()
+            entry = self._key_index.get(key)
+
+        return entry
+
+    def set_key(self, entry: polib.POEntry, msgctxt: str, msgid: str) -> None:
+        """
+        Changes msgctxt and msgid of an entry of this file, and updates the index used by find_by_key() for that
+        entry only. Use this instead of editing msgctxt or msgid directly, which needs rebuild_key_index().
+        """
+        self._get_key_index()
+        self._remove_from_key_index(entry)
+        entry.msgctxt = msgctxt
+        entry.msgid = msgid
+        self._add_to_key_index(entry, is_last=False)
+
+    def rebuild_key_index(self) -> None:
+        """
+        Rebuilds the index used by find_by_key(), 'in' and the duplicate check of append().
+        Call this after editing msgctxt or msgid of entries directly, or use set_key() instead.
+        An entry found under its old key is detected by find_by_key(), but an entry is not found under its new key
+        until the index is rebuilt.
+        """
+        key_index = {}
+        duplicate_key_counts = {}
         for entry in self:
-            # If the msgctxt ends with ':', the combination of msgid and
-            # msgctxt becomes the key that identifies the entry.
-            # Otherwise, only msgctxt is the key to identify the entry.
-            if entry.msgctxt.endswith(':'):
-                if entry.msgctxt == msgctxt and entry.msgid == msgid:
-                    return entry
-            else:
-                if entry.msgctxt == msgctxt:
-                    return entry
+            if entry.msgctxt is not None:
+                key = self._po_entry_to_key_tuple(entry)
+                if key in key_index:
+                    duplicate_key_counts[key] = duplicate_key_counts.get(key, 0) + 1
+                else:
+                    key_index[key] = entry
+        self._key_index = key_index
+        self._duplicate_key_counts = duplicate_key_counts
 
-        return None
+    def compact_entries(self) -> int:
+        """
+        Replaces the polib.POEntry entries with CompactEntry, which use much less memory.
+        Entries that CompactEntry can't represent are left as they are.
+        Returns the number of replaced entries.
+        """
+        count = 0
+        for index, entry in enumerate(self):
+            if isinstance(entry, polib.POEntry) and CompactEntry.can_convert(entry):
+                list.__setitem__(self, index, CompactEntry.from_polib(entry))
+                count += 1
+
+        if count:
+            self._key_index = None
+            self._sort_key_cache = {}
+        return count
+
+    def expand_entries(self) -> int:
+        """
+        Replaces the CompactEntry entries with polib.POEntry.
+        Returns the number of replaced entries.
+        """
+        count = 0
+        for index, entry in enumerate(self):
+            if isinstance(entry, CompactEntry):
+                list.__setitem__(self, index, entry.to_polib())
+                count += 1
+
+        if count:
+            self._key_index = None
+            self._sort_key_cache = {}
+        return count
+
+    def __reduce__(self):
+        # Entries are restored without going through append(), and the caches are rebuilt on demand.
+        state = {key: value for key, value in self.__dict__.items() if key not in self._CACHE_ATTRIBUTES}
+        return _restore_sgpo, (self.__class__, state, list(self))
+
+    @property
+    def keep_sorted(self) -> bool:
+        """
+        When True, the entries are always kept in the order of sort().
+        Appended entries are inserted at their sorted position, and sort() has nothing left to do.
+        Entries inserted with insert() are placed at the given index as usual.
+        """
+        return self._keep_sorted
 
+    @keep_sorted.setter
+    def keep_sorted(self, value: bool) -> None:
+        if value and not self.is_sorted():
+            self.sort()
+        self._keep_sorted = value
+
+    def is_sorted(self) -> bool:
+        """
+        Returns True if the entries are in the order of sort().
+        """
+        sort_keys = [self._get_sort_key(entry) for entry in self]
+        return all(sort_keys[i] <= sort_keys[i + 1] for i in range(len(sort_keys) - 1))
+
+    def __contains__(self, entry):
+        # polib searches all entries. An entry whose key is not in the index of find_by_key() cannot be in the file,
+        # which is the usual case when entries are appended, so the search is only needed for the other entries.
+        if entry.msgctxt is not None and self._po_entry_to_key_tuple(entry) not in self._get_key_index():
+            return False
+        return super().__contains__(entry)
+
+    # The methods that add or remove entries update the index of find_by_key() for those entries only.
+    # The index is brought up to date before the list is changed, so that it is not rebuilt with the changed list.
+
+    def append(self, entry):
+        if self._keep_sorted:
+            self.insert(self._bisect_sorted(entry), entry)
+            return
+
+        self._get_key_index()
+        super().append(entry)
+        self._add_to_key_index(entry)
+
+    def insert(self, index, entry):
+        self._get_key_index()
+        super().insert(index, entry)
+        self._add_to_key_index(entry, is_last=False)
+
+    def extend(self, entries):
+        for entry in entries:
+            self.append(entry)
+
+    def __iadd__(self, entries):
+        self.extend(entries)
+        return self
+
+    def remove(self, entry):
+        # The removed entry is equal to the given one, but is not necessarily the same object.
+        self._get_key_index()
+        self._remove_from_key_index(super().pop(self.index(entry)))
+
+    def pop(self, index=-1):
+        self._get_key_index()
+        entry = super().pop(index)
+        self._remove_from_key_index(entry)
+        return entry
+
+    def clear(self):
+        super().clear()
+        self._key_index = {}
+        self._duplicate_key_counts = {}
+        self._sort_key_cache = {}
+
+    def reverse(self):
+        super().reverse()
+        self._reset_first_entries()
+
+    def __setitem__(self, index, value):
+        self._get_key_index()
+        if isinstance(index, slice):
+            old_entries = self[index]
+            new_entries = value = list(value)
+        else:
+            old_entries = [self[index]]
+            new_entries = [value]
+        super().__setitem__(index, value)
+
+        # Entries that are set again stay in the index. The new entries are added first, so that the next entry
+        # with the key of a removed entry can be one of them.
+        old_ids = {id(entry) for entry in old_entries}
+        new_ids = {id(entry) for entry in new_entries}
+        for entry in new_entries:
+            if id(entry) not in old_ids:
+                self._add_to_key_index(entry, is_last=False)
+        for entry in old_entries:
+            if id(entry) not in new_ids:
+                self._remove_from_key_index(entry)
+
+    def __delitem__(self, index):
+        self._get_key_index()
+        old_entries = self[index] if isinstance(index, slice) else [self[index]]
+        super().__delitem__(index)
+        for entry in old_entries:
+            self._remove_from_key_index(entry)
+
+    @timed('sgpo.sort', count=argument_length(0))
     def sort(self, *, key=None, reverse=False):
         if key is None:
-            super().sort(key=lambda entry: (self._po_entry_to_sort_key(entry)), reverse=reverse)
+            if not reverse and self.is_sorted():
+                return
+            super().sort(key=self._get_sort_key, reverse=reverse)
         else:
             super().sort(key=key, reverse=reverse)
 
+        self._reset_first_entries()
+
+    @timed('sgpo.format', count=argument_length(0))
     def format(self):
         self.metadata = self._filter_po_metadata(self.metadata)
         self.sort()
 
-    def save(self, fpath=None, repr_method='__unicode__', newline='\n') -> None:
-        # Change the default value of newline to \n (LF).
-        super().save(fpath=fpath, repr_method=repr_method, newline=newline)
+    @timed('sgpo.save', count=argument_length(0))
+    def save(self, fpath=None, repr_method='__unicode__', newline='\n', only_if_changed=False) -> bool:
+        """
+        Returns True if the file has been written.
+
+        The file is written to a temporary file that replaces the existing one atomically,
+        so the existing file is left as it was if writing fails.
+
+        only_if_changed: The content is serialized in memory and compared with the existing file first,
+        by size and then by hash. The file is written only if they differ. Files that are not changed keep their mtime.
+        """
+        if repr_method != '__unicode__':
+            # Change the default value of newline to \n (LF).
+            super().save(fpath=fpath, repr_method=repr_method, newline=newline)
+            return True
+
+        if self.fpath is None and fpath is None:
+            raise IOError('You must provide a file path to save() method')
+        if fpath is None:
+            fpath = self.fpath
+
+        if not only_if_changed:
+            # Entries are written one by one, without building the whole file content in memory.
+            write_text_file_atomically(fpath, lambda file: fast_po_writer.write(self, file), self.encoding, newline)
+
+            # set the file path if not set
+            if self.fpath is None:
+                self.fpath = fpath
+            return True
+
+        data = self._serialize(newline)
+        if self._file_content_equals(fpath, data):
+            written = False
+        else:
+            write_file_atomically(fpath, lambda file: file.write(data))
+            written = True
+
+        # set the file path if not set
+        if self.fpath is None:
+            self.fpath = fpath
+
+        return written
+
+    def differs_from_file(self, fpath=None, newline='\n') -> bool:
+        """
+        Returns True if save(fpath, only_if_changed=True) would write the file.
+        The content is serialized in the same way as save() does, so a dry run reports exactly the files it would write.
+        """
+        if fpath is None:
+            fpath = self.fpath
+        return not self._file_content_equals(fpath, self._serialize(newline))
 
     def get_key_list(self) -> list:
         return [self._po_entry_to_key_tuple(entry) for entry in self]
 
     # ======= Private methods =======
+    def _serialize(self, newline='\n') -> bytes:
+        """
+        Returns the bytes that polib.POFile.save() would write.
+        """
+        buffer = io.StringIO()
+        fast_po_writer.write(self, buffer)
+        contents = buffer.getvalue()
+
+        if newline is None:
+            newline = os.linesep
+        if newline not in ('', '\n'):
+            contents = contents.replace('\n', newline)
+        return contents.encode(self.encoding)
+
+    @staticmethod
+    def _file_content_equals(fpath: str, data: bytes) -> bool:
+        if not os.path.isfile(fpath) or os.path.getsize(fpath) != len(data):
+            return False
+        return hash_file(fpath) == hashlib.sha256(data).hexdigest()
+
+    _CACHE_ATTRIBUTES = ('_key_index', '_duplicate_key_counts', '_sort_key_cache')
+
+    def _init_caches(self) -> None:
+        self._key_index = None
+        self._duplicate_key_counts = {}
+        self._sort_key_cache = {}
+        self._keep_sorted = False
+
+    def _classify_pot_changes(self, pot: SgPo) -> PotChanges:
+        """
+        Compares this file with the pot file by key in one pass over each of them.
+        - added_entries: entries of the pot file whose key is not in this file.
+        - obsolete_entries: entries of this file whose key is not in the pot file.
+        - modified_entries: (my_entry, pot_entry) pairs identified by msgctxt only, whose msgid differs.
+        """
+        added_entries = []
+        obsolete_entries = []
+        modified_entries = []
+
+        my_key_set = set()
+        for my_entry in self:
+            key = self._po_entry_to_key_tuple(my_entry)
+            pot_entry = pot.find_by_key(key.msgctxt, key.msgid)
+
+            if pot_entry is None:
+                # Only the first entry is found by key, so only that one becomes obsolete.
+                if key not in my_key_set:
+                    obsolete_entries.append(my_entry)
+            elif key.msgid is None and my_entry.msgid != pot_entry.msgid:
+                modified_entries.append((my_entry, pot_entry))
+
+            my_key_set.add(key)
+
+        for pot_entry in pot:
+            key = self._po_entry_to_key_tuple(pot_entry)
+            if key not in my_key_set:
+                added_entries.append(pot_entry)
+                my_key_set.add(key)
+
+        return PotChanges(added_entries=added_entries,
+                          obsolete_entries=obsolete_entries,
+                          modified_entries=modified_entries)
+
+    def _apply_pot_changes(self, changes: PotChanges, report: ImportReport) -> None:
+        # Add new my_entry
+        report.added.extend(ReportEntry(pot_entry.msgctxt, pot_entry.msgid) for pot_entry in changes.added_entries)
+        self._extend_without_duplicate_check(changes.added_entries)
+
+        # Remove obsolete entry
+        for entry in changes.obsolete_entries:
+            if not entry.obsolete:
+                key = self._po_entry_to_key_tuple(entry)
+                report.obsoleted.append(ReportEntry(key.msgctxt, key.msgid))
+            entry.obsolete = True
+
+        # Modified entry
+        for my_entry, pot_entry in changes.modified_entries:
+            report.modified.append(ReportEntry(my_entry.msgctxt, pot_entry.msgid, my_entry.msgid))
+            my_entry.previous_msgid = my_entry.msgid
+            self.set_key(my_entry, my_entry.msgctxt, pot_entry.msgid)
+            my_entry.flags = ['fuzzy']
+
+    def _extend_without_duplicate_check(self, entries: list) -> None:
+        """
+        Appends entries that are known to have keys which are not in this file yet.
+        """
+        self._get_key_index()
+        if self._keep_sorted and len(entries) * 64 < len(self):
+            # A few entries are inserted at their sorted position, which is cheaper than sorting the whole file.
+            for entry in entries:
+                list.insert(self, self._bisect_sorted(entry), entry)
+                self._add_to_key_index(entry, is_last=False)
+            return
+
+        list.extend(self, entries)
+        for entry in entries:
+            self._add_to_key_index(entry)
+        if self._keep_sorted:
+            # Merging the sorted run of existing entries with the new ones is close to linear.
+            self.sort()
+
+    def _get_key_index(self) -> dict:
+        """
+        Returns the index used by find_by_key(), which maps each Key_tuple to the first entry with that key.
+        """
+        if getattr(self, '_key_index', None) is None:
+            self.rebuild_key_index()
+        return self._key_index
+
+    def _add_to_key_index(self, entry: polib.POEntry, is_last: bool = True) -> None:
+        """
+        Adds an entry that has just been added to the list to the up-to-date index.
+        is_last: The entry was appended, so it comes after the other entries with the same key.
+        """
+        if entry.msgctxt is None:
+            return
+
+        key = self._po_entry_to_key_tuple(entry)
+        first_entry = self._key_index.get(key)
+        if first_entry is None:
+            self._key_index[key] = entry
+            return
+
+        self._duplicate_key_counts[key] = self._duplicate_key_counts.get(key, 0) + 1
+        if not is_last and self._comes_before(entry, first_entry):
+            self._key_index[key] = entry
+
+    def _remove_from_key_index(self, entry: polib.POEntry) -> None:
+        """
+        Removes an entry that has just been removed from the list, or whose key is about to change, from the index.
+        """
+        self._sort_key_cache.pop(id(entry), None)
+        if entry.msgctxt is None:
+            return
+
+        key = self._po_entry_to_key_tuple(entry)
+        duplicate_count = self._duplicate_key_counts.pop(key, 0)
+        if duplicate_count > 1:
+            self._duplicate_key_counts[key] = duplicate_count - 1
+        if self._key_index.get(key) is not entry:
+            # The entry was not the first one with its key.
+            return
+
+        if duplicate_count == 0:
+            del self._key_index[key]
+        else:
+            # The next entry with the same key becomes the first one. Only keys with duplicates need this search.
+            self._key_index[key] = next(other for other in self
+                                        if other is not entry and other.msgctxt is not None
+                                        and self._po_entry_to_key_tuple(other) == key)
+
+    def _comes_before(self, entry: polib.POEntry, other_entry: polib.POEntry) -> bool:
+        for list_entry in self:
+            if list_entry is entry:
+                return True
+            if list_entry is other_entry:
+                return False
+        return False
+
+    def _reset_first_entries(self) -> None:
+        """
+        Called after the order of the entries has changed. Only the first entries of duplicate keys may change.
+        """
+        if self._duplicate_key_counts:
+            self._key_index = None
+
     @staticmethod
     def _filter_po_metadata(meta_dict: dict) -> dict:
         """
@@ -224,6 +681,34 @@ class SgPo(polib.POFile):
                 new_meta_dict[meta_key] = meta_value
         return new_meta_dict
 
+    def _bisect_sorted(self, po_entry: polib.POEntry) -> int:
+        """
+        Returns the index at which an entry is inserted into the sorted entries, after the entries with the same sort key.
+        Same as bisect.bisect_right() with key=, which needs Python 3.10, and without computing the keys of all entries.
+        """
+        sort_key = self._po_entry_to_sort_key(po_entry)
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if sort_key < self._get_sort_key(self[middle]):
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    def _get_sort_key(self, po_entry: polib.POEntry) -> str:
+        """
+        Same as _po_entry_to_sort_key() for an entry of this file, but the key is computed only once per entry.
+        The cache is keyed by the entry itself and holds the msgctxt and msgid the key was computed from, so the key
+        is computed again after an in-place edit. Entries are dropped from the cache when they are removed.
+        """
+        cached = self._sort_key_cache.get(id(po_entry))
+        if cached is not None and cached[0] is po_entry.msgctxt and cached[1] is po_entry.msgid:
+            return cached[2]
+        sort_key = self._po_entry_to_sort_key(po_entry)
+        self._sort_key_cache[id(po_entry)] = (po_entry.msgctxt, po_entry.msgid, sort_key)
+        return sort_key
+
     def _po_entry_to_sort_key(self, po_entry: polib.POEntry) -> str:
         """
         Reorders the sort results by rewriting the sort key as intended.
@@ -245,10 +730,14 @@ class SgPo(polib.POFile):
 
     @staticmethod
     def _po_entry_to_key_tuple(po_entry: polib.POEntry) -> Key_tuple:
-        if po_entry.msgctxt.endswith(':'):
-            return Key_tuple(msgctxt=po_entry.msgctxt, msgid=po_entry.msgid)
+        return SgPo._to_key_tuple(po_entry.msgctxt, po_entry.msgid)
+
+    @staticmethod
+    def _to_key_tuple(msgctxt: str, msgid: str) -> Key_tuple:
+        if msgctxt is not None and msgctxt.endswith(':'):
+            return Key_tuple(msgctxt=msgctxt, msgid=msgid)
         else:
-            return Key_tuple(msgctxt=po_entry.msgctxt, msgid=None)
+            return Key_tuple(msgctxt=msgctxt, msgid=None)
 
     @staticmethod
     def _multi_keys_filter(text):
@@ -256,13 +745,29 @@ class SgPo(polib.POFile):
         Rewrite the string to be sorted to group the multi keys entries together in the appropriate position in the locale file.
         """
 
-        pattern = r"(?<!\\\\)\(([^)]+)\)(?!\\\\)"  # Matches everything inside parentheses that are NOT escaped
-
         # Use re.sub to add 'ZZZ' and remove parentheses from any matched pattern
-        modified_text = re.sub(pattern, 'ZZZ\\1', text)
+        modified_text = MULTI_KEYS_PATTERN.sub('ZZZ\\1', text)
 
         return modified_text
 
+    @staticmethod
+    def _check_duplicate_entries(entries) -> None:
+        """
+        Raises ValueError listing every entry that polib would reject as a duplicate.
+        Like polib, an entry duplicates an earlier non-obsolete entry with the same msgctxt and msgid.
+        """
+        seen_keys = set()
+        duplicates = []
+        for entry in entries:
+            key = (entry.msgctxt, entry.msgid)
+            if key in seen_keys:
+                duplicates.append(f'line {entry.linenum}: msgctxt "{entry.msgctxt}" msgid "{entry.msgid}"')
+            elif not entry.obsolete:
+                seen_keys.add(key)
+
+        if duplicates:
+            raise ValueError('Duplicate entries found:\n' + '\n'.join(duplicates))
+
     @staticmethod
     def _validate_filename(filename: str) -> bool:
 
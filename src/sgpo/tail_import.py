@@ -0,0 +1,181 @@
+"""
+Incremental import of the unknown and mismatch files, which SmartGit keeps appending to.
+
+A checkpoint is kept for each input file. It holds the number of bytes already imported, the hash of these bytes,
+and the hash of the target file (messages.pot) after the import. On the next run, only the entries appended since
+then are parsed and imported:
+
+    new_entries = tail_import.read_new_entries(unknown_file, pot_file)
+    if new_entries.entries is not None:
+        pot = sgpo.pofile(pot_file)
+        pot.import_unknown(new_entries.entries)
+        pot.save(pot_file)
+        tail_import.commit(new_entries, pot_file)
+
+The whole file is imported again if there is no valid checkpoint, if the imported bytes have changed
+(for example, the file was truncated or replaced), or if the target file has been changed by something else.
+Importing an entry again is harmless: existing keys are skipped.
+
+An entry that SmartGit is still writing at the end of the file is left for the next run.
+"""
+import hashlib
+import json
+import os
+import re
+from collections import namedtuple
+
+from .atomic_file import write_text_file_atomically
+from .file_hash import hash_file, update_hash
+from .sgpo import pofile_from_text
+
+CHECKPOINT_FORMAT_VERSION = 1
+CHECKPOINT_FILE_EXTENSION = '.checkpoint'
+
+Checkpoint = namedtuple('Checkpoint', ['offset', 'prefix_hash', 'target_hash'])
+Checkpoint.__doc__ = """
+offset: Number of bytes of the input file already imported. It is always at the end of an entry.
+prefix_hash: sha256 of these bytes.
+target_hash: sha256 of the target file after the import.
+"""
+
+NewEntries = namedtuple('NewEntries', ['input_file', 'checkpoint_file', 'entries', 'full', 'start_offset',
+                                       'checkpoint', 'target_hash'])
+NewEntries.__doc__ = """
+entries: SgPo of the entries appended since the checkpoint, or None if nothing has been appended.
+full: True if the whole file is read, because the checkpoint could not be used.
+start_offset: Offset of the first new byte.
+checkpoint: The checkpoint to write with commit() once the target file has been saved.
+target_hash: sha256 of the target file before the import, or None if it is unknown.
+"""
+
+_BLANK_LINES_PATTERN = re.compile(rb'\n(?:[ \t]*\r?\n)+')
+_COMPLETE_LAST_LINE_PATTERN = re.compile(rb'^(?:#~ )?(?:msgstr(?:\[\d+\])? )?"(?:[^"\\]|\\.)*"[ \t]*\r?$')
+
+
+def get_checkpoint_file(input_file: str) -> str:
+    """
+    po/unknown.24_1 -> po/.unknown.24_1.checkpoint
+    """
+    directory, name = os.path.split(input_file)
+    return os.path.join(directory, f'.{name}{CHECKPOINT_FILE_EXTENSION}')
+
+
+def read_checkpoint(checkpoint_file: str) -> Checkpoint:
+    """
+    Returns None if the checkpoint file does not exist or cannot be used.
+    """
+    try:
+        with open(checkpoint_file, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        if data.get('format_version') != CHECKPOINT_FORMAT_VERSION:
+            return None
+        return Checkpoint(offset=int(data['offset']), prefix_hash=data['prefix_hash'],
+                          target_hash=data['target_hash'])
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def write_checkpoint(checkpoint_file: str, checkpoint: Checkpoint) -> None:
+    def write_json(file) -> None:
+        json.dump({'format_version': CHECKPOINT_FORMAT_VERSION, **checkpoint._asdict()}, file, indent=2)
+        file.write('\n')
+
+    write_text_file_atomically(checkpoint_file, write_json)
+
+
+def delete_checkpoint(checkpoint_file: str) -> bool:
+    try:
+        os.remove(checkpoint_file)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def read_new_entries(input_file: str, target_file: str, checkpoint_file: str = None, full: bool = False) -> NewEntries:
+    """
+    Reads the entries appended to input_file since the last import into target_file.
+    full: Ignore the checkpoint and read the whole file.
+    """
+    checkpoint_file = checkpoint_file or get_checkpoint_file(input_file)
+    checkpoint = None if full else read_checkpoint(checkpoint_file)
+    target_hash = hash_file(target_file)
+    if checkpoint is not None and checkpoint.target_hash != target_hash:
+        checkpoint = None
+
+    return read_entries_after(input_file, checkpoint, checkpoint_file)._replace(target_hash=target_hash)
+
+
+def read_entries_after(input_file: str, checkpoint: Checkpoint, checkpoint_file: str = None) -> NewEntries:
+    """
+    Reads the entries appended to input_file after the given checkpoint, without checking the target file.
+    The whole file is read if checkpoint is None, or if the bytes before its offset have changed.
+    This is for a process that keeps the target in memory and the checkpoint of the previous call.
+    """
+    with open(input_file, 'rb') as file:
+        prefix_hash = hashlib.sha256()
+        start_offset = 0
+        if checkpoint is not None and os.fstat(file.fileno()).st_size >= checkpoint.offset:
+            update_hash(prefix_hash, file, checkpoint.offset)
+            if prefix_hash.hexdigest() == checkpoint.prefix_hash:
+                start_offset = checkpoint.offset
+        if start_offset == 0:
+            # The imported bytes have changed. The whole file is read again.
+            file.seek(0)
+            prefix_hash = hashlib.sha256()
+        data = file.read()
+
+    full = start_offset == 0
+    end = _find_end_of_complete_entries(data)
+    prefix_hash.update(data[:end])
+    new_checkpoint = Checkpoint(offset=start_offset + end, prefix_hash=prefix_hash.hexdigest(), target_hash=None)
+
+    entries = None
+    text = data[:end].decode('utf-8')
+    if full or text.strip():
+        entries = pofile_from_text(text)
+        entries.fpath = input_file
+
+    return NewEntries(input_file=input_file, checkpoint_file=checkpoint_file or get_checkpoint_file(input_file),
+                      entries=entries, full=full, start_offset=start_offset, checkpoint=new_checkpoint,
+                      target_hash=None)
+
+
+def commit(new_entries: NewEntries, target_file: str) -> None:
+    """
+    Writes the checkpoint of new_entries. Call it after the target file has been saved.
+
+    The other checkpoints of the same directory that were valid for the target file before the import
+    are updated too, so that importing the mismatch file does not force a full import of the unknown file.
+    """
+    target_hash = hash_file(target_file)
+    write_checkpoint(new_entries.checkpoint_file, new_entries.checkpoint._replace(target_hash=target_hash))
+    if new_entries.target_hash is None or target_hash == new_entries.target_hash:
+        return
+
+    directory = os.path.dirname(new_entries.checkpoint_file)
+    for name in os.listdir(directory or '.'):
+        checkpoint_file = os.path.join(directory, name)
+        if not name.endswith(CHECKPOINT_FILE_EXTENSION) or checkpoint_file == new_entries.checkpoint_file:
+            continue
+        checkpoint = read_checkpoint(checkpoint_file)
+        if checkpoint is not None and checkpoint.target_hash == new_entries.target_hash:
+            write_checkpoint(checkpoint_file, checkpoint._replace(target_hash=target_hash))
+
+
+def _find_end_of_complete_entries(data: bytes) -> int:
+    """
+    Returns the end of the last entry that is completely written.
+    The last entry is complete if its last line is a complete msgstr (or a continuation of it).
+    Otherwise, it ends at the last blank line.
+    """
+    last_blank_end = 0
+    for match in _BLANK_LINES_PATTERN.finditer(data):
+        last_blank_end = match.end()
+    if last_blank_end == len(data):
+        return len(data)
+
+    last_block = data[last_blank_end:]
+    last_line = last_block.rstrip(b'\r\n').rsplit(b'\n', 1)[-1]
+    if b'msgstr' in last_block and _COMPLETE_LAST_LINE_PATTERN.match(last_line):
+        return len(data)
+    return last_blank_end
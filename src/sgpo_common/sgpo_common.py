@@ -1,7 +1,12 @@
 import os
+from typing import Iterable
 
 import polib
 
+from sgpo import fast_po_writer
+from sgpo.atomic_file import write_text_file_atomically
+from sgv23_mapping import DUPLICATE_KEY
+
 # Key:Locale code
 # Value: Directory name
 LOCALE_NAME_DIR_DICT = dict(ja_JP='ja-JP', zh_CN='zh-CN')
@@ -37,6 +42,18 @@ def optimize_po_entry(po_entry: polib.POEntry) -> polib.POEntry:
 
     return new_po_entry
 
+def print_parse_errors(parse_errors: list, file_path: str) -> None:
+    """
+    Prints the errors recorded in SgMap.parse_errors or by SgMap.iter_file(): the duplicate keys,
+    and the lines that could not be parsed and were skipped.
+    """
+    for error in parse_errors:
+        if error.message == DUPLICATE_KEY:
+            print(f"Duplicate key ({file_path}, line {error.line_number}, the last entry is used): {error.line}")
+        else:
+            print(f"Parsing failed ({file_path}, line {error.line_number}): {error.message}: {error.line}")
+
+
 def get_repository_root() -> str:
     return os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -53,3 +70,24 @@ def create_meta_dict(locale_code: str) -> dict:
     meta_data_dict['Language'] = locale_code
 
     return meta_data_dict
+
+
+def write_po_file(output_file: str, meta_dict: dict, entries: Iterable[polib.POEntry], wrapwidth: int = 1000) -> int:
+    """
+    Writes the entries to a po/pot file as they are produced, instead of building a polib.POFile first.
+    The output is the same as polib.POFile.save() of a POFile with the same metadata and entries.
+    Returns the number of entries.
+    """
+    metadata_po = polib.POFile(wrapwidth=wrapwidth)
+    metadata_po.metadata.update(meta_dict)
+
+    count = 0
+
+    def write_entries(file) -> None:
+        nonlocal count
+        count = fast_po_writer.write_entries(file, metadata_po.metadata_as_entry(), entries, wrapwidth,
+                                             metadata_po.header)
+
+    # newline=None: the platform line endings, as polib.POFile.save() writes them
+    write_text_file_atomically(output_file, write_entries, metadata_po.encoding, newline=None)
+    return count
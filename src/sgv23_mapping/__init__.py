@@ -1 +1 @@
-from .sgv23_mapping import SgMap, CombinedSgMap, CombinedEntry
+from .sgv23_mapping import SgMap, CombinedSgMap, CombinedEntry, ParsedEntry, ParseError, PackedEntries, DUPLICATE_KEY
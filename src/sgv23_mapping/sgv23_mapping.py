@@ -2,12 +2,18 @@
 # -*- coding: utf-8 -*-
 """This module reads the SmartGit mapping file and returns a list of namedtuple containing key-value pairs.
 """
+import io
 import os
 from collections import namedtuple
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, Iterator, List, Tuple
 
-from pyparsing import (CharsNotIn, restOfLine, LineEnd, Suppress, Group, ZeroOrMore, OneOrMore, StringEnd,
-                       ParseException, Combine, Literal, MatchFirst, White, Optional)
+from phase_profiler import timed, result_length
+
+# ParseError.message of the later entries of a key that appears more than once
+DUPLICATE_KEY = 'duplicate key'
+
+# The whitespace that the former pyparsing grammar skipped between the tokens
+_WHITESPACE = ' \t\r\n'
 
 
 # The following class is intended only to clarify the fields of namedtuple and does nothing else.
@@ -23,6 +29,17 @@ class ParsedEntry(namedtuple('ParsedEntry', ['key', 'value', 'comment', 'no_tran
     pass
 
 
+class ParseError(namedtuple('ParseError', ['line_number', 'line', 'message'])):
+    """
+    This namedtuple has the following items.
+
+    line_number  :int
+    line  :str
+    message  :str
+    """
+    pass
+
+
 class CombinedEntry(namedtuple('CombinedEntry',
                                ['key', 'original_msg', 'translated_msg', 'comment', 'fuzzy', 'no_translation_needed',
                                 'previous_original_msg', 'previous_translated_msg'])):
@@ -56,6 +73,7 @@ class SgMap:
     """
 
     def __init__(self, file_path: str, locale_code: str) -> None:
+        self.parse_errors: List[ParseError] = []
         self.dictionary: Dict[str, ParsedEntry] = self._validate_and_read_file(file_path)
         self.locale_code = locale_code
 
@@ -64,10 +82,51 @@ class SgMap:
         """Generates and initializes objects from text data
         """
         instance = cls.__new__(cls)
+        instance.parse_errors = []
         instance.dictionary = instance._read_text(text_data)
         instance.locale_code = locale_code
         return instance
 
+    @classmethod
+    def iter_file(cls, file_path: str, parse_errors: List[ParseError] = None) -> Iterator[ParsedEntry]:
+        """Yields the entries of a mapping file one at a time, without building the dictionary.
+
+        The entries are the same as the values of the dictionary: if a key appears more than once,
+        its last entry is yielded at the position of the first one, and the later ones are recorded in parse_errors
+        with the message DUPLICATE_KEY. Nothing is printed; the scripts report parse_errors.
+
+        The first entry of a key can only be yielded once it is known whether a later entry replaces it, which a
+        single pass can't tell without keeping every entry. So the file is read twice: the first pass finds the
+        duplicate keys and keeps the last entries of those only, and the second pass yields the entries.
+        """
+        instance = cls.__new__(cls)
+        instance.parse_errors = parse_errors if parse_errors is not None else []
+        instance._validate_file_path(file_path)
+
+        # Key -> the last entry, for the keys that appear more than once
+        last_entries = {}
+        keys = set()
+        with open(file_path, "r", encoding="UTF-8") as file:
+            for line_number, entry in instance._parse_numbered_content(file):
+                if entry.key in keys:
+                    last_entries[entry.key] = entry
+                    instance.parse_errors.append(ParseError(line_number=line_number, line=entry.key,
+                                                            message=DUPLICATE_KEY))
+                else:
+                    keys.add(entry.key)
+        del keys
+
+        with open(file_path, "r", encoding="UTF-8") as file:
+            for _, entry in instance._parse_numbered_content(file, record_errors=False):
+                if entry.key not in last_entries:
+                    yield entry
+                    continue
+                # The later entries of the key are skipped.
+                last_entry = last_entries[entry.key]
+                if last_entry is not None:
+                    yield last_entry
+                    last_entries[entry.key] = None
+
     def get_key_list(self) -> List[str]:
         return list(self.dictionary.keys())
 
@@ -90,89 +149,124 @@ class SgMap:
                 item_count = item_count + 1
 
     def _validate_and_read_file(self, file_path: str):
+        self._validate_file_path(file_path)
+        return self._read_file(file_path)
+
+    @staticmethod
+    def _validate_file_path(file_path: str) -> None:
         if not file_path:
             raise ValueError("File path cannot be None")
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
-        return self._read_file(file_path)
 
+    @timed('sgmap.parse', count=result_length)
     def _read_file(self, input_file: str) -> Dict[str, ParsedEntry]:
         with open(input_file, "r", encoding="UTF-8") as file:
-            file_content = file.read()
-        return self._read_text(file_content)
+            # Returns parsed results in Dict type.
+            return {entry.key: entry for entry in self._parse_content(file)}
 
+    @timed('sgmap.parse', count=result_length)
     def _read_text(self, text: str) -> Dict[str, ParsedEntry]:
-        entries = list(self._parse_content(text))
+        # Lines are split at '\n' only, as the files are. A '\r' before it is kept in the value and comment.
         # Returns parsed results in Dict type.
-        return {entry.key: entry for entry in entries}
-
-    @staticmethod
-    def _create_parser():
-
-        equals = MatchFirst([
-            Literal('=\\').setResultsName('split_line_operator') + LineEnd() + Optional(White()),
-            Literal('==').setResultsName('double_equals'),
-            Literal('=').setResultsName('single_equal')
-        ])
-
-        # Define key content
-        key_characters = CharsNotIn('=', exact=1)
-        escaped_equal = Literal('\\=')
-        key_content = Combine(ZeroOrMore(escaped_equal | key_characters))
-
-        # Define value
-        value = restOfLine
-
-        # Define comment
-        comment_prefix = Suppress('#')
-        comment = Group(comment_prefix + White() + restOfLine('comment'))
-
-        # Define key-value pair
-        key_value_pair = Group(key_content('key') + equals + value('value') + LineEnd())
-
-        parser = OneOrMore(comment | key_value_pair) + StringEnd()
-
-        return parser
-
-    def _parse_content(self, file_content):
-        parser = self._create_parser()
-
-        try:
-            output_entry = None
-
-            parsed_items = list(parser.parseString(file_content))
-            for single_item in parsed_items:
-                if 'comment' in single_item:
-
-                    if output_entry:
-                        output_entry = output_entry._replace(comment=single_item.comment)
-                        yield output_entry
-                        output_entry = None
-
-                else:
-                    # If the item is a Key-Value pair
-                    if output_entry:
-                        yield output_entry
-
-                    key = single_item.key
-                    value = single_item.value
+        return {entry.key: entry for entry in self._parse_content(io.StringIO(text, newline='\n'))}
 
-                    # <key>==<value> indicates that no translation is needed.
-                    no_translation_needed = 'double_equals' in single_item
+    def _parse_content(self, lines: Iterable[str]) -> Iterator[ParsedEntry]:
+        for _, entry in self._parse_numbered_content(lines):
+            yield entry
 
-                    # For items with no translation, the parser returns value=None,
-                    # Since value is assumed to be a str, it is set to an empty string.
-                    if value is None:
-                        value = ''
+    def _parse_numbered_content(self, lines: Iterable[str],
+                                record_errors: bool = True) -> Iterator[Tuple[int, ParsedEntry]]:
+        """
+        Parses the mapping file line by line and yields each entry as soon as it is complete.
+
+        <key>=<value>     : Standard entry.
+        <key>==<value>    : No translation is needed.
+        <key>=\\          : The value is on the next non-blank line, whatever it contains.
+        # <comment>       : Comment of the preceding entry. '#' must be followed by whitespace.
+                            If nothing else follows, the next non-blank line is the comment.
+
+        '\\=' in a key is an escaped '=', and is kept as it is. A line such as '#key=value' is an entry.
+        These are the rules of the former pyparsing grammar.
+        Lines that cannot be parsed are recorded in parse_errors, unless record_errors is False, and skipped.
+        Nothing is printed; the scripts report parse_errors.
+        Yields (line number of the key, entry).
+        """
+        output_entry = None
+        output_line_number = 0
+
+        line_iterator = enumerate(lines, start=1)
+        for line_number, line in line_iterator:
+            line = line.rstrip('\n')
+            stripped_line = line.lstrip(_WHITESPACE)
+            if not stripped_line:
+                continue
+
+            if stripped_line.startswith('#') and stripped_line[1:2] in ('', ' ', '\t', '\r'):
+                comment = stripped_line[1:].lstrip(_WHITESPACE)
+                if not comment:
+                    comment = self._read_next_content(line_iterator)
+                # Only the first comment after an entry belongs to the entry.
+                if output_entry:
+                    yield output_line_number, output_entry._replace(comment=comment)
+                    output_entry = None
+                continue
+
+            # If the line is a Key-Value pair
+            if output_entry:
+                yield output_line_number, output_entry
+                output_entry = None
+
+            separator_index = self._find_key_separator(stripped_line)
+            if separator_index < 0:
+                if record_errors:
+                    self._add_parse_error(line_number, line, "'=' not found")
+                continue
+            output_line_number = line_number
+
+            key = stripped_line[:separator_index]
+            rest = stripped_line[separator_index + 1:]
+
+            # <key>==<value> indicates that no translation is needed.
+            no_translation_needed = False
+            if rest.rstrip(' \t\r') == '\\':
+                # The value is continued on the next line.
+                value = self._read_next_content(line_iterator)
+            elif rest.startswith('='):
+                no_translation_needed = True
+                value = rest[1:]
+            else:
+                value = rest
+
+            output_entry = ParsedEntry(
+                key=key, value=value, comment='', no_translation_needed=no_translation_needed)
+
+        if output_entry:
+            yield output_line_number, output_entry
 
-                    output_entry = ParsedEntry(
-                        key=key, value=value, comment='', no_translation_needed=no_translation_needed)
+    @staticmethod
+    def _read_next_content(line_iterator: Iterator[Tuple[int, str]]) -> str:
+        """
+        Skips the blank lines and returns the next line without its leading whitespace, or '' at the end of the file.
+        """
+        for _, line in line_iterator:
+            content = line.rstrip('\n').lstrip(_WHITESPACE)
+            if content:
+                return content
+        return ''
 
-            if output_entry:
-                yield output_entry
+    @staticmethod
+    def _find_key_separator(line: str) -> int:
+        """
+        Returns the index of the first '=' that is not escaped as '\\='.
+        """
+        index = line.find('=')
+        while index > 0 and line[index - 1] == '\\':
+            index = line.find('=', index + 1)
+        return index
 
-        except ParseException as pe:
-            print("Parsing failed:", pe)
+    def _add_parse_error(self, line_number: int, line: str, message: str) -> None:
+        self.parse_errors.append(ParseError(line_number=line_number, line=line, message=message))
 
     def print_entries(self):
         item_count = 0
@@ -189,6 +283,43 @@ class SgMap:
         return len(self.dictionary)
 
 
+class PackedEntries:
+    """Holds the entries of a mapping file in a single UTF-8 bytearray.
+
+    This takes about the size of the mapping file, a third of a list of ParsedEntry, and is passed to another
+    process as one object. Iterating yields the entries again as ParsedEntry, one at a time.
+    """
+    _SEPARATOR = b'\0'
+
+    def __init__(self, entries: Iterable[ParsedEntry]) -> None:
+        data = bytearray()
+        count = 0
+        for entry in entries:
+            fields = (entry.key, entry.value, entry.comment, '1' if entry.no_translation_needed else '')
+            if any('\0' in field for field in fields):
+                raise ValueError(f"Entry contains a NUL character: {entry.key!r}")
+            # Each entry is 4 fields, each of them followed by the separator.
+            data += ''.join(field + '\0' for field in fields).encode('UTF-8')
+            count += 1
+        self._data = data
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[ParsedEntry]:
+        data = self._data
+        separator = self._SEPARATOR
+        position = 0
+        for _ in range(self._count):
+            fields = []
+            for _ in range(4):
+                end = data.index(separator, position)
+                fields.append(data[position:end].decode('UTF-8'))
+                position = end + 1
+            yield ParsedEntry(key=fields[0], value=fields[1], comment=fields[2], no_translation_needed=fields[3] == '1')
+
+
 class CombinedSgMap:
     def __init__(self, master_map: SgMap, locale_map: SgMap, state_map: SgMap = None):
         self.dictionary = self._combine_entries(master_map, locale_map, state_map)
@@ -201,76 +332,63 @@ class CombinedSgMap:
         return list(self.dictionary.values())
 
     @staticmethod
-    def _determine_comment(master_entry: ParsedEntry, locale_entry: ParsedEntry) -> str:
-        if (locale_entry.comment.startswith('!=')) and (locale_entry.comment[2:] == master_entry.value):
-            comment = ''
-        else:
-            comment = locale_entry.comment
+    def iter_entries(master_entries: Iterable[ParsedEntry], locale_map: SgMap, state_map: SgMap = None) \
+            -> Iterator[CombinedEntry]:
+        """Yields the combined entry of each master entry, in the order of master_entries.
 
-        return comment
+        The locale and state entries are looked up by key, so master_entries can be streamed from
+        SgMap.iter_file() without building the master dictionary.
+        """
+        locale_dictionary = locale_map.dictionary
+        state_dictionary = state_map.dictionary if state_map is not None else None
+        for master_entry in master_entries:
+            locale_entry = locale_dictionary.get(master_entry.key)
+            if state_dictionary is None:
+                state_entry = master_entry
+            else:
+                state_entry = state_dictionary.get(master_entry.key, master_entry)
+            yield CombinedSgMap._combine_entry(master_entry, locale_entry, state_entry)
 
     @staticmethod
-    def _determine_previous_original_msg(master_entry: ParsedEntry, locale_entry: ParsedEntry,
-                                         state_entry: ParsedEntry) -> str:
-        if (state_entry.value != '') and (state_entry.value != master_entry.value):
-            previous_original_msg = state_entry.value
+    def _combine_entry(master_entry: ParsedEntry, locale_entry: ParsedEntry, state_entry: ParsedEntry) \
+            -> CombinedEntry:
+        """
+        locale_entry: None if the key is not in the locale mapping. The entry is untranslated then,
+        with the comment and no_translation_needed of the master entry.
+        """
+        if locale_entry is None:
+            translated_msg = ''
+            locale_comment = master_entry.comment
+            no_translation_needed = master_entry.no_translation_needed
         else:
-            previous_original_msg = None
-        if locale_entry.value == '':
-            previous_original_msg = None
-
-        return previous_original_msg
+            translated_msg = locale_entry.value
+            locale_comment = locale_entry.comment
+            no_translation_needed = locale_entry.no_translation_needed
 
-    @staticmethod
-    def _get_map_entry_tuple(key: str, master_map: SgMap, locale_map: SgMap, state_map: SgMap) \
-            -> Tuple[ParsedEntry, ParsedEntry, ParsedEntry]:
+        if locale_comment.startswith('!=') and locale_comment[2:] == master_entry.value:
+            comment = ''
+        else:
+            comment = locale_comment
 
-        master_entry = master_map.dictionary[key]
-        locale_entry = locale_map.dictionary.get(key, None)
-        state_entry = state_map.dictionary.get(key, None)
+        if state_entry.value != '' and state_entry.value != master_entry.value and translated_msg != '':
+            previous_original_msg = state_entry.value
+        else:
+            previous_original_msg = None
 
-        if locale_entry is None:
-            locale_entry = master_entry
-            locale_entry = locale_entry._replace(value="")
-        if state_entry is None:
-            state_entry = master_entry
+        fuzzy = (previous_original_msg is not None or locale_comment != '') and translated_msg != ''
 
-        return master_entry, locale_entry, state_entry
+        return CombinedEntry(key=master_entry.key,
+                             original_msg=master_entry.value,
+                             translated_msg=translated_msg,
+                             comment=comment,
+                             no_translation_needed=no_translation_needed,
+                             fuzzy=fuzzy,
+                             previous_original_msg=previous_original_msg,
+                             previous_translated_msg=''
+                             )
 
     @staticmethod
+    @timed('sgmap.combine_entries', count=result_length)
     def _combine_entries(master_map: SgMap, locale_map: SgMap, state_map: SgMap = None):
-
-        if state_map is None:
-            state_map = master_map
-
-        combined_dict = {}
-        for key in master_map.get_key_list():
-            master_entry, locale_entry, state_entry = \
-                CombinedSgMap._get_map_entry_tuple(key, master_map, locale_map, state_map)
-
-            comment = \
-                CombinedSgMap._determine_comment(master_entry, locale_entry)
-
-            previous_original_msg = \
-                CombinedSgMap._determine_previous_original_msg(master_entry, locale_entry, state_entry)
-
-            fuzzy = False
-            if previous_original_msg is not None:
-                fuzzy = True
-            elif locale_entry.comment != '':
-                fuzzy = True
-            if locale_entry.value == '':
-                fuzzy = False
-
-            combined_entry = CombinedEntry(key=key,
-                                           original_msg=master_entry.value,
-                                           translated_msg=locale_entry.value,
-                                           comment=comment,
-                                           no_translation_needed=locale_entry.no_translation_needed,
-                                           fuzzy=fuzzy,
-                                           previous_original_msg=previous_original_msg,
-                                           previous_translated_msg=''
-                                           )
-            combined_dict[key] = combined_entry
-
-        return combined_dict
+        return {entry.key: entry
+                for entry in CombinedSgMap.iter_entries(master_map.get_values(), locale_map, state_map)}
@@ -0,0 +1,150 @@
+import argparse
+import os
+from collections import namedtuple
+
+import phase_profiler
+import sgpo
+from delete_extracted_comments import delete_extracted_comments_from_pot
+from format_po_files import format_po
+from import_mismatch import import_mismatch_into_pot
+from import_pot import import_pot_into_po
+from import_unknown import import_unknown_into_pot
+from path_finder import PoPathFinder
+from sgpo import import_report, tail_import
+
+SyncResult = namedtuple('SyncResult', ['file', 'changed'])
+
+
+def main():
+    args = parse_args()
+    finder = PoPathFinder()
+
+    with phase_profiler.profiling(args):
+        results = sync_all(finder, dry_run=args.dry_run, verbosity=args.verbosity, report_json=args.report_json,
+                           full=args.full)
+
+    print('\n======== Result ========')
+    for result in results:
+        if not result.changed:
+            state = 'unchanged'
+        elif args.dry_run:
+            state = 'would be updated'
+        else:
+            state = 'updated'
+        print(f'{state}:\t{result.file}')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Runs import_unknown, import_mismatch, delete_extracted_comments, import_pot and format_po_files '
+                    'in one process. Each file is parsed once and written once.')
+    parser.add_argument('-n', '--dry-run', action='store_true',
+                        help='report the files that would change without writing them')
+    parser.add_argument('--full', action='store_true',
+                        help='import the whole unknown and mismatch files, not only the entries appended since '
+                             'the previous import')
+    import_report.add_arguments(parser)
+    phase_profiler.add_arguments(parser)
+    return parser.parse_args()
+
+
+def sync_all(finder: PoPathFinder, dry_run: bool = False, verbosity: int = import_report.VERBOSITY_SUMMARY,
+             report_json: str = None, full: bool = False) -> list:
+    """
+    Runs the steps of the individual scripts, in the same order, on files loaded into memory.
+    Only the files whose content has changed are written at the end.
+    As with import_unknown.py and import_mismatch.py, only the entries appended to the unknown and mismatch files
+    since the previous import are imported, unless full is True, and the checkpoints are updated after saving.
+    The import reports are printed with the given verbosity, and written to report_json if it is given.
+    """
+    pot_file = finder.get_pot_file()
+    unknown_file = finder.get_unknown_file()
+    mismatch_file = finder.get_mismatch_file()
+    po_files = sorted(finder.get_po_files(translation_file_only=True))
+
+    # Load all files once
+    pot = _load(pot_file)
+    pos = {po_file: _load(po_file) for po_file in po_files}
+    reports = []
+    # The checkpoints are read against the pot file on disk, before anything is changed.
+    new_entries_list = []
+
+    # import_unknown.py
+    if os.path.exists(unknown_file):
+        print(f'unknown file:\t{unknown_file}')
+        new_entries = tail_import.read_new_entries(unknown_file, pot_file, full=full)
+        if new_entries.entries is None:
+            print(f'no new entries since byte {new_entries.start_offset}.')
+        else:
+            reports.append(import_unknown_into_pot(pot, new_entries, verbosity))
+            new_entries_list.append(new_entries)
+    else:
+        print(f'unknown file not found (Skipped):\t{unknown_file}')
+
+    # import_mismatch.py
+    if os.path.exists(mismatch_file):
+        print(f'mismatch file:\t{mismatch_file}')
+        new_entries = tail_import.read_new_entries(mismatch_file, pot_file, full=full)
+        if new_entries.entries is None:
+            print(f'no new entries since byte {new_entries.start_offset}.')
+        else:
+            reports.append(import_mismatch_into_pot(pot, new_entries, verbosity))
+            new_entries_list.append(new_entries)
+    else:
+        print(f'mismatch file not found (Skipped):\t{mismatch_file}')
+
+    # delete_extracted_comments.py
+    delete_extracted_comments_from_pot(pot)
+
+    # import_pot.py
+    for po_file, po in pos.items():
+        print(f' po file:\t{po_file}')
+        reports.append(import_pot_into_po(po, pot, verbosity))
+
+    # format_po_files.py
+    for po in pos.values():
+        _drop_unread_previous_msgids(po)
+        format_po(po)
+
+    if report_json:
+        import_report.write_json_report(reports, report_json)
+
+    # Write each changed file once
+    results = []
+    for file, po in [(pot_file, pot)] + list(pos.items()):
+        if dry_run:
+            changed = po.differs_from_file(file)
+        else:
+            changed = po.save(file, only_if_changed=True)
+        results.append(SyncResult(file=file, changed=changed))
+
+    if not dry_run:
+        # The imported entries are skipped next time.
+        for new_entries in new_entries_list:
+            tail_import.commit(new_entries, pot_file)
+
+    return results
+
+
+def _load(file: str) -> sgpo.SgPo:
+    if not os.path.exists(file):
+        raise FileNotFoundError(f"File not found: {file}")
+    return sgpo.pofile(file)
+
+
+def _drop_unread_previous_msgids(po: sgpo.SgPo) -> None:
+    """
+    format_po_files.py loads the po file written by import_pot.py, and polib does not read the previous msgid of
+    obsolete entries ('#~|'). Dropping it here gives the same file as the scripts, which does not change again when
+    it is loaded and saved.
+    """
+    for entry in po:
+        if entry.obsolete:
+            # CompactEntry has no previous_msgctxt and previous_msgid_plural to clear.
+            for name in ('previous_msgctxt', 'previous_msgid', 'previous_msgid_plural'):
+                if getattr(entry, name) is not None:
+                    setattr(entry, name, None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+import sgpo
+from benchmarks import run_benchmarks, compare_with_baseline, load_baseline, save_results, BenchmarkResult, synthetic
+from benchmarks.datasets import create_synthetic_dataset, parse_size
+from path_finder import PoPathFinder
+from sgv23_mapping import SgMap, CombinedSgMap
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_parse_size(self):
+        self.assertEqual(500, parse_size('500'))
+        self.assertEqual(10000, parse_size('10k'))
+        self.assertEqual(1000000, parse_size('1M'))
+
+    def test_synthetic_dataset(self):
+        dataset = create_synthetic_dataset(100)
+
+        self.assertEqual(100, dataset.pot_text.count('\nmsgctxt '))
+        self.assertEqual(create_synthetic_dataset(100), dataset)
+
+    def test_synthetic_catalog_key_shapes(self):
+        catalog = synthetic.generate(synthetic.GeneratorOptions(size=2000, seed=1))
+        pot = sgpo.pofile_from_text(catalog.pot_text)
+        po = sgpo.pofile_from_text(catalog.po_text)
+
+        msgctxts = [entry.msgctxt for entry in pot]
+        self.assertEqual(2000, len(pot))
+        self.assertTrue(any(msgctxt.startswith('*.') for msgctxt in msgctxts))
+        self.assertTrue(any(msgctxt.startswith('(') and '|' in msgctxt for msgctxt in msgctxts))
+        self.assertTrue(any(not msgctxt.endswith(':') for msgctxt in msgctxts))
+        self.assertTrue(any('\\' in entry.msgid for entry in pot))
+        self.assertTrue(any(entry.msgid.startswith('<html>') for entry in pot))
+        self.assertTrue(any(entry.fuzzy and entry.previous_msgid for entry in po))
+        self.assertTrue(any(entry.obsolete for entry in po))
+        self.assertTrue(po.untranslated_entries())
+        self.assertTrue(pot.is_sorted())
+
+        self.assertEqual(catalog, synthetic.generate(synthetic.GeneratorOptions(size=2000, seed=1)))
+        self.assertNotEqual(catalog.pot_text, synthetic.generate(synthetic.GeneratorOptions(size=2000, seed=2)).pot_text)
+
+    def test_synthetic_catalog_file_sets_match(self):
+        catalog = synthetic.generate(synthetic.GeneratorOptions(size=1000, new_ratio=0.05, changed_ratio=0.02,
+                                                                removed_ratio=0.03))
+        self.assertEqual((50, 20, 30),
+                         (len(catalog.new_keys), len(catalog.changed_keys), len(catalog.removed_keys)))
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            pot = sgpo.pofile_from_text(catalog.pot_text)
+            pot.import_unknown(sgpo.pofile_from_text(catalog.unknown_text))
+            pot.import_mismatch(sgpo.pofile_from_text(catalog.mismatch_text))
+            po = sgpo.pofile_from_text(catalog.po_text)
+            po.import_pot(pot)
+
+        self.assertTrue(all(pot.find_by_key(*key) is not None for key in catalog.new_keys))
+        self.assertTrue(all(pot.find_by_key(*key).previous_msgid is not None for key in catalog.changed_keys))
+        self.assertTrue(all(po.find_by_key(*key).obsolete for key in catalog.removed_keys))
+
+        master_map = SgMap.from_text(catalog.master_map_text, 'en_US')
+        locale_map = SgMap.from_text(catalog.locale_map_text, 'xx_XX')
+        state_map = SgMap.from_text(catalog.state_map_text, 'xx_XX')
+        self.assertEqual([], master_map.parse_errors + locale_map.parse_errors + state_map.parse_errors)
+        self.assertEqual(len(pot), master_map.number_of_entries)
+        combined_map = CombinedSgMap(master_map, locale_map, state_map)
+        self.assertTrue(any(entry.previous_original_msg for entry in combined_map.get_values()))
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            synthetic.write_file_set(catalog, temp_dir)
+            finder = PoPathFinder(temp_dir)
+            self.assertEqual(catalog.po_text, sgpo.pofile(finder.get_po_files()[0]).__unicode__())
+            self.assertTrue(os.path.exists(finder.get_unknown_file()))
+            self.assertTrue(os.path.exists(finder.get_mismatch_file()))
+            self.assertTrue(os.path.exists(os.path.join(temp_dir, 'xx-XX', 'mapping.state')))
+
+    def test_run_benchmarks(self):
+        results = run_benchmarks(['100'], repeat=1, log=lambda message: None)
+
+        names = [result.name for result in results]
+        self.assertIn('pofile@100', names)
+        self.assertIn('import_pot@100', names)
+        self.assertIn('combined_sgmap@100', names)
+        self.assertTrue(all(result.seconds >= 0 and result.peak_memory_bytes > 0 for result in results
+                            if not result.name.startswith('save@')))
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            result_file = os.path.join(temp_dir, 'results.json')
+            save_results(results, result_file)
+            baseline = load_baseline(result_file)
+
+        self.assertEqual(results, [baseline[name] for name in names])
+        self.assertEqual([], compare_with_baseline(results, baseline, threshold=0.25, memory_threshold=0.1))
+
+    def test_compare_with_baseline(self):
+        baseline = {
+            'sort@100': BenchmarkResult('sort@100', '100', 100, 0.100, 0.100, 1000),
+            'save@100': BenchmarkResult('save@100', '100', 100, 0.001, 0.001, 1000),
+        }
+        results = [
+            BenchmarkResult('sort@100', '100', 100, 0.200, 0.200, 2000),
+            # Below MIN_SECONDS_DIFFERENCE
+            BenchmarkResult('save@100', '100', 100, 0.002, 0.002, 1050),
+            # Not in the baseline
+            BenchmarkResult('format@100', '100', 100, 1.0, 1.0, 1000),
+        ]
+
+        regressions = compare_with_baseline(results, baseline, threshold=0.25, memory_threshold=0.1)
+
+        self.assertEqual([('sort@100', 'seconds', 2.0), ('sort@100', 'peak_memory_bytes', 2.0)],
+                         [(regression.name, regression.metric, regression.ratio) for regression in regressions])
+        self.assertEqual([], compare_with_baseline(results, baseline, threshold=1.5, memory_threshold=1.5))
+
+if __name__ == '__main__':
+    unittest.main()
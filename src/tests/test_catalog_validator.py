@@ -0,0 +1,181 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+import sgpo
+from benchmarks import synthetic
+from path_finder import PoPathFinder
+from sgpo import catalog_validator
+from sgpo.catalog_validator import ISSUE_DUPLICATE, ISSUE_SHADOWED, ISSUE_CONFLICT
+from validate_po_files import validate_po_files
+
+
+class TestCatalogValidator(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write_file(self, name: str, text: str) -> str:
+        file = os.path.join(self.temp_dir, name)
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        with open(file, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return file
+
+    def test_validate_file(self):
+        file = self.write_file('ja_JP.po', validator_test_data)
+        with self.assertRaises(ValueError):
+            sgpo.pofile(file)
+
+        report = catalog_validator.validate_file(file)
+
+        self.assertEqual(12, report.entry_count)
+        self.assertEqual([(ISSUE_SHADOWED, 9, 'dlgCommit.lblMessage', 'Another message', 5),
+                          (ISSUE_DUPLICATE, 21, 'dlgCommit.btn:', 'OK', 13),
+                          (ISSUE_CONFLICT, 29, 'wnd(Log|Project).mni:', 'Open', 25),
+                          (ISSUE_CONFLICT, 33, 'wnd(Project|Std).mni:', 'Open', 29),
+                          (ISSUE_CONFLICT, 41, '*.(hnt|ttp):', 'Filter', 37),
+                          (ISSUE_DUPLICATE, 49, 'dlgCommit.btn:', 'OK', 13)],
+                         [(issue.kind, issue.linenum, issue.msgctxt, issue.msgid, issue.other_linenum)
+                          for issue in report.issues])
+        self.assertEqual(['wndLog.mni:', 'wndProject.mni:', '*.hnt:', 'dlgCommit.btn:'],
+                         [issue.key.msgctxt for issue in report.issues[2:]])
+        self.assertEqual(3, len(report.errors))
+        self.assertEqual(3, len(report.warnings))
+        self.assertFalse(report.is_valid())
+
+        self.assertEqual(f'{file}:21: duplicate: msgctxt "dlgCommit.btn:" msgid "OK" (same as line 13)',
+                         catalog_validator.format_issue(report.issues[1], file))
+        self.assertIn('(hidden by line 5: msgid "Message")', catalog_validator.format_issue(report.issues[0]))
+        self.assertIn('(expands to "wndLog.mni:", already defined by line 25: msgctxt "wndLog.mni:")',
+                      catalog_validator.format_issue(report.issues[2]))
+
+    def test_valid_catalog(self):
+        catalog = synthetic.generate(synthetic.GeneratorOptions(size=2000, seed=7))
+        for text in (catalog.pot_text, catalog.po_text):
+            report = catalog_validator.validate_file(self.write_file('messages.pot', text))
+            self.assertEqual([], report.errors)
+            self.assertTrue(report.is_valid())
+
+        # An SgPo can be validated too, for example after editing it.
+        po = sgpo.pofile_from_text(catalog.po_text)
+        entry = next(entry for entry in po if not entry.obsolete and not entry.msgctxt.endswith(':'))
+        list.append(po, sgpo.pofile_from_text(f'#\nmsgctxt "{entry.msgctxt}"\nmsgid "changed"\nmsgstr ""\n')[0])
+        issues = catalog_validator.validate_entries(po)
+        self.assertEqual([ISSUE_SHADOWED], [issue.kind for issue in issues if issue.kind != ISSUE_CONFLICT])
+
+    def test_obsolete_duplicates(self):
+        po = sgpo.pofile_from_text(obsolete_duplicate_test_data)
+        issues = catalog_validator.validate_entries(po)
+
+        # The obsolete entries neither shadow the active ones nor are shadowed by them. The active entry that comes
+        # after the first active one is shadowed by it, although find_by_key() returns the obsolete entry.
+        self.assertTrue(po.find_by_key('dlgCommit.lblMessage', None).obsolete)
+        self.assertEqual([(ISSUE_SHADOWED, 10, 'Another message', 6, 'Message')],
+                         [(issue.kind, issue.linenum, issue.msgid, issue.other_linenum, issue.other_msgid)
+                          for issue in issues])
+
+    def test_validate_po_files(self):
+        finder = PoPathFinder(self.temp_dir)
+        self.write_file(os.path.join('po', 'messages.pot'), validator_test_data.split('#~')[0])
+        self.write_file(os.path.join('po', 'ja_JP.po'), validator_test_data)
+
+        with contextlib.redirect_stdout(io.StringIO()) as log:
+            self.assertFalse(validate_po_files(finder=finder))
+        self.assertIn('5 errors, 6 warnings in 2 files', log.getvalue())
+        self.assertIn('ja_JP.po:21: duplicate:', log.getvalue())
+
+        self.write_file(os.path.join('po', 'ja_JP.po'), conflict_only_test_data)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertTrue(validate_po_files([os.path.join(finder.get_po_file_dir(), 'ja_JP.po')]))
+            self.assertFalse(validate_po_files([os.path.join(finder.get_po_file_dir(), 'ja_JP.po')], strict=True))
+
+
+validator_test_data = r"""msgid ""
+msgstr ""
+"Content-Type: text/plain; charset=UTF-8\n"
+
+msgctxt "dlgCommit.lblMessage"
+msgid "Message"
+msgstr ""
+
+msgctxt "dlgCommit.lblMessage"
+msgid "Another message"
+msgstr ""
+
+msgctxt "dlgCommit.btn:"
+msgid "OK"
+msgstr ""
+
+msgctxt "dlgCommit.btn:"
+msgid "Cancel"
+msgstr ""
+
+msgctxt "dlgCommit.btn:"
+msgid "OK"
+msgstr "OK"
+
+msgctxt "wndLog.mni:"
+msgid "Open"
+msgstr ""
+
+msgctxt "wnd(Log|Project).mni:"
+msgid "Open"
+msgstr ""
+
+msgctxt "wnd(Project|Std).mni:"
+msgid "Open"
+msgstr ""
+
+msgctxt "*.hnt:"
+msgid "Filter"
+msgstr ""
+
+msgctxt "*.(hnt|ttp):"
+msgid "Filter"
+msgstr ""
+
+msgctxt "dlgPush.hnt:"
+msgid "Filter"
+msgstr ""
+
+#~ msgctxt "dlgCommit.btn:"
+#~ msgid "OK"
+#~ msgstr ""
+"""
+
+obsolete_duplicate_test_data = r"""#
+#~ msgctxt "dlgCommit.lblMessage"
+#~ msgid "Old message"
+#~ msgstr ""
+
+msgctxt "dlgCommit.lblMessage"
+msgid "Message"
+msgstr ""
+
+msgctxt "dlgCommit.lblMessage"
+msgid "Another message"
+msgstr ""
+
+#~ msgctxt "dlgCommit.lblMessage"
+#~ msgid "Newer old message"
+#~ msgstr ""
+"""
+
+conflict_only_test_data = r"""#
+msgctxt "wndLog.mni:"
+msgid "Open"
+msgstr ""
+
+msgctxt "wnd(Log|Project).mni:"
+msgid "Open"
+msgstr ""
+"""
+
+if __name__ == '__main__':
+    unittest.main()
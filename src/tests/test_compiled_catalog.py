@@ -0,0 +1,166 @@
+import contextlib
+import io
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+import unittest.mock
+
+import sgpo
+from benchmarks import synthetic
+from compile_po_files import compile_po_files
+from path_finder import PoPathFinder
+from sgpo import compiled_catalog
+from sgpo.compiled_catalog import CompiledCatalog, CatalogFormatError
+
+
+class TestCompiledCatalog(unittest.TestCase):
+    def setUp(self):
+        self.catalog = synthetic.generate(synthetic.GeneratorOptions(size=2000, seed=5))
+        self.po = sgpo.pofile_from_text(self.catalog.po_text)
+        self.temp_dir = tempfile.mkdtemp()
+        self.catalog_file = os.path.join(self.temp_dir, 'ja_JP.sgcat')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def get_expected_entries(self) -> dict:
+        entries = {}
+        for entry in self.po:
+            if not entry.obsolete and entry.msgctxt is not None:
+                entries.setdefault(sgpo.SgPo._po_entry_to_key_tuple(entry), entry)
+        return entries
+
+    def test_find_by_key(self):
+        compiled_catalog.write_catalog(self.po, self.catalog_file)
+        expected_entries = self.get_expected_entries()
+
+        with CompiledCatalog(self.catalog_file) as catalog:
+            self.assertEqual(len(expected_entries), len(catalog))
+            for key, expected in expected_entries.items():
+                entry = catalog.find_by_key(expected.msgctxt, expected.msgid)
+                self.assertEqual((expected.msgctxt, expected.msgid, expected.msgstr),
+                                 (entry.msgctxt, entry.msgid, entry.msgstr))
+                self.assertEqual(expected.fuzzy, entry.fuzzy)
+                self.assertEqual(not expected.msgstr, entry.untranslated)
+                self.assertEqual(expected.translated(), entry.translated)
+                self.assertIn(key, catalog)
+
+            self.assertTrue(any(entry.fuzzy for entry in catalog))
+            self.assertTrue(any(entry.untranslated for entry in catalog))
+            self.assertEqual([entry.msgctxt for entry in expected_entries.values()],
+                             [entry.msgctxt for entry in catalog])
+
+            # The msgid is part of the key only if the msgctxt ends with ':'.
+            key = next(key for key in expected_entries if key.msgid is None)
+            self.assertIsNotNone(catalog.find_by_key(key.msgctxt, 'another msgid'))
+            key = next(key for key in expected_entries if key.msgid is not None)
+            self.assertIsNone(catalog.find_by_key(key.msgctxt, 'another msgid'))
+            self.assertIsNone(catalog.find_by_key('no.such.key'))
+            self.assertIsNone(catalog.find_by_key(None, 'msgid'))
+            obsolete_keys = [sgpo.SgPo._po_entry_to_key_tuple(entry) for entry in self.po if entry.obsolete]
+            self.assertTrue(obsolete_keys)
+            for key in obsolete_keys:
+                if key not in expected_entries:
+                    self.assertIsNone(catalog.find_by_key(*key))
+
+    def test_translate(self):
+        compiled_catalog.write_catalog(self.po, self.catalog_file)
+
+        with CompiledCatalog(self.catalog_file) as catalog:
+            for entry in self.get_expected_entries().values():
+                expected = entry.msgstr if entry.translated() else 'default'
+                self.assertEqual(expected, catalog.translate(entry.msgctxt, entry.msgid, default='default'))
+            self.assertIsNone(catalog.translate('no.such.key'))
+
+    def test_metadata_and_deterministic_output(self):
+        self.assertEqual(compiled_catalog.compile_catalog(self.po), compiled_catalog.compile_catalog(self.po))
+        self.assertTrue(compiled_catalog.write_catalog(self.po, self.catalog_file, only_if_changed=True))
+        self.assertFalse(compiled_catalog.write_catalog(self.po, self.catalog_file, only_if_changed=True))
+
+        with CompiledCatalog(self.catalog_file) as catalog:
+            self.assertEqual(self.po.metadata, catalog.metadata)
+
+        # Names and values can contain any character.
+        self.po.metadata['X-Comment'] = 'line 1\nName: line 2\n'
+        self.po.metadata['X-Empty'] = ''
+        compiled_catalog.write_catalog(self.po, self.catalog_file)
+        with CompiledCatalog(self.catalog_file) as catalog:
+            self.assertEqual(self.po.metadata, catalog.metadata)
+
+    def test_failed_write_leaves_no_temporary_file(self):
+        compiled_catalog.write_catalog(self.po, self.catalog_file)
+        with open(self.catalog_file, 'rb') as file:
+            data = file.read()
+
+        self.po.metadata['X-Comment'] = 'changed'
+        with unittest.mock.patch('os.fsync', side_effect=OSError('No space left on device')):
+            self.assertRaises(OSError, compiled_catalog.write_catalog, self.po, self.catalog_file)
+
+        self.assertEqual(['ja_JP.sgcat'], os.listdir(self.temp_dir))
+        with open(self.catalog_file, 'rb') as file:
+            self.assertEqual(data, file.read())
+
+    def test_empty_catalog(self):
+        compiled_catalog.write_catalog(sgpo.pofile_from_text('#\n'), self.catalog_file)
+
+        with CompiledCatalog(self.catalog_file) as catalog:
+            self.assertEqual(0, len(catalog))
+            self.assertIsNone(catalog.find_by_key('key'))
+
+    def test_invalid_files(self):
+        data = compiled_catalog.compile_catalog(self.po)
+
+        def write(content: bytes) -> None:
+            with open(self.catalog_file, 'wb') as file:
+                file.write(content)
+
+        def assert_invalid(content: bytes, message: str, verify: bool = False):
+            write(content)
+            with self.assertRaisesRegex(CatalogFormatError, message):
+                CompiledCatalog(self.catalog_file, verify=verify)
+
+        assert_invalid(b'', 'not a compiled catalog')
+        assert_invalid(self.catalog.po_text.encode('utf-8'), 'not a compiled catalog')
+        version_offset = len(compiled_catalog.MAGIC)
+        assert_invalid(data[:version_offset] + b'\x01' + data[version_offset + 1:], 'unsupported format version')
+        assert_invalid(data[:version_offset + 4] + b'\x00' + data[version_offset + 5:], 'header checksum mismatch')
+        assert_invalid(data[:-1], 'corrupted')
+
+        # A changed string is only detected by the checksum of the whole file.
+        corrupted = data[:-100] + bytes([data[-100] ^ 0x20]) + data[-99:]
+        assert_invalid(corrupted, 'checksum mismatch', verify=True)
+        write(corrupted)
+        CompiledCatalog(self.catalog_file).close()
+        write(data)
+        CompiledCatalog(self.catalog_file, verify=True).close()
+
+        # A lookup in a hash table without empty bucket ends with an error.
+        _, _, entry_count, bucket_count, buckets_offset = struct.unpack_from('<8s4I', data)
+        full_buckets = struct.pack(f'<{bucket_count}I', *([entry_count] * bucket_count))
+        write(data[:buckets_offset] + full_buckets + data[buckets_offset + len(full_buckets):])
+        with CompiledCatalog(self.catalog_file) as catalog:
+            self.assertRaises(ValueError, catalog.find_by_key, 'no.such.key')
+
+    def test_compile_po_files(self):
+        finder = PoPathFinder(self.temp_dir)
+        os.makedirs(finder.get_po_file_dir())
+        with open(finder.get_pot_file(), 'w', encoding='utf-8') as file:
+            file.write(self.catalog.pot_text)
+        with open(os.path.join(finder.get_po_file_dir(), 'ja_JP.po'), 'w', encoding='utf-8') as file:
+            file.write(self.catalog.po_text)
+        output_dir = os.path.join(self.temp_dir, 'catalogs')
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            written_files = compile_po_files(output_dir, finder)
+            self.assertEqual([], compile_po_files(output_dir, finder))
+
+        self.assertEqual([os.path.join(output_dir, 'messages.sgcat'), os.path.join(output_dir, 'ja_JP.sgcat')],
+                         written_files)
+        with CompiledCatalog(written_files[0]) as catalog:
+            self.assertTrue(all(entry.untranslated for entry in catalog))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import sgpo
+from import_pot import import_pot_to_po_files
+from path_finder import get_repository_root
+
+
+def get_test_data_path(*paths: str) -> str:
+    return os.path.join(get_repository_root(), "src", "tests", "data", "test_sgpo", *paths)
+
+
+class TestImportPot(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def create_po_file(self, file_name: str, source_file: str) -> str:
+        po_file = os.path.join(self.temp_dir, file_name)
+        shutil.copyfile(source_file, po_file)
+        return po_file
+
+    def test_import_pot_to_po_files_in_parallel(self):
+        pot = sgpo.pofile(get_test_data_path('import_pot', 'case_2_messages.pot'))
+        expected_result = sgpo.pofile(get_test_data_path('import_pot', 'case_2_expected_result.po'))
+        po_files = [self.create_po_file(file_name, get_test_data_path('import_pot', 'case_2_language.po'))
+                    for file_name in ('ja_JP.po', 'zh_CN.po', 'ru_RU.po')]
+
+        results = import_pot_to_po_files(pot, po_files, jobs=2)
+
+        self.assertEqual(po_files, [result.po_file for result in results])
+        for result in results:
+            self.assertIsNone(result.error)
+            self.assertIn('modified entry:\t1', result.log)
+            self.assertEqual(expected_result.__unicode__(), sgpo.pofile(result.po_file).__unicode__())
+
+    def test_import_pot_to_po_files_continues_after_failure(self):
+        pot = sgpo.pofile(get_test_data_path('import_pot', 'case_2_messages.pot'))
+        expected_result = sgpo.pofile(get_test_data_path('import_pot', 'case_2_expected_result.po'))
+        po_files = [os.path.join(self.temp_dir, 'ja_JP.po'),
+                    self.create_po_file('zh_CN.po', get_test_data_path('import_pot', 'case_2_language.po'))]
+
+        results = import_pot_to_po_files(pot, po_files, jobs=2)
+
+        self.assertIn('FileNotFoundError', results[0].error)
+        self.assertIsNone(results[1].error)
+        self.assertEqual(expected_result.__unicode__(), sgpo.pofile(po_files[1]).__unicode__())
+
+
+if __name__ == '__main__':
+    unittest.main()
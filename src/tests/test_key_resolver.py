@@ -0,0 +1,126 @@
+import unittest
+
+import sgpo
+from sgpo.key_resolver import KeyResolver, expand_alternations, MATCH_EXACT, MATCH_ALTERNATION, MATCH_WILDCARD
+
+
+class TestKeyResolver(unittest.TestCase):
+    def setUp(self):
+        self.po = sgpo.pofile_from_text(resolver_test_data)
+        self.resolver = KeyResolver(self.po)
+
+    def assert_resolved(self, msgctxt: str, msgid: str, expected_msgctxt: str, expected_match: str):
+        resolution = self.resolver.resolve(msgctxt, msgid)
+        self.assertEqual(expected_match, resolution.match)
+        self.assertIsNotNone(resolution.entry)
+        self.assertEqual(expected_msgctxt, resolution.entry.msgctxt)
+
+    def test_expand_alternations(self):
+        self.assertEqual(['wndLog.mni:', 'wndProject.mni:', 'wnd.mni:'], expand_alternations('wnd(Log|Project|).mni:'))
+        self.assertEqual(['aXc', 'aXd', 'aYc', 'aYd'], expand_alternations('a(X|Y)(c|d)'))
+        self.assertIsNone(expand_alternations('dlgCommit.btn:'))
+        self.assertIsNone(expand_alternations('dlg(Commit).btn:'))
+
+    def test_exact(self):
+        self.assert_resolved('wndLog.mni:', 'Open', 'wndLog.mni:', MATCH_EXACT)
+        self.assert_resolved('wndLog.lblStatusBarMessage', 'any msgid', 'wndLog.lblStatusBarMessage', MATCH_EXACT)
+        # The msgctxt of a pattern resolves its own entry.
+        self.assert_resolved('wnd(Log|Project|).mni:', 'Close', 'wnd(Log|Project|).mni:', MATCH_EXACT)
+
+    def test_alternation(self):
+        self.assert_resolved('wndProject.mni:', 'Open', 'wnd(Log|Project|).mni:', MATCH_ALTERNATION)
+        self.assert_resolved('wnd.mni:', 'Close', 'wnd(Log|Project|).mni:', MATCH_ALTERNATION)
+        self.assert_resolved('wndProject.lblStatusBarMessage', 'msg', '(wndLog|wndProject).lblStatusBarMessage',
+                             MATCH_ALTERNATION)
+        self.assertIsNone(self.resolver.resolve('wndStd.mni:', 'Open').entry)
+
+    def test_wildcard(self):
+        self.assert_resolved('dlgCommit.btn:', 'Cancel', '*.btn:', MATCH_WILDCARD)
+        # The longest suffix wins.
+        self.assert_resolved('dlgCommit.btnOk:', 'OK', '*.btnOk:', MATCH_WILDCARD)
+        self.assert_resolved('dlgCommit.btn:', 'OK', '*.btn:', MATCH_WILDCARD)
+        # An alternation behind a wildcard
+        self.assert_resolved('dlgPush.hnt:', 'Filter', '*.(hnt|ttp):', MATCH_WILDCARD)
+        self.assert_resolved('dlgPush.ttp:', 'Filter', '*.(hnt|ttp):', MATCH_WILDCARD)
+        # The wildcard matches at least one character, and the msgid is part of the key.
+        self.assertIsNone(self.resolver.resolve('.btn:', 'Cancel').entry)
+        self.assertIsNone(self.resolver.resolve('dlgCommit.btn:', 'Unknown').entry)
+
+    def test_without_msgctxt(self):
+        # Entries without msgctxt are valid po input. They match no wildcard, even with the msgid of a wildcard entry.
+        self.assertEqual((None, 'Cancel', None, None), self.resolver.resolve(None, 'Cancel'))
+        self.assertEqual(('', 'Cancel', None, None), self.resolver.resolve('', 'Cancel'))
+        entry = sgpo.pofile_from_text('#\nmsgid "Cancel"\nmsgstr ""\n')[0]
+        self.assertIsNone(self.resolver.resolve_entry(entry).entry)
+
+    def test_precedence(self):
+        self.assert_resolved('wndLog.btn:', 'Cancel', 'wndLog.btn:', MATCH_EXACT)
+        self.assert_resolved('wndProject.btn:', 'Cancel', '(wndLog|wndProject).btn:', MATCH_ALTERNATION)
+        self.assert_resolved('wndStd.btn:', 'Cancel', '*.btn:', MATCH_WILDCARD)
+
+    def test_obsolete_entries_are_ignored(self):
+        self.assertIsNone(self.resolver.resolve('dlgObsolete.lbl', None).entry)
+
+    def test_resolve_all(self):
+        keys = [('wndLog.mni:', 'Open'), ('wndProject.mni:', 'Open'), ('dlgCommit.btn:', 'Cancel'), ('unknown', None)]
+        resolutions = self.resolver.resolve_all(keys)
+
+        self.assertEqual(keys, [(resolution.msgctxt, resolution.msgid) for resolution in resolutions])
+        self.assertEqual([MATCH_EXACT, MATCH_ALTERNATION, MATCH_WILDCARD, None],
+                         [resolution.match for resolution in resolutions])
+        self.assertEqual([self.resolver.resolve_entry(entry) for entry in self.po],
+                         self.resolver.resolve_all((entry.msgctxt, entry.msgid) for entry in self.po))
+
+
+resolver_test_data = r"""#
+msgctxt "(wndLog|wndProject).btn:"
+msgid "Cancel"
+msgstr "Cancel (window)"
+
+msgctxt "(wndLog|wndProject).lblStatusBarMessage"
+msgid "Status"
+msgstr "Status (alternation)"
+
+msgctxt "*.(hnt|ttp):"
+msgid "Filter"
+msgstr "Filter (wildcard)"
+
+msgctxt "*.btn:"
+msgid "Cancel"
+msgstr "Cancel (wildcard)"
+
+msgctxt "*.btn:"
+msgid "OK"
+msgstr "OK (wildcard)"
+
+msgctxt "*.btnOk:"
+msgid "OK"
+msgstr "OK (specific wildcard)"
+
+msgctxt "wnd(Log|Project|).mni:"
+msgid "Close"
+msgstr "Close (alternation)"
+
+msgctxt "wnd(Log|Project|).mni:"
+msgid "Open"
+msgstr "Open (alternation)"
+
+msgctxt "wndLog.btn:"
+msgid "Cancel"
+msgstr "Cancel (exact)"
+
+msgctxt "wndLog.lblStatusBarMessage"
+msgid "Status"
+msgstr "Status (exact)"
+
+msgctxt "wndLog.mni:"
+msgid "Open"
+msgstr "Open (exact)"
+
+#~ msgctxt "dlgObsolete.lbl"
+#~ msgid "Obsolete"
+#~ msgstr ""
+"""
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,15 @@
+import contextlib
+import io
+import shutil
+import tempfile
 import unittest
+import unittest.mock
 
-from locale2po import CombinedSgMap_to_po
+from benchmarks import synthetic
+from locale2po import CombinedSgMap_to_po, convert_to_po_file, locale2po, parse_locales
+from master2pot import master2pot, master_entries_to_pot_file
 from sgpo_common import *
-from sgv23_mapping import SgMap, CombinedSgMap
+from sgv23_mapping import SgMap, CombinedSgMap, DUPLICATE_KEY
 
 
 def create_combined_sg_map(master_str: str, locale_str: str, state_str: str, locale_code: str) -> CombinedSgMap:
@@ -201,8 +208,187 @@ class TestCombinedSgMapToPoFile(unittest.TestCase):
         print(po)
 
 
+class TestStreamingConversion(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        catalog = synthetic.generate(synthetic.GeneratorOptions(size=500, seed=5, locale_code='zh_CN'))
+        self.master_map_file = self.write_file('mapping', catalog.master_map_text)
+        self.locale_map = SgMap.from_text(catalog.locale_map_text, 'zh_CN')
+        self.state_map = SgMap.from_text(catalog.state_map_text, 'zh_CN')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write_file(self, name: str, text: str) -> str:
+        path = os.path.join(self.temp_dir, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(text)
+        return path
+
+    def read_file(self, name: str) -> str:
+        with open(os.path.join(self.temp_dir, name), 'r', encoding='utf-8') as file:
+            return file.read()
+
+    def test_locale_same_as_polib(self):
+        master_map = SgMap(self.master_map_file, 'en_US')
+        po = CombinedSgMap_to_po(CombinedSgMap(master_map, self.locale_map, self.state_map))
+        po.save(os.path.join(self.temp_dir, 'expected.po'))
+
+        count = convert_to_po_file(SgMap.iter_file(self.master_map_file), self.locale_map, self.state_map,
+                                   os.path.join(self.temp_dir, 'zh_CN.po'))
+
+        self.assertEqual(len(po), count)
+        self.assertEqual(self.read_file('expected.po'), self.read_file('zh_CN.po'))
+
+    def test_master_same_as_polib(self):
+        master_map = SgMap(self.master_map_file, 'en_US')
+        pot = polib.POFile()
+        pot.wrapwidth = 1000
+        pot.metadata.update(create_meta_dict('en_US'))
+        for map_entry in master_map.get_values():
+            pot.append(optimize_po_entry(polib.POEntry(msgctxt=map_entry.key, msgid=map_entry.value, msgstr="")))
+        pot.save(os.path.join(self.temp_dir, 'expected.pot'))
+
+        count = master_entries_to_pot_file(SgMap.iter_file(self.master_map_file),
+                                           os.path.join(self.temp_dir, 'messages.pot'))
+
+        self.assertEqual(len(pot), count)
+        self.assertEqual(self.read_file('expected.pot'), self.read_file('messages.pot'))
+
+    def test_failed_write_leaves_no_temporary_file(self):
+        pot_file = self.write_file('messages.pot', 'existing')
+        with unittest.mock.patch('sgpo.fast_po_writer.write_entries', side_effect=OSError('No space left on device')):
+            self.assertRaises(OSError, master_entries_to_pot_file, SgMap.iter_file(self.master_map_file), pot_file)
+
+        self.assertEqual(['mapping', 'messages.pot'], sorted(os.listdir(self.temp_dir)))
+        self.assertEqual('existing', self.read_file('messages.pot'))
+
+    def test_iter_file_duplicate_keys_same_as_dictionary(self):
+        master_map_file = self.write_file('duplicate', duplicate_master)
+        parse_errors = []
+        with contextlib.redirect_stdout(io.StringIO()) as log:
+            entries = list(SgMap.iter_file(master_map_file, parse_errors))
+        # The duplicates are only reported through parse_errors, and printed by the scripts.
+        self.assertEqual('', log.getvalue())
+        master_map = SgMap(master_map_file, 'en_US')
+
+        # The last entry of a key is used, at the position of the first one.
+        self.assertEqual([('a', 'third'), ('b', 'bee'), ('c', 'sea')], [(entry.key, entry.value) for entry in entries])
+        self.assertEqual(list(master_map.get_values()), entries)
+        self.assertEqual([(4, 'a', DUPLICATE_KEY), (7, 'a', DUPLICATE_KEY)],
+                         [(error.line_number, error.line, error.message) for error in parse_errors])
+
+        with contextlib.redirect_stdout(io.StringIO()) as log:
+            master2pot(self.temp_dir, master_map_file, self.temp_dir)
+        self.assertIn(f'Duplicate key ({master_map_file}, line 7, the last entry is used): a', log.getvalue())
+
+    def test_parse_errors_printed_by_script(self):
+        master_map_file = self.write_file('invalid', 'a=one\ninvalid line\nb=two\n')
+
+        with contextlib.redirect_stdout(io.StringIO()) as log:
+            master2pot(self.temp_dir, master_map_file, self.temp_dir)
+
+        self.assertIn(f"Parsing failed ({master_map_file}, line 2): '=' not found: invalid line", log.getvalue())
+
+    def test_duplicate_keys_same_as_polib(self):
+        master_map_file = self.write_file('duplicate', duplicate_master)
+        with contextlib.redirect_stdout(io.StringIO()):
+            master_map = SgMap(master_map_file, 'en_US')
+            locale_map = SgMap.from_text('a=A\nb=B\n', 'zh_CN')
+            state_map = SgMap.from_text(duplicate_master, 'zh_CN')
+            po = CombinedSgMap_to_po(CombinedSgMap(master_map, locale_map, state_map))
+            po.save(os.path.join(self.temp_dir, 'expected.po'))
+            convert_to_po_file(SgMap.iter_file(master_map_file), locale_map, state_map,
+                               os.path.join(self.temp_dir, 'zh_CN.po'))
+
+        self.assertIn('msgid "third"', self.read_file('zh_CN.po'))
+        self.assertEqual(self.read_file('expected.po'), self.read_file('zh_CN.po'))
+
+
+class TestLocale2Po(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        for seed, locale_code in enumerate(['ja_JP', 'zh_CN', 'ru_RU']):
+            catalog = synthetic.generate(synthetic.GeneratorOptions(size=300, seed=seed, locale_code=locale_code))
+            synthetic.write_file_set(catalog, self.temp_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def convert(self, output_dir: str, jobs: int) -> list:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return locale2po(self.temp_dir, po_dir=os.path.join(self.temp_dir, output_dir),
+                             locale_dirs=parse_locales(['ja_JP=ja-JP', 'zh_CN', 'ru_RU']), jobs=jobs)
+
+    def read_file(self, *paths: str) -> str:
+        with open(os.path.join(self.temp_dir, *paths), 'r', encoding='utf-8') as file:
+            return file.read()
+
+    def test_parse_locales(self):
+        self.assertEqual({'ja_JP': 'ja-JP', 'zh_CN': 'zh-CN', 'pt_BR': 'portuguese'},
+                         parse_locales(['ja_JP=ja-JP', 'zh_CN', 'pt_BR=portuguese']))
+        self.assertEqual(LOCALE_NAME_DIR_DICT, parse_locales(None))
+
+    def test_parallel_same_as_sequential(self):
+        sequential_results = self.convert('sequential', jobs=1)
+        parallel_results = self.convert('parallel', jobs=3)
+
+        self.assertEqual(['ja_JP', 'zh_CN', 'ru_RU'], [result.locale_code for result in parallel_results])
+        for sequential_result, parallel_result in zip(sequential_results, parallel_results):
+            self.assertIsNone(parallel_result.error)
+            self.assertEqual(sequential_result.log.replace('sequential', 'parallel'), parallel_result.log)
+            file_name = f'{parallel_result.locale_code}.po'
+            self.assertEqual(self.read_file('sequential', file_name), self.read_file('parallel', file_name))
+
+    def test_duplicate_keys_same_as_serial_baseline(self):
+        master_map_file = os.path.join(self.temp_dir, 'mapping')
+        with open(master_map_file, 'r', encoding='utf-8') as file:
+            lines = file.read().splitlines()
+        keys = [line.split('=', 1)[0] for line in lines[:40:4] if '=' in line and not line.startswith('#')]
+        with open(master_map_file, 'a', encoding='utf-8') as file:
+            file.writelines(f'{key}=Duplicate value of {key}\n' for key in keys)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            master_map = SgMap(master_map_file, 'en_US')
+            self.convert('parallel', jobs=3)
+            master2pot(self.temp_dir, po_dir=os.path.join(self.temp_dir, 'parallel'))
+
+        self.assertTrue(keys)
+        for locale_code, locale_dir in parse_locales(['ja_JP=ja-JP', 'zh_CN', 'ru_RU']).items():
+            locale_map = SgMap(os.path.join(self.temp_dir, locale_dir, 'mapping.dev'), locale_code)
+            state_map = SgMap(os.path.join(self.temp_dir, locale_dir, 'mapping.state'), locale_code)
+            po = CombinedSgMap_to_po(CombinedSgMap(master_map, locale_map, state_map))
+            po.save(os.path.join(self.temp_dir, f'{locale_code}.expected.po'))
+            self.assertEqual(self.read_file(f'{locale_code}.expected.po'),
+                             self.read_file('parallel', f'{locale_code}.po'))
+        self.assertEqual(len(keys), self.read_file('parallel', 'ja_JP.po').count('msgid "Duplicate value of '))
+
+        pot = polib.POFile()
+        pot.wrapwidth = 1000
+        pot.metadata.update(create_meta_dict('en_US'))
+        for map_entry in master_map.get_values():
+            pot.append(optimize_po_entry(polib.POEntry(msgctxt=map_entry.key, msgid=map_entry.value, msgstr="")))
+        pot.save(os.path.join(self.temp_dir, 'expected.pot'))
+        self.assertEqual(self.read_file('expected.pot'), self.read_file('parallel', 'messages.pot'))
+
+    def test_failed_locale_does_not_stop_the_others(self):
+        with contextlib.redirect_stdout(io.StringIO()), self.assertRaises(SystemExit):
+            locale2po(self.temp_dir, po_dir=os.path.join(self.temp_dir, 'out'),
+                      locale_dirs={'ja_JP': 'ja-JP', 'de_DE': 'de-DE'}, jobs=2)
+        self.assertTrue(os.path.exists(os.path.join(self.temp_dir, 'out', 'ja_JP.po')))
+
+
 # ======================= Test Data =======================
 
+duplicate_master = r"""a=first
+b=bee
+# comment of b
+a=second
+c=\
+sea
+a=third
+"""
+
 master = r"""
 dlgQFrameManagerExit.hdl=Do you really want to exit SmartGit?
 """
@@ -0,0 +1,127 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import pstats
+import shutil
+import tempfile
+import unittest
+
+import phase_profiler
+import sgpo
+from import_pot import import_pot_to_po_files
+from path_finder import get_repository_root
+from sgv23_mapping import SgMap, CombinedSgMap
+
+
+def get_test_data_path(*paths: str) -> str:
+    return os.path.join(get_repository_root(), "src", "tests", "data", "test_sgpo", *paths)
+
+
+class TestPhaseProfiler(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        phase_profiler.disable()
+        phase_profiler.reset()
+        shutil.rmtree(self.temp_dir)
+
+    def get_phases(self) -> dict:
+        return {phase['name']: phase for phase in phase_profiler.get_report()['phases']}
+
+    def test_disabled(self):
+        self.assertFalse(phase_profiler.is_enabled())
+        with phase_profiler.span('outer') as outer_span:
+            outer_span.count = 10
+        sgpo.pofile(get_test_data_path('import_pot', 'case_2_messages.pot')).sort()
+
+        self.assertEqual({}, self.get_phases())
+
+    def test_nested_spans(self):
+        phase_profiler.enable()
+        with phase_profiler.span('outer', count=3):
+            with phase_profiler.span('inner') as inner_span:
+                inner_span.count = 2
+            with phase_profiler.span('inner', count=5):
+                pass
+
+        phases = self.get_phases()
+        self.assertEqual((1, 3), (phases['outer']['calls'], phases['outer']['entries']))
+        self.assertEqual((2, 7), (phases['inner']['calls'], phases['inner']['entries']))
+        self.assertAlmostEqual(phases['outer']['total_seconds'],
+                               phases['outer']['self_seconds'] + phases['inner']['total_seconds'])
+
+        phase_profiler.merge_report(phase_profiler.get_report())
+        self.assertEqual((4, 14), (self.get_phases()['inner']['calls'], self.get_phases()['inner']['entries']))
+
+        # A worker takes its report after each task, so that the next report has only the next task.
+        report = phase_profiler.take_report()
+        self.assertEqual(['outer', 'inner'], sorted(phase['name'] for phase in report['phases'])[::-1])
+        self.assertEqual({}, self.get_phases())
+
+    def test_instrumented_phases(self):
+        phase_profiler.enable()
+        with contextlib.redirect_stdout(io.StringIO()):
+            pot = sgpo.pofile(get_test_data_path('import_pot', 'case_2_messages.pot'))
+            po = sgpo.pofile(get_test_data_path('import_pot', 'case_2_language.po'))
+            loaded_count = len(pot) + len(po)
+            po.import_pot(pot)
+            po.format()
+            po.save(os.path.join(self.temp_dir, 'language.po'))
+            master_map = SgMap.from_text('a.b=A\nc.d=C\n', 'en_US')
+            CombinedSgMap(master_map, SgMap.from_text('a.b=X\n', 'xx_XX'))
+
+        phases = self.get_phases()
+        self.assertEqual(2, phases['sgpo.load']['calls'])
+        self.assertEqual(loaded_count, phases['sgpo.load']['entries'])
+        self.assertEqual(len(pot), phases['sgpo.import_pot']['entries'])
+        self.assertEqual(len(po), phases['sgpo.save']['entries'])
+        # format() sorts the entries
+        self.assertEqual(1, phases['sgpo.sort']['calls'])
+        self.assertEqual((2, 3), (phases['sgmap.parse']['calls'], phases['sgmap.parse']['entries']))
+        self.assertEqual(2, phases['sgmap.combine_entries']['entries'])
+
+    def test_import_pot_in_parallel(self):
+        pot = sgpo.pofile(get_test_data_path('import_pot', 'case_2_messages.pot'))
+        po_files = []
+        for file_name in ('ja_JP.po', 'zh_CN.po', 'ru_RU.po'):
+            po_files.append(os.path.join(self.temp_dir, file_name))
+            shutil.copyfile(get_test_data_path('import_pot', 'case_2_language.po'), po_files[-1])
+
+        phase_profiler.enable()
+        import_pot_to_po_files(pot, po_files, jobs=2)
+
+        phases = self.get_phases()
+        self.assertEqual(3, phases['sgpo.import_pot']['calls'])
+        self.assertEqual(3 * len(pot), phases['sgpo.import_pot']['entries'])
+        self.assertEqual(3, phases['sgpo.save']['calls'])
+
+    def test_profiling_options(self):
+        json_file = os.path.join(self.temp_dir, 'profile.json')
+        dump_file = os.path.join(self.temp_dir, 'profile.prof')
+        parser = argparse.ArgumentParser()
+        phase_profiler.add_arguments(parser)
+        args = parser.parse_args(['--profile-json', json_file, '--profile-dump', dump_file])
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            with phase_profiler.profiling(args):
+                sgpo.pofile(get_test_data_path('import_pot', 'case_2_messages.pot'))
+
+        self.assertFalse(phase_profiler.is_enabled())
+        self.assertIn('sgpo.load', output.getvalue())
+        with open(json_file, 'r', encoding='utf-8') as file:
+            report = json.load(file)
+        self.assertEqual(['sgpo.load'], [phase['name'] for phase in report['phases']])
+        self.assertGreater(report['phases'][0]['entries'], 0)
+        self.assertTrue(pstats.Stats(dump_file).total_calls > 0)
+
+        args = parser.parse_args([])
+        with phase_profiler.profiling(args):
+            self.assertFalse(phase_profiler.is_enabled())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import sgpo
+from path_finder import PoPathFinder, get_repository_root
+from po_watcher import PoWatcher
+from sgpo import import_report, tail_import
+
+
+def get_test_data_path(*paths: str) -> str:
+    return os.path.join(get_repository_root(), "src", "tests", "data", "test_sgpo", *paths)
+
+
+def create_entry_text(msgctxt: str, msgid: str) -> str:
+    return f'msgctxt "{msgctxt}"\nmsgid "{msgid}"\nmsgstr ""\n\n'
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestPoWatcher(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.finder = PoPathFinder(self.temp_dir)
+        os.makedirs(self.finder.get_po_file_dir())
+        self.pot_file = self.finder.get_pot_file()
+        self.unknown_file = self.finder.get_unknown_file()
+        self.locale_file = os.path.join(self.finder.get_po_file_dir(), 'ja_JP.po')
+        shutil.copyfile(get_test_data_path('import_mismatch', 'case_1_messages.pot'), self.pot_file)
+        shutil.copyfile(get_test_data_path('import_mismatch', 'case_1_messages.pot'), self.locale_file)
+
+        self.clock = FakeClock()
+        self.logs = []
+        self.watcher = PoWatcher(self.finder, save_interval=10.0, debounce=0.5,
+                                 verbosity=import_report.VERBOSITY_QUIET, log=self.logs.append, clock=self.clock)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def append_unknown(self, text: str) -> None:
+        with open(self.unknown_file, 'a', encoding='utf-8', newline='') as file:
+            file.write(text)
+        # Make sure that the signature changes even if the file system has a coarse mtime.
+        stat = os.stat(self.unknown_file)
+        os.utime(self.unknown_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    def poll_after(self, seconds: float) -> bool:
+        self.clock.now += seconds
+        return self.watcher.poll()
+
+    def read_msgctxts(self, file: str) -> set:
+        return {entry.msgctxt for entry in sgpo.pofile(file)}
+
+    def test_appended_entries_are_merged_and_saved(self):
+        self.watcher.start()
+        self.append_unknown(create_entry_text('unique_key_5', 'unique msg 5'))
+
+        # Waits until the file is stable.
+        self.assertFalse(self.poll_after(0.1))
+        self.append_unknown(create_entry_text('unique_key_6', 'unique msg 6'))
+        self.assertFalse(self.poll_after(0.1))
+        self.assertFalse(self.poll_after(0.4))
+        self.assertTrue(self.poll_after(0.1))
+
+        # Merged in memory, saved at the interval.
+        self.assertIsNotNone(self.watcher.pot.find_by_key('unique_key_6', None))
+        self.assertNotIn('unique_key_5', self.read_msgctxts(self.pot_file))
+        self.assertTrue(self.watcher.has_unsaved_changes())
+
+        self.assertTrue(self.poll_after(10.0))
+        self.assertFalse(self.watcher.has_unsaved_changes())
+        self.assertLessEqual({'unique_key_5', 'unique_key_6'}, self.read_msgctxts(self.pot_file))
+        self.assertLessEqual({'unique_key_5', 'unique_key_6'}, self.read_msgctxts(self.locale_file))
+        self.assertTrue(os.path.exists(tail_import.get_checkpoint_file(self.unknown_file)))
+
+        # The files written by the watcher are not processed again.
+        self.assertFalse(self.poll_after(1.0))
+        self.assertFalse(self.poll_after(20.0))
+
+    def test_same_result_as_import_unknown(self):
+        self.append_unknown(create_entry_text('unique_key_5', 'unique msg 5'))
+        self.watcher.start()
+        self.append_unknown(create_entry_text('context:', 'msg 7'))
+        self.poll_after(0.0)
+        self.poll_after(1.0)
+        self.watcher.save()
+
+        expected = sgpo.pofile(get_test_data_path('import_mismatch', 'case_1_messages.pot'))
+        expected.import_unknown(sgpo.pofile(self.unknown_file))
+        expected.sort()
+        expected.format()
+        self.assertEqual(expected.__unicode__(), sgpo.pofile(self.pot_file).__unicode__())
+
+        # A later run continues from the checkpoint written by the watcher.
+        self.assertIsNone(tail_import.read_new_entries(self.unknown_file, self.pot_file).entries)
+
+    def test_replaced_input_file_is_imported_again(self):
+        self.append_unknown(create_entry_text('unique_key_5', 'unique msg 5'))
+        self.watcher.start()
+        self.watcher.save()
+
+        with open(self.unknown_file, 'w', encoding='utf-8', newline='') as file:
+            file.write(create_entry_text('unique_key_8', 'unique msg 8'))
+        self.poll_after(0.0)
+        self.poll_after(1.0)
+        self.assertIsNotNone(self.watcher.pot.find_by_key('unique_key_8', None))
+
+    def test_external_changes(self):
+        self.watcher.start()
+
+        # A locale file changed by another process gets the pot imported at the next save.
+        po = sgpo.pofile(self.locale_file)
+        po.remove(po.find_by_key('unique_key_1', None))
+        po.save(self.locale_file)
+        self.poll_after(0.0)
+        self.poll_after(1.0)
+        self.assertEqual([self.locale_file], self.watcher.save())
+        self.assertIn('unique_key_1', self.read_msgctxts(self.locale_file))
+
+        # A pot changed by another process is reloaded.
+        pot = sgpo.pofile(self.pot_file)
+        pot.append(sgpo.pofile_from_text(create_entry_text('unique_key_9', 'unique msg 9'))[0])
+        pot.save(self.pot_file)
+        self.poll_after(0.0)
+        self.poll_after(1.0)
+        self.assertIsNotNone(self.watcher.pot.find_by_key('unique_key_9', None))
+        self.assertEqual([self.locale_file], self.watcher.save())
+        self.assertIn('unique_key_9', self.read_msgctxts(self.locale_file))
+
+
+if __name__ == '__main__':
+    unittest.main()
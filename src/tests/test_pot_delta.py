@@ -0,0 +1,174 @@
+import contextlib
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+import unittest.mock
+
+import sgpo
+from benchmarks import synthetic
+from import_pot import import_pot
+from path_finder import PoPathFinder
+from sgpo import pot_delta
+
+
+def create_entry_text(msgctxt: str, msgid: str) -> str:
+    return f'msgctxt "{msgctxt}"\nmsgid "{msgid}"\nmsgstr ""\n\n'
+
+
+class TestPotDelta(unittest.TestCase):
+    def setUp(self):
+        self.catalog = synthetic.generate(synthetic.GeneratorOptions(size=1000, seed=3, new_ratio=0.03,
+                                                                     changed_ratio=0.03, removed_ratio=0.02))
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def create_current_pot(self) -> sgpo.SgPo:
+        pot = sgpo.pofile_from_text(self.catalog.pot_text)
+        pot.import_unknown(sgpo.pofile_from_text(self.catalog.unknown_text))
+        pot.import_mismatch(sgpo.pofile_from_text(self.catalog.mismatch_text))
+        self.removed_keys = set()
+        for entry in list(pot)[::50]:
+            self.removed_keys.add(sgpo.SgPo._po_entry_to_key_tuple(entry))
+            pot.remove(entry)
+        pot.sort()
+        return pot
+
+    def create_synced_po_text(self) -> str:
+        po = sgpo.pofile_from_text(self.catalog.po_text)
+        po.import_pot(sgpo.pofile_from_text(self.catalog.pot_text))
+        po.sort()
+        po.format()
+        return po.__unicode__()
+
+    def test_diff_pots(self):
+        previous_pot = sgpo.pofile_from_text(self.catalog.pot_text)
+        pot = self.create_current_pot()
+        delta = pot_delta.diff_pots(previous_pot, pot)
+
+        self.assertEqual(set(self.catalog.new_keys) - self.removed_keys,
+                         {sgpo.SgPo._po_entry_to_key_tuple(entry) for entry in delta.added_entries})
+        self.assertEqual(set(self.catalog.changed_keys) - self.removed_keys,
+                         {sgpo.SgPo._po_entry_to_key_tuple(entry) for entry in delta.modified_entries})
+        self.assertEqual(self.removed_keys - set(self.catalog.new_keys), set(delta.removed_keys))
+        self.assertEqual(0, pot_delta.diff_pots(pot, pot).key_count)
+
+    def test_import_pot_delta_same_as_import_pot(self):
+        previous_pot = sgpo.pofile_from_text(self.catalog.pot_text)
+        pot = self.create_current_pot()
+        po_text = self.create_synced_po_text()
+
+        expected = sgpo.pofile_from_text(po_text)
+        expected_report = expected.import_pot(pot)
+        expected.sort()
+        expected.format()
+
+        po = sgpo.pofile_from_text(po_text)
+        report = po.import_pot_delta(pot_delta.diff_pots(previous_pot, pot))
+        po.sort()
+        po.format()
+
+        self.assertEqual(expected.__unicode__(), po.__unicode__())
+        self.assertEqual(expected_report.counts, report.counts)
+        self.assertTrue(report.added and report.modified and report.obsoleted)
+
+    def test_import_pot_delta_keeps_obsolete_entry(self):
+        pot_text = '#\n\n' + create_entry_text('key_1', 'msg 1') + create_entry_text('key_2', 'msg 2')
+        previous_pot = sgpo.pofile_from_text('#\n\n' + create_entry_text('key_1', 'msg 1'))
+        pot = sgpo.pofile_from_text(pot_text)
+        po_text = '#\n\n' + create_entry_text('key_1', 'msg 1') + '#~ msgctxt "key_2"\n#~ msgid "msg 2"\n#~ msgstr "translated"\n'
+
+        expected = sgpo.pofile_from_text(po_text)
+        expected_report = expected.import_pot(pot)
+        po = sgpo.pofile_from_text(po_text)
+        report = po.import_pot_delta(pot_delta.diff_pots(previous_pot, pot))
+
+        self.assertEqual(expected.__unicode__(), po.__unicode__())
+        self.assertEqual(expected_report.counts, report.counts)
+        self.assertEqual(2, len(po))
+        self.assertTrue(po.find_by_key('key_2', None).obsolete)
+
+    def test_import_pot_with_snapshot(self):
+        finder = PoPathFinder(self.temp_dir)
+        os.makedirs(finder.get_po_file_dir())
+        po_files = [os.path.join(finder.get_po_file_dir(), name) for name in ('ja_JP.po', 'zh_CN.po')]
+        with open(finder.get_pot_file(), 'w', encoding='utf-8') as file:
+            file.write(self.catalog.pot_text)
+        for po_file in po_files:
+            with open(po_file, 'w', encoding='utf-8') as file:
+                file.write(self.catalog.po_text)
+
+        # Without --delta or --since, no snapshot is written.
+        with contextlib.redirect_stdout(io.StringIO()):
+            import_pot(1, finder=finder)
+        self.assertEqual(sorted(['messages.pot', 'ja_JP.po', 'zh_CN.po']), sorted(os.listdir(finder.get_po_file_dir())))
+
+        with contextlib.redirect_stdout(io.StringIO()) as log:
+            import_pot(1, finder=finder, delta=True)
+        self.assertIn('no snapshot', log.getvalue())
+        self.assertIsNotNone(pot_delta.read_snapshot(finder.get_pot_file()))
+
+        pot = self.create_current_pot()
+        pot.save(finder.get_pot_file())
+        # Changed by something else since the snapshot
+        po = sgpo.pofile(po_files[1])
+        po.remove(po.find_by_key(*self.catalog.changed_keys[0]))
+        po.save(po_files[1])
+        expected = sgpo.pofile_from_text(self.create_synced_po_text())
+        expected.import_pot(pot)
+        expected.sort()
+        expected.format()
+
+        with contextlib.redirect_stdout(io.StringIO()) as log:
+            import_pot(1, finder=finder, delta=True)
+        self.assertIn('changes since the previous run', log.getvalue())
+        self.assertEqual(1, log.getvalue().count('The whole pot is imported.'))
+        self.assertEqual(expected.__unicode__(), sgpo.pofile(po_files[0]).__unicode__())
+        self.assertIsNotNone(sgpo.pofile(po_files[1]).find_by_key(*self.catalog.changed_keys[0]))
+
+    def test_failed_snapshot_write_leaves_no_temporary_file(self):
+        pot_file = os.path.join(self.temp_dir, 'messages.pot')
+        with open(pot_file, 'w', encoding='utf-8') as file:
+            file.write(self.catalog.pot_text)
+        pot_delta.write_snapshot(pot_file, [])
+        files = sorted(os.listdir(self.temp_dir))
+
+        with open(pot_file, 'a', encoding='utf-8') as file:
+            file.write(create_entry_text('new_key', 'new msg'))
+        with unittest.mock.patch.object(pot_delta.shutil, 'copyfileobj', side_effect=OSError('No space left on device')):
+            self.assertRaises(OSError, pot_delta.write_snapshot, pot_file, [])
+
+        self.assertEqual(files, sorted(os.listdir(self.temp_dir)))
+        snapshot = pot_delta.read_snapshot(pot_file)
+        self.assertIsNotNone(snapshot)
+        self.assertIsNone(snapshot.pot.find_by_key('new_key', None))
+
+    def test_read_pot_at_revision(self):
+        if shutil.which('git') is None:
+            self.skipTest('git is not installed')
+
+        pot_file = os.path.join(self.temp_dir, 'po', 'messages.pot')
+        os.makedirs(os.path.dirname(pot_file))
+        with open(pot_file, 'w', encoding='utf-8') as file:
+            file.write('#\n\n' + create_entry_text('unique_key_1', 'unique msg 1'))
+        git = ['git', '-c', 'user.name=test', '-c', 'user.email=test@example.com']
+        subprocess.run(['git', 'init', '-q'], cwd=self.temp_dir, check=True)
+        subprocess.run(git + ['add', '.'], cwd=self.temp_dir, check=True)
+        subprocess.run(git + ['commit', '-q', '-m', 'pot'], cwd=self.temp_dir, check=True)
+        with open(pot_file, 'a', encoding='utf-8') as file:
+            file.write(create_entry_text('unique_key_2', 'unique msg 2'))
+
+        previous_pot = pot_delta.read_pot_at_revision(pot_file, 'HEAD')
+        delta = pot_delta.diff_pots(previous_pot, sgpo.pofile(pot_file))
+        self.assertEqual(['unique_key_2'], [entry.msgctxt for entry in delta.added_entries])
+
+        with self.assertRaises(ValueError):
+            pot_delta.read_pot_at_revision(pot_file, 'no_such_revision')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,18 @@
+import bisect
+import io
+import json
 import os
+import pickle
+import shutil
+import tempfile
 import unittest
+import unittest.mock
+
+import polib
 
 import sgpo
 from path_finder import get_repository_root
+from sgpo import fast_po_parser, fast_po_writer, import_report, po_cache
 from sgpo.sgpo import SgPo, Key_tuple
 
 
@@ -34,6 +44,131 @@ class TestSgpo(unittest.TestCase):
         print(f"\n{po}")
         self.assertIsNotNone(po)
 
+    def test_from_file_sgpo_fast_parser(self):
+        for file_name in ('language.po', 'messages.pot'):
+            po_file = get_test_data_path('common', file_name)
+            po = sgpo.pofile(po_file)
+            fast_po = sgpo.pofile(po_file, parser=sgpo.PARSER_FAST)
+
+            self.assertEqual(po.metadata, fast_po.metadata)
+            self.assertEqual([entry.__dict__ for entry in po], [entry.__dict__ for entry in fast_po])
+            self.assertEqual(po.__unicode__(), fast_po.__unicode__())
+
+    def test_from_text_sgpo_fast_parser(self):
+        # Must be parsed without falling back to polib.
+        self.assertEqual(3, len(fast_po_parser.parse(fast_parser_test_data).entries))
+
+        po = sgpo.pofile_from_text(fast_parser_test_data)
+        fast_po = sgpo.pofile_from_text(fast_parser_test_data, parser=sgpo.PARSER_FAST)
+
+        self.assertEqual(po.header, fast_po.header)
+        self.assertEqual([entry.__dict__ for entry in po], [entry.__dict__ for entry in fast_po])
+        self.assertEqual(po.__unicode__(), fast_po.__unicode__())
+
+    def test_from_text_sgpo_fast_parser_falls_back_to_polib(self):
+        # Occurrences are not part of the SmartGit dialect.
+        text = get_key_list_test_data.replace('msgctxt "unique_key_1"', '#: reference\nmsgctxt "unique_key_1"')
+        po = sgpo.pofile_from_text(text)
+        fast_po = sgpo.pofile_from_text(text, parser=sgpo.PARSER_FAST)
+
+        self.assertEqual([('reference', '')], fast_po.find_by_key('unique_key_1', None).occurrences)
+        self.assertEqual(po.__unicode__(), fast_po.__unicode__())
+
+    def test_from_text_sgpo_with_duplicate_entries(self):
+        with self.assertRaises(ValueError) as context:
+            sgpo.pofile_from_text(duplicate_entries_test_data)
+
+        message = str(context.exception)
+        print(f"\n{message}")
+        self.assertIn('line 6: msgctxt "context:" msgid "msgid_1"', message)
+        self.assertIn('line 14: msgctxt "unique_key_1" msgid "unique_msgid_1"', message)
+
+    def test_pickle_sgpo(self):
+        po = sgpo.pofile(get_test_data_path('common', 'language.po'))
+        po.keep_sorted = True
+
+        restored_po = pickle.loads(pickle.dumps(po))
+
+        self.assertIsInstance(restored_po, SgPo)
+        self.assertTrue(restored_po.keep_sorted)
+        self.assertEqual(po.__unicode__(), restored_po.__unicode__())
+        self.assertEqual('msgstr_2', restored_po.find_by_key('context:', 'msgid_2').msgstr)
+
+    def test_from_file_sgpo_with_cache(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache_dir = os.path.join(temp_dir, 'cache')
+            po_file = os.path.join(temp_dir, 'language.po')
+            shutil.copyfile(get_test_data_path('common', 'language.po'), po_file)
+            expected = sgpo.pofile(po_file)
+
+            # The first load writes the cache, the second one reads it.
+            sgpo.pofile(po_file, cache_dir=cache_dir)
+            self.assertIsNotNone(po_cache.read(cache_dir, po_cache.make_key(po_file, sgpo.PARSER_POLIB)))
+            po = sgpo.pofile(po_file, cache_dir=cache_dir)
+            self.assertEqual(expected.__unicode__(), po.__unicode__())
+            self.assertEqual(expected.metadata, po.metadata)
+            self.assertEqual(po_file, po.fpath)
+            self.assertIsNotNone(po.find_by_key('unique_key_1', None))
+
+            # A changed file is parsed again.
+            po.find_by_key('unique_key_1', None).msgstr = 'modified'
+            po.save()
+            self.assertIsNone(po_cache.read(cache_dir, po_cache.make_key(po_file, sgpo.PARSER_POLIB)))
+            self.assertEqual('modified', sgpo.pofile(po_file, cache_dir=cache_dir).find_by_key('unique_key_1', None).msgstr)
+
+            # A broken cache file is a cache miss.
+            for cache_file in os.listdir(cache_dir):
+                with open(os.path.join(cache_dir, cache_file), 'wb') as file:
+                    file.write(b'broken')
+            self.assertEqual(po.__unicode__(), sgpo.pofile(po_file, cache_dir=cache_dir).__unicode__())
+
+            self.assertEqual(1, po_cache.clear(cache_dir))
+            self.assertEqual([], os.listdir(cache_dir))
+
+    def test_from_file_sgpo_with_cache_disabled(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            with unittest.mock.patch.dict(os.environ, {po_cache.NO_CACHE_ENV: '1'}):
+                sgpo.pofile(get_test_data_path('common', 'language.po'), cache_dir=cache_dir)
+            self.assertEqual([], os.listdir(cache_dir))
+
+            with unittest.mock.patch.dict(os.environ, {po_cache.CACHE_DIR_ENV: cache_dir}):
+                sgpo.pofile(get_test_data_path('common', 'language.po'))
+            self.assertEqual(1, len(os.listdir(cache_dir)))
+
+    def test_lazy_pofile_sgpo(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            po_file = os.path.join(temp_dir, 'language.po')
+            po = sgpo.pofile_from_text(fast_po_writer_test_data)
+            po.expand_entries()
+            # Occurrences and multi-line strings are not in the dialect of lazy_pofile().
+            list.remove(po, po.find_by_key('withOccurrence', None))
+            list.remove(po, po.find_by_key('multiline', None))
+            po.find_by_key('dlgTitle:', 'Escaped "quotes" and \\ backslash\tTab').msgstr = 'エスケープ'
+            po.save(po_file)
+
+            with sgpo.lazy_pofile(po_file) as lazy_po:
+                self.assertEqual(len(po), len(lazy_po))
+                self.assertEqual(po.header, lazy_po.header)
+                self.assertEqual(po.metadata, lazy_po.metadata)
+                self.assertEqual(po.get_key_list(), lazy_po.get_key_list())
+
+                # Only the entries that are read are decoded.
+                entry = lazy_po.find_by_key('dlgTitle:', 'Escaped "quotes" and \\ backslash\tTab')
+                self.assertEqual('エスケープ', entry.msgstr)
+                self.assertEqual(1, len(lazy_po._entries))
+                self.assertIs(entry, lazy_po.find_by_key('dlgTitle:', 'Escaped "quotes" and \\ backslash\tTab'))
+                self.assertTrue(lazy_po.contains_key('fuzzy.lbl', None))
+                self.assertFalse(lazy_po.contains_key('not_found', None))
+                self.assertIsNone(lazy_po.find_by_key('not_found', None))
+
+                for expected, actual in zip(po, lazy_po):
+                    self.assertEqual(expected.__unicode__(), actual.__unicode__())
+                self.assertEqual(po.__unicode__(), lazy_po.to_sgpo().__unicode__())
+
+    def test_lazy_pofile_sgpo_unsupported_syntax(self):
+        self.assertRaises(fast_po_parser.UnsupportedSyntaxError,
+                          sgpo.lazy_pofile, get_test_data_path('common', 'language.po'))
+
     def test_find_by_key_sgpo_key_type1(self):
         po_file = get_test_data_path('common', 'language.po')
         po = sgpo.pofile(po_file)
@@ -60,6 +195,136 @@ class TestSgpo(unittest.TestCase):
         self.assertIsNotNone(result)
         self.assertEqual(expected_msgstr, result.msgstr)
 
+    def test_find_by_key_sgpo_not_found(self):
+        po_file = get_test_data_path('common', 'language.po')
+        po = sgpo.pofile(po_file)
+
+        self.assertIsNone(po.find_by_key('context:', 'unknown_msgid'))
+        self.assertIsNone(po.find_by_key('unknown_key', 'unique_msgid_1'))
+        self.assertIsNone(po.find_by_key('unique_key_1:', 'unique_msgid_1'))
+
+    def test_find_by_key_sgpo_after_append_and_remove(self):
+        po = sgpo.pofile_from_text(get_key_list_test_data)
+        new_entry = polib.POEntry(msgctxt='context:', msgid='msgid_3', msgstr='')
+
+        po.append(new_entry)
+        self.assertIs(new_entry, po.find_by_key('context:', 'msgid_3'))
+
+        po.remove(new_entry)
+        self.assertIsNone(po.find_by_key('context:', 'msgid_3'))
+
+    def test_find_by_key_sgpo_returns_first_entry(self):
+        po = sgpo.pofile_from_text(get_key_list_test_data)
+        first_entry = po.find_by_key('unique_key_1', None)
+        appended_entry = polib.POEntry(msgctxt='unique_key_1', msgid='appended_msgid', msgstr='')
+        inserted_entry = polib.POEntry(msgctxt='unique_key_1', msgid='inserted_msgid', msgstr='')
+
+        po.append(appended_entry)
+        self.assertIs(first_entry, po.find_by_key('unique_key_1', None))
+
+        po.insert(0, inserted_entry)
+        self.assertIs(inserted_entry, po.find_by_key('unique_key_1', None))
+
+        po.remove(inserted_entry)
+        self.assertIs(first_entry, po.find_by_key('unique_key_1', None))
+
+    def test_contains_sgpo(self):
+        po = sgpo.pofile_from_text(get_key_list_test_data)
+
+        self.assertIn(polib.POEntry(msgctxt='context:', msgid='msgid_1', msgstr=''), po)
+        self.assertIn(polib.POEntry(msgctxt='unique_key_1', msgid='unique_msgid_1', msgstr=''), po)
+        self.assertNotIn(polib.POEntry(msgctxt='context:', msgid='msgid_3', msgstr=''), po)
+        self.assertNotIn(polib.POEntry(msgctxt='unique_key_1', msgid='other_msgid', msgstr=''), po)
+
+        with self.assertRaises(ValueError):
+            po.append(polib.POEntry(msgctxt='context:', msgid='msgid_1', msgstr=''))
+
+    def test_find_by_key_sgpo_after_in_place_edit(self):
+        po = sgpo.pofile_from_text(get_key_list_test_data)
+        entry = po.find_by_key('context:', 'msgid_1')
+
+        po.set_key(entry, 'context:', 'msgid_1_modified')
+        self.assertIsNone(po.find_by_key('context:', 'msgid_1'))
+        self.assertIs(entry, po.find_by_key('context:', 'msgid_1_modified'))
+        self.assertIs(polib.POEntry, type(entry))
+
+        po.set_key(entry, 'other_context:', 'msgid_1_modified')
+        self.assertIs(entry, po.find_by_key('other_context:', 'msgid_1_modified'))
+        self.assertIsNone(po.find_by_key('context:', 'msgid_1_modified'))
+
+        entry = po.find_by_key('unique_key_1', None)
+        po.set_key(entry, 'unique_key_9', entry.msgid)
+        self.assertIn(polib.POEntry(msgctxt='unique_key_9', msgid=entry.msgid, msgstr=''), po)
+        count = len(po)
+        with self.assertRaises(ValueError):
+            po.append(polib.POEntry(msgctxt='unique_key_9', msgid=entry.msgid, msgstr=''))
+        self.assertEqual(count, len(po))
+
+        # An entry edited directly is not found under its old key, and is found under its new key after
+        # rebuild_key_index().
+        entry.msgctxt = 'unique_key_10'
+        self.assertIsNone(po.find_by_key('unique_key_9', None))
+        entry = po.find_by_key('unique_key_2', None)
+        entry.msgctxt = 'unique_key_11'
+        self.assertIsNone(po.find_by_key('unique_key_2', None))
+        po.rebuild_key_index()
+        self.assertIs(entry, po.find_by_key('unique_key_11', None))
+        self.assertIsNone(po.find_by_key('unique_key_2', None))
+
+        # Editing the entries of another file does not affect the index of this one.
+        key_index = po._get_key_index()
+        other_po = sgpo.pofile_from_text(get_key_list_test_data)
+        other_entry = other_po.find_by_key('unique_key_1', None)
+        other_entry.msgctxt = 'other_key'
+        other_po.set_key(other_po.find_by_key('context:', 'msgid_2'), 'context:', 'msgid_9')
+        self.assertIs(key_index, po._get_key_index())
+        self.assertIs(polib.POEntry, type(other_entry))
+
+    def test_key_index_sgpo_after_list_operations(self):
+        po = sgpo.pofile_from_text(get_key_list_test_data)
+
+        def assert_index_is_up_to_date():
+            expected = {}
+            for entry in po:
+                if entry.msgctxt is not None:
+                    expected.setdefault(sgpo.SgPo._po_entry_to_key_tuple(entry), entry)
+            for key, entry in expected.items():
+                self.assertIs(entry, po.find_by_key(*key))
+            self.assertEqual(len(expected), len(po._get_key_index()))
+
+        duplicates = [polib.POEntry(msgctxt='unique_key_1', msgid=f'duplicate_{i}', msgstr='') for i in range(3)]
+        po.check_for_duplicates = False
+        po.append(duplicates[0])
+        po.insert(0, duplicates[1])
+        assert_index_is_up_to_date()
+        self.assertIs(duplicates[1], po.find_by_key('unique_key_1', None))
+
+        po[0] = duplicates[2]
+        assert_index_is_up_to_date()
+        po[0] = po[0]
+        assert_index_is_up_to_date()
+        self.assertIs(duplicates[2], po.find_by_key('unique_key_1', None))
+
+        po.reverse()
+        assert_index_is_up_to_date()
+        self.assertIs(duplicates[0], po.find_by_key('unique_key_1', None))
+
+        del po[0]
+        assert_index_is_up_to_date()
+        self.assertIs(po.pop(), duplicates[2])
+        assert_index_is_up_to_date()
+        po[1:3] = [duplicates[0], duplicates[2], duplicates[1]]
+        assert_index_is_up_to_date()
+        po[1:4] = iter(po[1:4])
+        assert_index_is_up_to_date()
+        del po[:2]
+        assert_index_is_up_to_date()
+
+        entry = po.find_by_key('context:', 'msgid_1')
+        po.remove(entry)
+        self.assertIsNone(po.find_by_key('context:', 'msgid_1'))
+        assert_index_is_up_to_date()
+
     def test_sort_sgpo(self):
         normal_po_file = get_test_data_path('sort', 'normal_order.po')
         reverse_po_file = get_test_data_path('sort', 'reverse_order.po')
@@ -98,6 +363,56 @@ class TestSgpo(unittest.TestCase):
         print(po.get_key_list())
         self.assertEqual(reverse_order_po.get_key_list(), po.get_key_list())
 
+    def test_is_sorted_sgpo(self):
+        po = sgpo.pofile(get_test_data_path('sort', 'normal_order.po'))
+        reverse_order_po = sgpo.pofile(get_test_data_path('sort', 'reverse_order.po'))
+
+        self.assertTrue(po.is_sorted())
+        self.assertFalse(reverse_order_po.is_sorted())
+
+    def test_keep_sorted_sgpo(self):
+        po = sgpo.pofile(get_test_data_path('sort', 'normal_order.po'))
+        keep_sorted_po = sgpo.pofile(get_test_data_path('sort', 'reverse_order.po'))
+
+        keep_sorted_po.keep_sorted = True
+        self.assertEqual(po.get_key_list(), keep_sorted_po.get_key_list())
+
+        for new_entry in (polib.POEntry(msgctxt='*.new:', msgid='msgid', msgstr=''),
+                          polib.POEntry(msgctxt='new_key', msgid='msgid', msgstr='')):
+            po.append(new_entry)
+            keep_sorted_po.append(polib.POEntry(msgctxt=new_entry.msgctxt, msgid=new_entry.msgid, msgstr=''))
+
+        self.assertTrue(keep_sorted_po.is_sorted())
+        po.sort()
+        self.assertEqual(po.get_key_list(), keep_sorted_po.get_key_list())
+
+        # An entry is inserted after the entries with the same sort key, as with bisect.bisect_right().
+        sort_keys = [po._po_entry_to_sort_key(entry) for entry in po]
+        for entry in po:
+            self.assertEqual(bisect.bisect_right(sort_keys, po._po_entry_to_sort_key(entry)), po._bisect_sorted(entry))
+
+    def test_sort_key_cache_sgpo(self):
+        po = sgpo.pofile(get_test_data_path('sort', 'reverse_order.po'))
+        po.sort()
+        entry_count = len(po)
+
+        # An entry edited in place is sorted by its new key.
+        entry = po[0]
+        entry.msgctxt = 'zzz_' + entry.msgctxt
+        self.assertFalse(po.is_sorted())
+        po.sort()
+        self.assertIs(entry, po[-1])
+
+        # The sort keys of the removed entries are not kept.
+        po.keep_sorted = True
+        for i in range(100):
+            po.append(polib.POEntry(msgctxt=f'new_key_{i}', msgid='msgid', msgstr=''))
+            po.remove(po.find_by_key(f'new_key_{i}', None))
+        del po[:2]
+        po.pop()
+        self.assertTrue(po.is_sorted())
+        self.assertLessEqual(len(po._sort_key_cache), entry_count - 3)
+
     def test_format_sgpo_with_no_header_po(self):
         po_file = get_test_data_path('format', 'formatted.po')
         po_header_less_file = get_test_data_path('format', 'header_less.po')
@@ -136,6 +451,66 @@ class TestSgpo(unittest.TestCase):
 
         self.assertEqual(po.__unicode__(), abnormal_order_header_po.__unicode__())
 
+    def test_save_sgpo_only_if_changed(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            po_file = os.path.join(temp_dir, 'language.po')
+            po = sgpo.pofile(get_test_data_path('common', 'language.po'))
+
+            # New file
+            self.assertTrue(po.save(po_file, only_if_changed=True))
+            os.utime(po_file, (0, 0))
+
+            # Same content
+            self.assertFalse(po.save(po_file, only_if_changed=True))
+            self.assertEqual(0, os.stat(po_file).st_mtime)
+
+            # Changed content
+            po.find_by_key('unique_key_1', None).msgstr = 'modified'
+            self.assertTrue(po.save(po_file, only_if_changed=True))
+            self.assertEqual(po.__unicode__(), sgpo.pofile(po_file).__unicode__())
+            self.assertEqual(['language.po'], os.listdir(temp_dir))
+
+    def test_save_sgpo_failure_keeps_existing_file(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            po_file = os.path.join(temp_dir, 'language.po')
+            po = sgpo.pofile(get_test_data_path('common', 'language.po'))
+            po.save(po_file)
+            with open(po_file, 'rb') as file:
+                expected = file.read()
+
+            po.find_by_key('unique_key_1', None).msgstr = 'modified'
+            entry_to_text = fast_po_writer._entry_to_text
+            written_entries = []
+
+            def fail_after_two_entries(entry, wrapwidth):
+                if len(written_entries) == 2:
+                    raise OSError('No space left on device')
+                written_entries.append(entry)
+                return entry_to_text(entry, wrapwidth)
+
+            with unittest.mock.patch.object(fast_po_writer, '_entry_to_text', side_effect=fail_after_two_entries):
+                self.assertRaises(OSError, po.save, po_file)
+
+            with open(po_file, 'rb') as file:
+                self.assertEqual(expected, file.read())
+            self.assertEqual(['language.po'], os.listdir(temp_dir))
+
+    def test_save_sgpo_same_as_polib(self):
+        po = sgpo.pofile_from_text(fast_po_writer_test_data)
+
+        for wrapwidth in [9999, 78, 0]:
+            po.wrapwidth = wrapwidth
+            buffer = io.StringIO()
+            fast_po_writer.write(po, buffer)
+            self.assertEqual(po.__unicode__(), buffer.getvalue())
+
+        po.wrapwidth = 9999
+        with tempfile.TemporaryDirectory() as temp_dir:
+            po_file = os.path.join(temp_dir, 'language.po')
+            po.save(po_file)
+            with open(po_file, 'rb') as file:
+                self.assertEqual(po.__unicode__().encode('utf-8'), file.read())
+
     def test_get_key_list_sgpo(self):
         pot = sgpo.pofile_from_text(get_key_list_test_data)
         result = pot.get_key_list()
@@ -274,6 +649,166 @@ class TestSgpo(unittest.TestCase):
 
         self.assertEqual(expected_result.__unicode__(), po.__unicode__())
 
+    def test_import_pot_sgpo_compact(self):
+        for case in ['case_1', 'case_2', 'case_3']:
+            pot = sgpo.pofile(get_test_data_path('import_pot', f'{case}_messages.pot'), compact=True)
+            po = sgpo.pofile(get_test_data_path('import_pot', f'{case}_language.po'), compact=True)
+            expected_result = sgpo.pofile(get_test_data_path('import_pot', f'{case}_expected_result.po'))
+
+            po.import_pot(pot)
+            po.sort()
+            po.format()
+            expected_result.format()
+
+            self.assertEqual(expected_result.__unicode__(), po.__unicode__())
+
+    def test_import_reports(self):
+        pot = sgpo.pofile(get_test_data_path('import_mismatch', 'case_1_messages.pot'))
+        unknown = sgpo.pofile_from_text('msgctxt "context:"\nmsgid "msg 1"\nmsgstr ""\n\n'
+                                        'msgctxt "unique_key_2"\nmsgid "other msg 2"\nmsgstr ""\n\n'
+                                        'msgctxt "unique_key_5"\nmsgid "unique msg 5"\nmsgstr ""\n')
+        mismatch = sgpo.pofile(get_test_data_path('import_mismatch', 'case_1_mismatch.24_1'))
+
+        output = io.StringIO()
+        with unittest.mock.patch('sys.stdout', output):
+            unknown_report = pot.import_unknown(unknown)
+            mismatch_report = pot.import_mismatch(mismatch)
+        # The import methods do not print anything.
+        self.assertEqual('', output.getvalue())
+
+        self.assertEqual(('import_unknown', pot.fpath, None), unknown_report[:3])
+        self.assertEqual({'added': 1, 'skipped': 2, 'modified': 0, 'obsoleted': 0, 'errors': 0}, unknown_report.counts)
+        self.assertEqual([('unique_key_5', 'unique msg 5', None, None)], unknown_report.added)
+        self.assertEqual([('context:', 'msg 1', 'msg 1', import_report.REASON_EXISTS),
+                          ('unique_key_2', 'other msg 2', 'unique msg 2', import_report.REASON_MSGID_CHANGED)],
+                         unknown_report.skipped)
+
+        self.assertEqual([('unique_key_1', 'Modified unique msg 1', 'unique msg 1', None),
+                          ('unique_key_3', 'Modified unique msg 3', 'unique msg 3', None)],
+                         mismatch_report.modified)
+        self.assertTrue(mismatch_report.changed)
+        self.assertFalse(pot.import_mismatch(mismatch).changed)
+
+    def test_import_pot_report(self):
+        pot = sgpo.pofile(get_test_data_path('import_pot', 'case_3_messages.pot'))
+        po = sgpo.pofile(get_test_data_path('import_pot', 'case_3_language.po'))
+
+        report = po.import_pot(pot)
+
+        self.assertEqual(0, len(report.added))
+        self.assertIn(('context_A:', 'msg 2', None, None), report.obsoleted)
+        self.assertEqual(len([entry for entry in po if entry.obsolete]), len(report.obsoleted))
+
+        self.assertEqual('', import_report.render_text(report, import_report.VERBOSITY_QUIET))
+        summary = import_report.render_text(report)
+        self.assertIn(f'obsolete entry:\t{len(report.obsoleted)}', summary)
+        self.assertNotIn('msg 2', summary)
+        self.assertIn('msgctxt "context_A:"\n\tmsgid "msg 2"',
+                      import_report.render_text(report, import_report.VERBOSITY_ENTRIES))
+
+        data = json.loads(import_report.render_json([report]))
+        self.assertEqual(import_report.REPORT_FORMAT_VERSION, data['format_version'])
+        self.assertEqual(report.counts, data['reports'][0]['counts'])
+        self.assertEqual({'msgctxt': 'context_A:', 'msgid': 'msg 2', 'previous_msgid': None, 'reason': None},
+                         data['reports'][0]['obsoleted'][0])
+
+    def test_import_pot_sgpo_duplicate_pot_key(self):
+        pot = sgpo.pofile_from_text(merge_pot_test_data)
+        po = sgpo.pofile_from_text(merge_po_test_data)
+        list.append(pot, sgpo.pofile_from_text('#\nmsgctxt "key_1"\nmsgid "other msg 1"\nmsgstr ""\n')[0])
+        list.append(pot, sgpo.pofile_from_text('#\nmsgctxt "key_4"\nmsgid "msg 4"\nmsgstr ""\n')[0])
+        list.append(pot, sgpo.pofile_from_text('#\nmsgctxt "key_4"\nmsgid "other msg 4"\nmsgstr ""\n')[0])
+
+        report = po.import_pot(pot)
+
+        # Only the first entry of a key in the pot is used, as find_by_key() does.
+        self.assertEqual('msg 1', po.find_by_key('key_1', None).msgid)
+        self.assertEqual(1, [entry.msgctxt for entry in report.added].count('key_4'))
+        self.assertEqual(1, len([entry for entry in po if entry.msgctxt == 'key_4']))
+        self.assertEqual('msg 4', po.find_by_key('key_4', None).msgid)
+        self.assertNotIn('key_1', [entry.msgctxt for entry in report.modified])
+
+    def test_import_pot_sgpo_keeps_obsolete_entry(self):
+        pot = sgpo.pofile_from_text(obsolete_returning_pot_test_data)
+        po = sgpo.pofile_from_text(obsolete_returning_po_test_data)
+
+        report = po.import_pot(pot)
+
+        # An obsolete entry whose key is back in the pot stays obsolete, and is not added again.
+        # Its msgid is still updated when it is identified by msgctxt only.
+        self.assertEqual(obsolete_returning_expected_test_data, po.__unicode__())
+        self.assertEqual({'added': 0, 'skipped': 0, 'modified': 1, 'obsoleted': 0, 'errors': 0}, report.counts)
+        self.assertEqual([('a.b', 'Hello', 'Hi', None)], report.modified)
+
+        pot = sgpo.pofile_from_text(merge_pot_test_data)
+        po = sgpo.pofile_from_text(merge_po_test_data)
+        entry_count = len(po)
+        report = po.import_pot(pot)
+        self.assertEqual(entry_count, len(po))
+        self.assertTrue(po.find_by_key('key_3', None).obsolete)
+        self.assertTrue(po.find_by_key('context:', 'msg 2').obsolete)
+        self.assertNotIn('key_3', [entry.msgctxt for entry in report.added])
+        self.assertFalse(po.import_pot(pot).changed)
+
+    def test_import_pot_sgpo_msgid_changed(self):
+        pot = sgpo.pofile_from_text(merge_pot_test_data)
+        po = sgpo.pofile_from_text(merge_po_test_data)
+
+        report = po.import_pot(pot)
+
+        entry = po.find_by_key('key_5', None)
+        self.assertEqual('new msg 5', entry.msgid)
+        self.assertEqual('old msg 5', entry.previous_msgid)
+        self.assertEqual(['fuzzy'], entry.flags)
+        self.assertEqual('translated msg 5', entry.msgstr)
+        self.assertIs(entry, po.find_by_key('key_5', None))
+        self.assertEqual([('key_5', 'new msg 5', 'old msg 5', None)], report.modified)
+        self.assertEqual(['key_obsolete'], [entry.msgctxt for entry in report.obsoleted])
+
+    def test_import_pot_sgpo_obsolete_keeps_previous_msgid(self):
+        pot = sgpo.pofile_from_text('#\nmsgctxt "key_1"\nmsgid "msg 1"\nmsgstr ""\n')
+        po = sgpo.pofile_from_text('#\nmsgctxt "key_1"\nmsgid "msg 1"\nmsgstr ""\n\n'
+                                   '#, fuzzy\n#| msgid "old msg 2"\nmsgctxt "key_2"\nmsgid "msg 2"\nmsgstr "translated"\n')
+
+        po.import_pot(pot)
+
+        # Written as the baseline scripts write it. polib does not read it back (see sync_all.py).
+        entry = po.find_by_key('key_2', None)
+        self.assertTrue(entry.obsolete)
+        self.assertEqual('old msg 2', entry.previous_msgid)
+        self.assertIn('#~| msgid "old msg 2"\n', po.__unicode__())
+
+    def test_compact_entries_sgpo(self):
+        po = sgpo.pofile(get_test_data_path('common', 'language.po'))
+        expected = po.__unicode__()
+
+        self.assertEqual(len(po), po.compact_entries())
+        self.assertTrue(all(isinstance(entry, sgpo.CompactEntry) for entry in po))
+        self.assertEqual(expected, po.__unicode__())
+        self.assertIsNotNone(po.find_by_key('unique_key_1', None))
+        self.assertEqual(expected, pickle.loads(pickle.dumps(po)).__unicode__())
+
+        self.assertEqual(len(po), po.expand_entries())
+        self.assertTrue(all(type(entry) is polib.POEntry for entry in po))
+        self.assertEqual(expected, po.__unicode__())
+
+    def test_compact_entries_sgpo_keeps_unsupported_entries(self):
+        po = sgpo.pofile_from_text(fast_po_writer_test_data)
+        expected = po.__unicode__()
+
+        po.compact_entries()
+        entry = po.find_by_key('withOccurrence', None)
+        self.assertIs(polib.POEntry, type(entry))
+        self.assertFalse(sgpo.CompactEntry.can_convert(entry))
+        self.assertRaises(ValueError, sgpo.CompactEntry.from_polib, entry)
+        self.assertEqual(expected, po.__unicode__())
+
+        # Compact entries behave like polib entries
+        polib_entry = po.find_by_key('fuzzy.lbl', None).to_polib()
+        self.assertEqual(polib_entry, po.find_by_key('fuzzy.lbl', None))
+        self.assertTrue(po.find_by_key('fuzzy.lbl', None).fuzzy)
+        self.assertEqual(polib_entry.__unicode__(), po.find_by_key('fuzzy.lbl', None).__unicode__())
+
     def test_delete_extracted_comments(self):
         pot_file = get_test_data_path('delete_extracted_comments', 'messages.pot')
         expected_result_file = get_test_data_path('delete_extracted_comments', 'expected_result.pot')
@@ -309,7 +844,160 @@ msgid "unique_msgid_2"
 msgstr ""
 """
 
+merge_pot_test_data = r"""#
+msgctxt "key_1"
+msgid "msg 1"
+msgstr ""
+
+msgctxt "context:"
+msgid "msg 2"
+msgstr ""
+
+msgctxt "key_3"
+msgid "msg 3"
+msgstr ""
+
+msgctxt "key_5"
+msgid "new msg 5"
+msgstr ""
+"""
+
+merge_po_test_data = r"""#
+msgctxt "key_1"
+msgid "msg 1"
+msgstr "translated msg 1"
+
+#~ msgctxt "context:"
+#~ msgid "msg 2"
+#~ msgstr "old translated msg 2"
+
+msgctxt "context:"
+msgid "msg 2"
+msgstr "translated msg 2"
+
+#~ msgctxt "key_3"
+#~ msgid "msg 3"
+#~ msgstr "translated msg 3"
+
+msgctxt "key_5"
+msgid "old msg 5"
+msgstr "translated msg 5"
+
+msgctxt "key_obsolete"
+msgid "obsolete msg"
+msgstr "translated obsolete msg"
+"""
+
+obsolete_returning_pot_test_data = r"""#
+msgctxt "a.b"
+msgid "Hello"
+msgstr ""
+
+msgctxt "c.d:"
+msgid "X"
+msgstr ""
+"""
+
+obsolete_returning_po_test_data = r"""#
+#~ msgctxt "a.b"
+#~ msgid "Hi"
+#~ msgstr "Hallo"
+
+#~ msgctxt "c.d:"
+#~ msgid "X"
+#~ msgstr "Y"
+"""
+
+obsolete_returning_expected_test_data = r"""#
+msgid ""
+msgstr ""
+
+#, fuzzy
+#~| msgid "Hi"
+#~ msgctxt "a.b"
+#~ msgid "Hello"
+#~ msgstr "Hallo"
+
+#~ msgctxt "c.d:"
+#~ msgid "X"
+#~ msgstr "Y"
+"""
+
+fast_parser_test_data = r"""# header comment
+
+#. activity log 2
+#. activity log 1
+msgctxt "context:"
+msgid "escaped \\\\ \"msgid\""
+msgstr ""
+
+# translator comment
+#, fuzzy
+#| msgid "previous msgid"
+msgctxt "unique_key_1"
+msgid "unique_msgid_1"
+msgstr "<html>unique_msgstr_1</html>"
+
+#~ msgctxt "unique_key_2"
+#~ msgid "unique_msgid_2"
+#~ msgstr "unique_msgstr_2"
+"""
+
+duplicate_entries_test_data = r"""#
+msgctxt "context:"
+msgid "msgid_1"
+msgstr ""
+
+msgctxt "context:"
+msgid "msgid_1"
+msgstr ""
+
+msgctxt "unique_key_1"
+msgid "unique_msgid_1"
+msgstr ""
+
+msgctxt "unique_key_1"
+msgid "unique_msgid_1"
+msgstr ""
+"""
+
 expected_key_list = [Key_tuple(msgctxt='context:', msgid='msgid_1'),
                      Key_tuple(msgctxt='context:', msgid='msgid_2'),
                      Key_tuple(msgctxt='unique_key_1', msgid=None),
                      Key_tuple(msgctxt='unique_key_2', msgid=None)]
+
+fast_po_writer_test_data = r"""# Header comment
+#
+msgid ""
+msgstr ""
+"Project-Id-Version: SmartGit\n"
+"Content-Type: text/plain; charset=UTF-8\n"
+
+# Translator comment
+#. Extracted comment
+#. over two lines
+msgctxt "dlgTitle:"
+msgid "Escaped \"quotes\" and \\ backslash\tTab"
+msgstr "エスケープ\n改行"
+
+#: src/occurrence.java:10
+msgctxt "withOccurrence"
+msgid "Occurrence"
+msgstr "Occurrence"
+
+#, fuzzy
+#| msgid "Old text"
+msgctxt "fuzzy.lbl"
+msgid "New text that is long enough to be wrapped when wrapwidth is 78 characters wide, like polib does"
+msgstr "Translated"
+
+msgctxt "multiline"
+msgid ""
+"First line\n"
+"Second line"
+msgstr ""
+
+#~ msgctxt "obsolete.lbl"
+#~ msgid "Obsolete"
+#~ msgstr "Obsolete translation"
+"""
@@ -1,6 +1,14 @@
+import contextlib
+import io
+import pickle
 import unittest
 
-from sgv23_mapping import SgMap
+from sgv23_mapping import SgMap, PackedEntries, ParsedEntry
+
+try:
+    import pyparsing
+except ImportError:
+    pyparsing = None
 
 
 class TestSgMap(unittest.TestCase):
@@ -194,6 +202,156 @@ class TestSgMap(unittest.TestCase):
         self.assertEqual('entry1_comment', entry1.comment)
         self.assertFalse(entry1.no_translation_needed)
 
+    def test_invalid_line(self):
+        test_data = ("entry1_key=entry1_value\n"
+                     "invalid line\n"
+                     "entry2_key=entry2_value\n"
+                     )
+
+        with contextlib.redirect_stdout(io.StringIO()) as log:
+            test_map = SgMap.from_text(test_data, 'en_US')
+        map_dict = test_map.get_dictionary()
+
+        # The errors are only recorded. The scripts print them.
+        self.assertEqual('', log.getvalue())
+        self.assertEqual(1, len(test_map.parse_errors))
+        self.assertEqual(2, test_map.parse_errors[0].line_number)
+        self.assertEqual('invalid line', test_map.parse_errors[0].line)
+
+        # Parsing continues after the invalid line.
+        self.assertEqual(['entry1_key', 'entry2_key'], test_map.get_key_list())
+        self.assertEqual('entry2_value', map_dict['entry2_key'].value)
+
+    def test_hash_without_whitespace_is_an_entry(self):
+        test_data = ("entry1_key=entry1_value\n"
+                     "#entry2_key=entry2_value\n"
+                     "entry3_key=entry3_value\n"
+                     )
+
+        test_map = SgMap.from_text(test_data, 'en_US')
+
+        self.assertEqual(['entry1_key', '#entry2_key', 'entry3_key'], test_map.get_key_list())
+        self.assertEqual('', test_map.get_dictionary()['entry1_key'].comment)
+        self.assertEqual('entry2_value', test_map.get_dictionary()['#entry2_key'].value)
+
+    def test_empty_comment_takes_next_line(self):
+        test_data = ("entry1_key=entry1_value\n"
+                     "#\n"
+                     "\n"
+                     "entry2_key=entry2_value\n"
+                     )
+
+        test_map = SgMap.from_text(test_data, 'en_US')
+
+        self.assertEqual(['entry1_key'], test_map.get_key_list())
+        self.assertEqual('entry2_key=entry2_value', test_map.get_dictionary()['entry1_key'].comment)
+
+    def test_split_line_entry_takes_comment_line(self):
+        test_data = ("entry1_key=\\\n"
+                     "\n"
+                     "# entry1_value\n"
+                     "entry2_key=entry2_value\n"
+                     )
+
+        test_map = SgMap.from_text(test_data, 'en_US')
+
+        self.assertEqual('# entry1_value', test_map.get_dictionary()['entry1_key'].value)
+        self.assertEqual('', test_map.get_dictionary()['entry1_key'].comment)
+        self.assertEqual('entry2_value', test_map.get_dictionary()['entry2_key'].value)
+
+    def test_crlf_text(self):
+        test_data = ("entry1_key=entry1_value\r\n"
+                     "# entry1_comment\r\n"
+                     "entry2_key=\\\r\n"
+                     "entry2_value\u2028continued\r\n"
+                     )
+
+        test_map = SgMap.from_text(test_data, 'en_US')
+        map_dict = test_map.get_dictionary()
+
+        # Only '\n' ends a line. The '\r' before it is part of the value, as with the former pyparsing grammar.
+        self.assertEqual('entry1_value\r', map_dict['entry1_key'].value)
+        self.assertEqual('entry1_comment\r', map_dict['entry1_key'].comment)
+        self.assertEqual('entry2_value\u2028continued\r', map_dict['entry2_key'].value)
+
+    def test_packed_entries(self):
+        test_data = ("entry1_key=entry1_value\n"
+                     "# comment 1\n"
+                     "entry2_key==\u30c6\u30b9\u30c8\n"
+                     "entry3_key=\n"
+                     )
+        entries = list(SgMap.from_text(test_data, 'en_US').get_values())
+
+        packed_entries = PackedEntries(entries)
+
+        self.assertEqual(3, len(packed_entries))
+        self.assertEqual(entries, list(packed_entries))
+        self.assertEqual(entries, list(pickle.loads(pickle.dumps(packed_entries))))
+        self.assertEqual([], list(PackedEntries([])))
+        with self.assertRaises(ValueError):
+            PackedEntries([ParsedEntry(key='key', value='a\0b', comment='', no_translation_needed=False)])
+
+
+def parse_with_pyparsing(text: str) -> list:
+    """
+    The pyparsing grammar that SgMap used before the line-oriented parser, as the reference for its results.
+    """
+    from pyparsing import (CharsNotIn, rest_of_line, LineEnd, Suppress, Group, ZeroOrMore, OneOrMore, StringEnd,
+                           Combine, Literal, MatchFirst, White, Optional)
+
+    equals = MatchFirst([
+        Literal('=\\').set_results_name('split_line_operator') + LineEnd() + Optional(White()),
+        Literal('==').set_results_name('double_equals'),
+        Literal('=').set_results_name('single_equal')
+    ])
+    key_content = Combine(ZeroOrMore(Literal('\\=') | CharsNotIn('=', exact=1)))
+    comment = Group(Suppress('#') + White() + rest_of_line('comment'))
+    key_value_pair = Group(key_content('key') + equals + rest_of_line('value') + LineEnd())
+    parser = OneOrMore(comment | key_value_pair) + StringEnd()
+
+    entries = []
+    output_entry = None
+    for item in parser.parse_string(text):
+        if 'comment' in item:
+            if output_entry:
+                entries.append(output_entry._replace(comment=item.comment))
+                output_entry = None
+        else:
+            if output_entry:
+                entries.append(output_entry)
+            output_entry = ParsedEntry(key=item.key, value=item.value or '', comment='',
+                                       no_translation_needed='double_equals' in item)
+    if output_entry:
+        entries.append(output_entry)
+    return list({entry.key: entry for entry in entries}.values())
+
+
+@unittest.skipIf(pyparsing is None, 'pyparsing is not installed')
+class TestSgMapSameAsPyparsing(unittest.TestCase):
+    CASES = {
+        'standard': "entry1_key=entry1_value\nentry2_key==entry2_value\nentry3_key=\n",
+        'comments': "# header\nentry1_key=entry1_value\n#   entry1_comment  \n# second comment\nentry2_key=v\n",
+        'tab_comment': "entry1_key=entry1_value\n#\tentry1_comment\n",
+        'hash_without_whitespace': "entry1_key=entry1_value\n#entry2_key=entry2_value\nentry3_key=v\n",
+        'empty_comment': "entry1_key=entry1_value\n#\n\nentry2_key=entry2_value\nentry3_key=v\n",
+        'empty_comment_at_end': "entry1_key=entry1_value\n#   \n",
+        'split_line': "entry1_key=\\\n   entry1_value  \nentry2_key=\\  \n\n\nentry2_value\n",
+        'split_line_comment': "entry1_key=\\\n# entry1_value\nentry2_key=\\\n#entry2_value\nentry3_key=v\n",
+        'split_line_at_end': "entry1_key=v\nentry2_key=\\\n",
+        'no_translation_split_line': "entry1_key==\\\nentry2_key=v\n",
+        'escaped_equals': "entry1\\=key=entry1_value\nentry2\\==entry2_value\nentry3_key=a=b\\=c\n",
+        'indented': "  entry1_key=entry1_value\n\t# entry1_comment\n",
+        'crlf': "entry1_key=entry1_value\r\n# entry1_comment\r\nentry2_key=\\\r\n\r\nentry2_value\r\n"
+                "entry3_key==v\r\n#\r\nentry4_key=v\r\n",
+        'line_separators': "entry1_key=a\u2028b\x0cc\x85d\nentry2_key=v\n",
+        'duplicate_keys': "entry1_key=first\n# first comment\nentry2_key=v\nentry1_key=second\n",
+    }
+
+    def test_same_entries(self):
+        for name, text in self.CASES.items():
+            with self.subTest(name):
+                self.assertEqual(parse_with_pyparsing(text), list(SgMap.from_text(text, 'en_US').get_values()))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,178 @@
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import sgpo
+from benchmarks import synthetic
+from delete_extracted_comments import delete_extracted_comments
+from format_po_files import format_po_files
+from import_mismatch import import_mismatch
+from import_pot import import_pot
+from import_unknown import import_unknown
+from path_finder import PoPathFinder, get_repository_root
+from sgpo import import_report, tail_import
+from sync_all import sync_all
+
+
+def get_test_data_path(*paths: str) -> str:
+    return os.path.join(get_repository_root(), "src", "tests", "data", "test_sgpo", *paths)
+
+
+def read_bytes(file: str) -> bytes:
+    with open(file, 'rb') as f:
+        return f.read()
+
+
+class TestSyncAll(unittest.TestCase):
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+        self.finder = PoPathFinder(repository_root_dir=self.root_dir)
+        os.makedirs(self.finder.get_po_file_dir())
+
+        shutil.copyfile(get_test_data_path('import_unknown', 'case_3_messages.pot'), self.finder.get_pot_file())
+        shutil.copyfile(get_test_data_path('import_unknown', 'case_3_unknown.24_1'), self.finder.get_unknown_file())
+        shutil.copyfile(get_test_data_path('import_mismatch', 'case_1_mismatch.24_1'), self.finder.get_mismatch_file())
+        self.po_file = os.path.join(self.finder.get_po_file_dir(), 'ja_JP.po')
+        shutil.copyfile(get_test_data_path('common', 'language.po'), self.po_file)
+
+    def tearDown(self):
+        shutil.rmtree(self.root_dir)
+
+    def run_scripts_one_by_one(self) -> tuple:
+        """
+        Runs the same steps as import_unknown.py, import_mismatch.py, delete_extracted_comments.py, import_pot.py
+        and format_po_files.py, and returns the content of the pot file and the po file.
+        """
+        pot = sgpo.pofile(self.finder.get_pot_file())
+        pot.import_unknown(sgpo.pofile(self.finder.get_unknown_file()))
+        pot.sort()
+        pot.format()
+        pot.import_mismatch(sgpo.pofile(self.finder.get_mismatch_file()))
+        pot.sort()
+        pot.delete_extracted_comments()
+
+        po = sgpo.pofile(self.po_file)
+        po.import_pot(pot)
+        po.sort()
+        po.format()
+        po.format()
+
+        return pot.__unicode__(), po.__unicode__()
+
+    def test_sync_all(self):
+        expected_pot, expected_po = self.run_scripts_one_by_one()
+
+        results = sync_all(self.finder)
+
+        self.assertEqual([(self.finder.get_pot_file(), True), (self.po_file, True)], results)
+        self.assertEqual(expected_pot, sgpo.pofile(self.finder.get_pot_file()).__unicode__())
+        self.assertEqual(expected_po, sgpo.pofile(self.po_file).__unicode__())
+
+        # Nothing is left to change in the second run.
+        results = sync_all(self.finder)
+        self.assertEqual([(self.finder.get_pot_file(), False), (self.po_file, False)], results)
+
+    def test_sync_all_dry_run(self):
+        original_pot = read_bytes(self.finder.get_pot_file())
+        original_po = read_bytes(self.po_file)
+
+        results = sync_all(self.finder, dry_run=True)
+
+        self.assertEqual([(self.finder.get_pot_file(), True), (self.po_file, True)], results)
+        self.assertEqual(original_pot, read_bytes(self.finder.get_pot_file()))
+        self.assertEqual(original_po, read_bytes(self.po_file))
+
+    def test_sync_all_updates_checkpoints(self):
+        sync_all(self.finder, dry_run=True)
+        self.assertFalse(os.path.exists(tail_import.get_checkpoint_file(self.finder.get_unknown_file())))
+
+        sync_all(self.finder)
+        for input_file in (self.finder.get_unknown_file(), self.finder.get_mismatch_file()):
+            checkpoint = tail_import.read_checkpoint(tail_import.get_checkpoint_file(input_file))
+            self.assertEqual(os.path.getsize(input_file), checkpoint.offset)
+
+        # The checkpoints are valid for the saved pot file, so import_unknown.py has nothing left to import.
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertIsNone(import_unknown(self.finder, import_report.VERBOSITY_QUIET))
+
+        # Only the appended entries are imported by the next run.
+        with open(self.finder.get_unknown_file(), 'a', encoding='utf-8') as file:
+            file.write('\nmsgctxt "sync_all_key"\nmsgid "sync all msg"\nmsgstr ""\n')
+        report_file = os.path.join(self.root_dir, 'report.json')
+        results = sync_all(self.finder, report_json=report_file)
+        self.assertEqual([(self.finder.get_pot_file(), True), (self.po_file, True)], results)
+        with open(report_file, 'r', encoding='utf-8') as file:
+            reports = json.load(file)['reports']
+        self.assertEqual([{'msgctxt': 'sync_all_key', 'msgid': 'sync all msg', 'previous_msgid': None,
+                           'reason': None}], reports[0]['added'])
+        self.assertEqual(1, reports[0]['counts']['added'])
+        self.assertEqual(0, reports[0]['counts']['skipped'])
+        self.assertIsNotNone(sgpo.pofile(self.po_file).find_by_key('sync_all_key', None))
+
+    def test_sync_all_dry_run_same_as_save(self):
+        dry_run_results = sync_all(self.finder, dry_run=True)
+        self.assertEqual(dry_run_results, sync_all(self.finder))
+
+        # A file that save() would not change is reported as unchanged.
+        self.assertEqual([(self.finder.get_pot_file(), False), (self.po_file, False)],
+                         sync_all(self.finder, dry_run=True))
+
+
+class TestSyncAllSameAsScripts(unittest.TestCase):
+    """
+    Compares sync_all with the scripts run one by one, which load and save the files between the steps,
+    on a synthetic file set with fuzzy and obsolete entries.
+    """
+
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+        # Many fuzzy entries, so that some of the removed keys are fuzzy entries with a previous msgid.
+        catalog = synthetic.generate(synthetic.GeneratorOptions(size=500, seed=1, fuzzy_ratio=0.3, removed_ratio=0.05,
+                                                                obsolete_ratio=0.05))
+        self.scripts_finder = self.write_file_set(catalog, 'scripts')
+        self.sync_all_finder = self.write_file_set(catalog, 'sync_all')
+
+        po = sgpo.pofile(self.get_po_file(self.sync_all_finder))
+        removed_fuzzy_entries = [po.find_by_key(key.msgctxt, key.msgid) for key in catalog.removed_keys]
+        self.assertTrue(any(entry.previous_msgid for entry in removed_fuzzy_entries if entry.fuzzy))
+
+    def tearDown(self):
+        shutil.rmtree(self.root_dir)
+
+    def write_file_set(self, catalog: synthetic.SyntheticCatalog, name: str) -> PoPathFinder:
+        root_dir = os.path.join(self.root_dir, name)
+        synthetic.write_file_set(catalog, root_dir)
+        return PoPathFinder(repository_root_dir=root_dir)
+
+    @staticmethod
+    def get_po_file(finder: PoPathFinder) -> str:
+        return finder.get_po_files(translation_file_only=True)[0]
+
+    def test_same_files_as_scripts(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            import_unknown(self.scripts_finder, import_report.VERBOSITY_QUIET)
+            import_mismatch(self.scripts_finder, import_report.VERBOSITY_QUIET)
+            delete_extracted_comments(self.scripts_finder)
+            import_pot(1, import_report.VERBOSITY_QUIET, finder=self.scripts_finder)
+            format_po_files(self.scripts_finder)
+
+            results = sync_all(self.sync_all_finder, verbosity=import_report.VERBOSITY_QUIET)
+
+        self.assertTrue(all(result.changed for result in results))
+        self.assertEqual(read_bytes(self.scripts_finder.get_pot_file()),
+                         read_bytes(self.sync_all_finder.get_pot_file()))
+        self.assertEqual(read_bytes(self.get_po_file(self.scripts_finder)),
+                         read_bytes(self.get_po_file(self.sync_all_finder)))
+
+        # The obsolete entries are written as they are read back, so the second run has nothing to change.
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = sync_all(self.sync_all_finder, verbosity=import_report.VERBOSITY_QUIET)
+        self.assertFalse(any(result.changed for result in results))
+
+
+if __name__ == '__main__':
+    unittest.main()
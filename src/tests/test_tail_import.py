@@ -0,0 +1,131 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import unittest.mock
+
+import sgpo
+from import_mismatch import import_mismatch
+from import_unknown import import_unknown
+from path_finder import PoPathFinder, get_repository_root
+from sgpo import import_report, tail_import
+
+
+def get_test_data_path(*paths: str) -> str:
+    return os.path.join(get_repository_root(), "src", "tests", "data", "test_sgpo", *paths)
+
+
+def create_entry_text(msgctxt: str, msgid: str) -> str:
+    return f'msgctxt "{msgctxt}"\nmsgid "{msgid}"\nmsgstr ""\n\n'
+
+
+class TestTailImport(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.finder = PoPathFinder(self.temp_dir)
+        os.makedirs(self.finder.get_po_file_dir())
+        shutil.copyfile(get_test_data_path('import_mismatch', 'case_1_messages.pot'), self.finder.get_pot_file())
+        self.unknown_file = self.finder.get_unknown_file()
+        self.append_unknown('#\n\n' + create_entry_text('unique_key_5', 'unique msg 5'))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def append_unknown(self, text: str) -> None:
+        with open(self.unknown_file, 'a', encoding='utf-8', newline='') as file:
+            file.write(text)
+
+    def run_import_unknown(self, full: bool = False) -> import_report.ImportReport:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return import_unknown(self.finder, import_report.VERBOSITY_QUIET, full=full)
+
+    def read_pot(self) -> sgpo.SgPo:
+        return sgpo.pofile(self.finder.get_pot_file())
+
+    def test_only_appended_entries_are_imported(self):
+        self.assertEqual(1, len(self.run_import_unknown().added))
+        self.assertTrue(os.path.exists(tail_import.get_checkpoint_file(self.unknown_file)))
+        self.assertIsNone(self.run_import_unknown())
+
+        self.append_unknown(create_entry_text('unique_key_6', 'unique msg 6')
+                            + create_entry_text('context:', 'msg 7'))
+        report = self.run_import_unknown()
+        self.assertEqual([('unique_key_6', 'unique msg 6'), ('context:', 'msg 7')],
+                         [(entry.msgctxt, entry.msgid) for entry in report.added])
+        self.assertEqual([], report.skipped)
+
+        # Same result as importing the whole file into the original pot
+        expected = sgpo.pofile(get_test_data_path('import_mismatch', 'case_1_messages.pot'))
+        expected.import_unknown(sgpo.pofile(self.unknown_file))
+        expected.sort()
+        expected.format()
+        self.assertEqual(expected.__unicode__(), self.read_pot().__unicode__())
+
+    def test_entry_being_written_is_left_for_next_run(self):
+        self.run_import_unknown()
+        self.append_unknown('msgctxt "unique_key_6"\nmsgid "unique')
+
+        new_entries = tail_import.read_new_entries(self.unknown_file, self.finder.get_pot_file())
+        self.assertFalse(new_entries.full)
+        self.assertIsNone(new_entries.entries)
+
+        self.append_unknown(' msg 6"\nmsgstr ""')
+        new_entries = tail_import.read_new_entries(self.unknown_file, self.finder.get_pot_file())
+        self.assertEqual([('unique_key_6', 'unique msg 6')], [(entry.msgctxt, entry.msgid)
+                                                             for entry in new_entries.entries])
+        self.assertEqual(os.path.getsize(self.unknown_file), new_entries.checkpoint.offset)
+
+    def test_changed_prefix_falls_back_to_full_import(self):
+        self.run_import_unknown()
+        # The file is replaced by a new collection session.
+        with open(self.unknown_file, 'w', encoding='utf-8', newline='') as file:
+            file.write(create_entry_text('unique_key_8', 'unique msg 8'))
+
+        new_entries = tail_import.read_new_entries(self.unknown_file, self.finder.get_pot_file())
+        self.assertTrue(new_entries.full)
+        self.assertEqual(['unique_key_8'], [entry.msgctxt for entry in new_entries.entries])
+
+    def test_changed_target_falls_back_to_full_import(self):
+        self.run_import_unknown()
+        # The pot file is reverted.
+        shutil.copyfile(get_test_data_path('import_mismatch', 'case_1_messages.pot'), self.finder.get_pot_file())
+
+        report = self.run_import_unknown()
+        self.assertEqual(['unique_key_5'], [entry.msgctxt for entry in report.added])
+        self.assertEqual(1, len(self.run_import_unknown(full=True).skipped))
+
+    def test_import_mismatch_incrementally(self):
+        self.run_import_unknown()
+        mismatch_file = self.finder.get_mismatch_file()
+        shutil.copyfile(get_test_data_path('import_mismatch', 'case_1_mismatch.24_1'), mismatch_file)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(2, len(import_mismatch(self.finder, import_report.VERBOSITY_QUIET).modified))
+            self.assertIsNone(import_mismatch(self.finder, import_report.VERBOSITY_QUIET))
+
+        expected = sgpo.pofile(get_test_data_path('import_mismatch', 'case_1_expected_result.pot'))
+        expected.import_unknown(sgpo.pofile(self.unknown_file))
+        expected.sort()
+        expected.format()
+        self.assertEqual(expected.__unicode__(), self.read_pot().__unicode__())
+
+        # The checkpoint of the unknown file is still valid.
+        self.assertFalse(tail_import.read_new_entries(self.unknown_file, self.finder.get_pot_file()).full)
+
+    def test_failed_checkpoint_write_leaves_no_temporary_file(self):
+        self.run_import_unknown()
+        checkpoint_file = tail_import.get_checkpoint_file(self.unknown_file)
+        checkpoint = tail_import.read_checkpoint(checkpoint_file)
+        files = sorted(os.listdir(self.finder.get_po_file_dir()))
+
+        with unittest.mock.patch.object(tail_import.json, 'dump', side_effect=OSError('No space left on device')):
+            self.assertRaises(OSError, tail_import.write_checkpoint, checkpoint_file,
+                              checkpoint._replace(offset=0))
+
+        self.assertEqual(checkpoint, tail_import.read_checkpoint(checkpoint_file))
+        self.assertEqual(files, sorted(os.listdir(self.finder.get_po_file_dir())))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import argparse
+import sys
+
+import phase_profiler
+from path_finder import PoPathFinder
+from sgpo import catalog_validator
+
+
+def main():
+    args = parse_args()
+    with phase_profiler.profiling(args):
+        valid = validate_po_files(args.files, args.strict, args.quiet)
+    sys.exit(0 if valid else 1)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Checks 'messages.pot' and all '<locale_code>.po' for duplicate, "
+                                                 "shadowed and conflicting keys.")
+    parser.add_argument('files', nargs='*', metavar='FILE',
+                        help="po files to check (default: 'messages.pot' and all '<locale_code>.po')")
+    parser.add_argument('--strict', action='store_true', help='fail on conflicting patterns too')
+    parser.add_argument('-q', '--quiet', action='store_true', help='print only the issues')
+    phase_profiler.add_arguments(parser)
+    return parser.parse_args()
+
+
+def validate_po_files(files: list = None, strict: bool = False, quiet: bool = False,
+                      finder: PoPathFinder = None) -> bool:
+    """
+    Prints the issues of each file. Returns False if a file has errors, or warnings if strict is set.
+    """
+    if not files:
+        finder = finder or PoPathFinder()
+        files = [finder.get_pot_file(), *sorted(finder.get_po_files(translation_file_only=True))]
+
+    valid = True
+    error_count = 0
+    warning_count = 0
+    for file in files:
+        try:
+            report = catalog_validator.validate_file(file)
+        except (OSError, ValueError) as e:
+            print(f'{file}: {e}')
+            valid = False
+            continue
+
+        if not quiet:
+            print(f' po file:\t{file}')
+        for issue in report.issues:
+            print(catalog_validator.format_issue(issue, file))
+        error_count += len(report.errors)
+        warning_count += len(report.warnings)
+        valid = valid and report.is_valid(strict)
+
+    if not quiet:
+        print(f'{error_count} errors, {warning_count} warnings in {len(files)} files')
+    return valid
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import argparse
+
+import phase_profiler
+from path_finder import PoPathFinder
+from po_watcher import PoWatcher
+from sgpo import import_report
+
+
+def main():
+    args = parse_args()
+    watcher = PoWatcher(PoPathFinder(), save_interval=args.interval, debounce=args.debounce,
+                        verbosity=args.verbosity)
+
+    print(f'watching:\t{watcher.finder.get_po_file_dir()}')
+    print('Press Ctrl+C to save and stop.')
+    # The profile covers the whole session and is printed when the watcher stops.
+    with phase_profiler.profiling(args):
+        watcher.run(poll_interval=args.poll_interval)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Merges the keys that SmartGit appends to the unknown/mismatch files into 'messages.pot' "
+                    "while SmartGit is running, and imports 'messages.pot' into all '<locale_code>.po'.")
+    parser.add_argument('-i', '--interval', type=float, default=10.0,
+                        help='seconds between saves of the changed files (default: 10)')
+    parser.add_argument('--debounce', type=float, default=0.5,
+                        help='seconds a file must stay unchanged before it is processed (default: 0.5)')
+    parser.add_argument('--poll-interval', type=float, default=0.2,
+                        help='seconds between checks of the files (default: 0.2)')
+    parser.add_argument('-v', '--verbose', dest='verbosity', action='store_const',
+                        const=import_report.VERBOSITY_ENTRIES, default=import_report.VERBOSITY_SUMMARY,
+                        help='print every imported entry')
+    parser.add_argument('-q', '--quiet', dest='verbosity', action='store_const', const=import_report.VERBOSITY_QUIET,
+                        help='print only the saved files')
+    phase_profiler.add_arguments(parser)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main()